@@ -1,4 +1,9 @@
 from django.contrib import admin
 from accounts.models import CustomUser
 
-admin.site.register(CustomUser)
\ No newline at end of file
+
+@admin.register(CustomUser)
+class CustomUserAdmin(admin.ModelAdmin):
+    # Used by the autocomplete widgets of the api admin
+    search_fields = ("username", "email")
+    ordering = ("username",)
@@ -1,24 +1,113 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.utils.functional import cached_property
 from .models import Vacancy, Resume, Application, FavoriteVacancy
 
+
+def estimated_row_count(model):
+    """Cheap row count estimate from the database's own bookkeeping, None if unavailable"""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        elif connection.vendor == "sqlite":
+            # Rightmost key of the rowid b-tree; an upper bound that ignores deleted rows
+            cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}")
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Uses the row estimate instead of COUNT(*) for unfiltered changelists of large tables
+
+    On SQLite the estimate is MAX(rowid), which keeps counting rows removed by
+    archival deletes until the table is vacuumed, so the page count overshoots.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(self.object_list.model)
+            if estimate is not None and estimate > settings.ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist defaults for tables that grow to millions of rows
+
+    Search is Django's `__icontains` search over `search_fields`, which scans
+    the table. A term starting with "^" asks for a case-insensitive prefix
+    match on `prefix_search_field` only, a range scan over its LOWER() index.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    prefix_search_field = None
+
+    @property
+    def search_help_text(self):
+        if self.prefix_search_field:
+            field = self.prefix_search_field.replace("__", " ")
+            return f"Start with ^ to quickly find {field} values beginning with the rest of the term"
+        return None
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if term.startswith("^") and self.prefix_search_field:
+            term = term[1:].strip()
+            if not term:
+                return queryset, False
+            matches = queryset.alias(search_key=Lower(self.prefix_search_field)).filter(
+                search_key__gte=Lower(Value(term)), search_key__lt=Lower(Value(term + "\U0010ffff"))
+            )
+            return matches, False
+        return super().get_search_results(request, queryset, search_term)
+
+
 @admin.register(Vacancy)
-class VacancyAdmin(admin.ModelAdmin):
+class VacancyAdmin(LargeTableAdmin):
     list_display = ("title", "author", "is_active", "created_at")
     list_filter = ("is_active", "employment_type", "work_format")
+    list_select_related = ("author",)
     search_fields = ("title", "author__username")
+    prefix_search_field = "title"
+    autocomplete_fields = ("author", "duplicate_of")
 
 @admin.register(Resume)
-class ResumeAdmin(admin.ModelAdmin):
+class ResumeAdmin(LargeTableAdmin):
     list_display = ("full_name", "user", "file")
+    list_select_related = ("user",)
     search_fields = ("full_name", "user__username")
+    prefix_search_field = "full_name"
+    autocomplete_fields = ("user",)
 
 @admin.register(Application)
-class ApplicationAdmin(admin.ModelAdmin):
+class ApplicationAdmin(LargeTableAdmin):
     list_display = ("applicant", "vacancy", "status", "applied_at")
     list_filter = ("status",)
+    list_select_related = ("applicant", "vacancy")
     search_fields = ("applicant__username", "vacancy__title")
+    prefix_search_field = "vacancy__title"
+    autocomplete_fields = ("applicant", "vacancy", "resume")
 
 @admin.register(FavoriteVacancy)
-class FavoriteVacancyAdmin(admin.ModelAdmin):
+class FavoriteVacancyAdmin(LargeTableAdmin):
     list_display = ("user", "vacancy", "added_at")
-    search_fields = ("user__username", "vacancy__title")
\ No newline at end of file
+    list_select_related = ("user", "vacancy")
+    search_fields = ("user__username", "vacancy__title")
+    prefix_search_field = "vacancy__title"
+    autocomplete_fields = ("user", "vacancy")
@@ -0,0 +1,222 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from heapq import nsmallest
+
+from django.conf import settings
+
+from .background import BackgroundRebuild
+from .models import Vacancy
+
+
+FIELDS = ("title", "company", "location")
+
+
+def normalize(value):
+    return " ".join(value.casefold().split())
+
+
+class PrefixNode:
+    __slots__ = ("top", "count")
+
+    def __init__(self):
+        self.top = []
+        self.count = 0
+
+
+class PrefixIndex:
+    """Word-start suffixes of weighted values for search-as-you-type
+
+    Every prefix of up to `depth` characters is a node holding its best values
+    ranked by weight, ties in alphabetical order, so the short prefixes that match most of the
+    index answer from a precomputed list instead of a scan. Writes keep the
+    lists current; a node holds up to twice `top_k` values and only rescans the
+    sorted suffix array when removals leave it with fewer than `top_k`. Longer
+    prefixes match few suffixes and are answered by a bisect range scan.
+    """
+
+    def __init__(self, top_k=50, depth=4):
+        self.keys = []
+        self.weights = {}
+        self.nodes = {}
+        self.top_k = top_k
+        self.capacity = top_k * 2
+        self.depth = depth
+
+    @classmethod
+    def build(cls, values, **options):
+        """Index `values` at once, sorting the suffixes and ranking every node a single time"""
+        index = cls(**options)
+        for value in values:
+            if value:
+                index.weights[value] = index.weights.get(value, 0) + 1
+        members = defaultdict(list)
+        for value in index.weights:
+            index.keys.extend((suffix, value) for suffix in index.suffixes(value))
+            for prefix in index.prefixes(value):
+                members[prefix].append(value)
+        index.keys.sort()
+        for prefix, found in members.items():
+            node = index.nodes[prefix] = PrefixNode()
+            node.count = len(found)
+            node.top = nsmallest(index.capacity, found, key=index.rank)
+        return index
+
+    def rank(self, value):
+        """Sort key, best first: heavier values, then alphabetical"""
+        return (-self.weights.get(value, 0), value)
+
+    def suffixes(self, value):
+        words = normalize(value).split(" ")
+        return {" ".join(words[i:]) for i in range(len(words))}
+
+    def prefixes(self, value):
+        return {
+            suffix[:length]
+            for suffix in self.suffixes(value)
+            for length in range(1, min(len(suffix), self.depth) + 1)
+        }
+
+    def add(self, value, weight=1):
+        if not value:
+            return
+        current = self.weights.get(value, 0)
+        self.weights[value] = current + weight
+        if current == 0:
+            for suffix in self.suffixes(value):
+                insort(self.keys, (suffix, value))
+        for prefix in self.prefixes(value):
+            if current == 0:
+                self.nodes.setdefault(prefix, PrefixNode()).count += 1
+            self.reposition(prefix, value)
+
+    def remove(self, value, weight=1):
+        current = self.weights.get(value, 0)
+        if current == 0:
+            return
+        if current > weight:
+            self.weights[value] = current - weight
+            for prefix in self.prefixes(value):
+                self.reposition(prefix, value)
+            return
+        prefixes = self.prefixes(value)
+        del self.weights[value]
+        for suffix in self.suffixes(value):
+            index = bisect_left(self.keys, (suffix, value))
+            if index < len(self.keys) and self.keys[index] == (suffix, value):
+                del self.keys[index]
+        for prefix in prefixes:
+            node = self.nodes[prefix]
+            node.count -= 1
+            if node.count == 0:
+                del self.nodes[prefix]
+            elif value in node.top:
+                node.top.remove(value)
+                self.refill(prefix)
+
+    def reposition(self, prefix, value):
+        """Re-rank `value` in a node after it joined the node or its weight changed
+
+        The node's list is always the best len(list) of its values, so a value
+        ranked below the last kept one may stay out of it.
+        """
+        node = self.nodes[prefix]
+        top = node.top
+        if value in top:
+            top.remove(value)
+        rank = self.rank(value)
+        if len(top) + 1 >= node.count or (top and rank < self.rank(top[-1])):
+            # The list is short, a linear scan from the bottom is enough
+            index = len(top)
+            while index > 0 and self.rank(top[index - 1]) > rank:
+                index -= 1
+            top.insert(index, value)
+            del top[self.capacity:]
+        else:
+            self.refill(prefix)
+
+    def refill(self, prefix):
+        node = self.nodes[prefix]
+        if len(node.top) < min(self.top_k, node.count):
+            node.top = self.scan(prefix, self.capacity)
+
+    def scan(self, prefix, limit):
+        matches = set()
+        index = bisect_left(self.keys, (prefix,))
+        while index < len(self.keys) and self.keys[index][0].startswith(prefix):
+            matches.add(self.keys[index][1])
+            index += 1
+        return nsmallest(limit, matches, key=self.rank)
+
+    def search(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        if len(prefix) <= self.depth and limit <= self.top_k:
+            node = self.nodes.get(prefix)
+            return node.top[:limit] if node else []
+        return self.scan(prefix, limit)
+
+
+class VacancyAutocomplete(BackgroundRebuild):
+    """Prefix indexes over active vacancy titles, companies and locations
+
+    Writes in this process update the indexes through signals; the whole index
+    is rebuilt in the background after AUTOCOMPLETE_REFRESH_SECONDS to pick up
+    other processes' writes.
+    """
+
+    refresh_setting = "AUTOCOMPLETE_REFRESH_SECONDS"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.indexes = {}
+        self.entries = {}
+
+    def rebuild(self):
+        entries = {
+            row[0]: row[1:]
+            for row in Vacancy.objects.filter(is_active=True).values_list("pk", *FIELDS).iterator()
+        }
+        options = {"top_k": settings.AUTOCOMPLETE_TOP_K, "depth": settings.AUTOCOMPLETE_PREFIX_DEPTH}
+        indexes = {
+            field: PrefixIndex.build((values[position] for values in entries.values()), **options)
+            for position, field in enumerate(FIELDS)
+        }
+        with self.lock:
+            self.indexes, self.entries = indexes, entries
+            self.built_at = time.monotonic()
+
+    def update(self, vacancy):
+        values = tuple(getattr(vacancy, field) for field in FIELDS) if vacancy.is_active else None
+        self.replace(vacancy.pk, values)
+
+    def discard(self, pk):
+        self.replace(pk, None)
+
+    def replace(self, pk, values):
+        with self.lock:
+            if self.built_at is None:
+                return
+            previous = self.entries.pop(pk, None)
+            if previous == values:
+                if values is not None:
+                    self.entries[pk] = values
+                return
+            if previous is not None:
+                for field, value in zip(FIELDS, previous):
+                    self.indexes[field].remove(value)
+            if values is not None:
+                self.entries[pk] = values
+                for field, value in zip(FIELDS, values):
+                    self.indexes[field].add(value)
+
+    def suggest(self, prefix, fields=FIELDS, limit=10):
+        self.ensure_built()
+        with self.lock:
+            return {field: self.indexes[field].search(prefix, limit) for field in fields}
+
+
+vacancy_autocomplete = VacancyAutocomplete()
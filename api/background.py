@@ -0,0 +1,46 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRebuild:
+    """Refresh policy for process-local indexes rebuilt from the database
+
+    The first build runs on first use, or earlier in the serve command's
+    warm-up. After that a stale index keeps answering while a single daemon
+    thread rebuilds it, so no request waits for a full rebuild. Subclasses
+    provide `lock`, `built_at`, rebuild() and the name of the setting that
+    holds the refresh interval.
+    """
+
+    refresh_setting = None
+    rebuilding = False
+
+    def ensure_built(self):
+        if self.built_at is None:
+            self.rebuild()
+        elif time.monotonic() - self.built_at > getattr(settings, self.refresh_setting):
+            self.rebuild_in_background()
+
+    def rebuild_in_background(self):
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        threading.Thread(target=self.background_rebuild, name=f"{type(self).__name__}-rebuild", daemon=True).start()
+
+    def background_rebuild(self):
+        try:
+            self.rebuild()
+        except Exception:
+            # built_at is unchanged, so the next request schedules another attempt
+            logger.exception("Rebuilding %s failed", type(self).__name__)
+        finally:
+            self.rebuilding = False
+            connections.close_all()
@@ -0,0 +1,72 @@
+from django.db import router, transaction
+from django.dispatch import Signal
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# Sent once per batch with `instances` and `created`, in place of the post_save
+# that bulk_create and bulk_update skip for every row
+post_batch_save = Signal()
+
+
+def send_batch_saved(model, instances, created):
+    if instances:
+        post_batch_save.send(sender=model, instances=instances, created=created, using=router.db_for_write(model))
+
+
+class BatchCreateMixin:
+    """Creates a list of objects posted in one request, with a result per item
+
+    Every item is validated with the view's serializer; the valid ones are
+    handed to `perform_batch_create` together, which returns
+    {item index: result}. Responds 201 when every item went through, 207 when
+    only some did and 400 when none did.
+    """
+    max_batch_size = None
+
+    def get_max_batch_size(self):
+        return self.max_batch_size
+
+    def create(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Expected a non-empty list of items"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = self.get_max_batch_size()
+        if limit and len(items) > limit:
+            return Response(
+                {"detail": f"A batch can hold at most {limit} items, got {len(items)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer))
+            else:
+                results[index] = {"index": index, "status": "invalid", "errors": serializer.errors}
+        if valid:
+            for index, result in self.perform_batch_create(valid).items():
+                results[index] = {"index": index, **result}
+
+        failed = sum(result["status"] == "invalid" for result in results)
+        if not failed:
+            code = status.HTTP_201_CREATED
+        elif failed < len(results):
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({"results": results}, status=code)
+
+    def perform_batch_create(self, items):
+        """One INSERT for the validated items, then post_batch_save for the batch
+
+        Suits serializers without many-to-many fields; override to add fields
+        or turn items down.
+        """
+        model = self.get_serializer_class().Meta.model
+        with transaction.atomic():
+            instances = model.objects.bulk_create([model(**serializer.validated_data) for _, serializer in items])
+            send_batch_saved(model, instances, created=True)
+        return {index: {"status": "created", "id": instance.pk} for (index, _), instance in zip(items, instances)}
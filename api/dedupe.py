@@ -0,0 +1,192 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from .background import BackgroundRebuild
+from .models import Vacancy
+
+
+TEXT_FIELDS = ("title", "description", "requirements")
+# Mersenne prime 2^61 - 1: hash values stay below 2^64 and fit an unsigned array
+PRIME = (1 << 61) - 1
+WORD = re.compile(r"\w+")
+
+_permutations = {}
+
+
+def permutations(count):
+    """`count` fixed (a, b) pairs for the hash family (a * x + b) mod PRIME"""
+    if count not in _permutations:
+        generator = random.Random(count)
+        _permutations[count] = [(generator.randrange(1, PRIME), generator.randrange(PRIME)) for _ in range(count)]
+    return _permutations[count]
+
+
+def shingles(text, size):
+    words = WORD.findall(text.casefold())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def signature(title, description, requirements):
+    """MinHash signature of the vacancy text as DEDUPE_PERMUTATIONS 8-byte values"""
+    text = "\n".join(value or "" for value in (title, description, requirements))
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little") % PRIME
+        for shingle in shingles(text, settings.DEDUPE_SHINGLE_SIZE)
+    ] or [0]
+    return array("Q", [
+        min((a * value + b) % PRIME for value in hashes) for a, b in permutations(settings.DEDUPE_PERMUTATIONS)
+    ]).tobytes()
+
+
+def signature_of(vacancy):
+    return signature(*(getattr(vacancy, field) for field in TEXT_FIELDS))
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity: the share of positions where the signatures agree"""
+    first, second = array("Q", first), array("Q", second)
+    if len(first) != len(second) or not first:
+        return 0.0
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+def band_keys(signature, scope):
+    """One bucket key per LSH band; signatures agreeing on a whole band collide"""
+    step = len(signature) // settings.DEDUPE_BANDS
+    return [hash((scope, band, signature[band * step:(band + 1) * step])) for band in range(settings.DEDUPE_BANDS)]
+
+
+def valid(signature):
+    return signature is not None and len(signature) == settings.DEDUPE_PERMUTATIONS * 8
+
+
+class LSHIndex:
+    """Buckets of ids by band key; a lookup costs DEDUPE_BANDS dict probes"""
+
+    def __init__(self):
+        self.buckets = defaultdict(set)
+        self.keys = {}
+
+    def add(self, pk, signature, scope):
+        self.remove(pk)
+        keys = self.keys[pk] = band_keys(signature, scope)
+        for key in keys:
+            self.buckets[key].add(pk)
+
+    def remove(self, pk):
+        for key in self.keys.pop(pk, ()):
+            bucket = self.buckets[key]
+            bucket.discard(pk)
+            if not bucket:
+                del self.buckets[key]
+
+    def candidates(self, signature, scope):
+        found = set()
+        for key in band_keys(signature, scope):
+            found.update(self.buckets.get(key, ()))
+        return found
+
+
+class VacancyDuplicates(BackgroundRebuild):
+    """LSH index of active original vacancies, scoped by author
+
+    Only reposts by the same employer count as duplicates. The index holds band
+    keys only; candidate signatures are read back from the database to confirm
+    the similarity. Writes in this process update the index through signals and
+    it is rebuilt in the background after DEDUPE_REFRESH_SECONDS. Until then the
+    author's vacancies saved since the rebuild started, possibly by other
+    processes, are read from the database as extra candidates.
+    """
+
+    refresh_setting = "DEDUPE_REFRESH_SECONDS"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.built_from = None
+        self.index = LSHIndex()
+
+    def rebuild(self):
+        built_from = timezone.now()
+        index = LSHIndex()
+        rows = Vacancy.objects.filter(is_active=True, duplicate_of__isnull=True, minhash__isnull=False)
+        for pk, author_id, minhash in rows.values_list("pk", "author_id", "minhash").iterator():
+            if valid(minhash):
+                index.add(pk, bytes(minhash), author_id)
+        with self.lock:
+            self.index = index
+            self.built_from = built_from
+            self.built_at = time.monotonic()
+
+    def update(self, vacancy):
+        with self.lock:
+            if self.built_at is None:
+                return
+            if vacancy.is_active and vacancy.duplicate_of_id is None and valid(vacancy.minhash):
+                self.index.add(vacancy.pk, bytes(vacancy.minhash), vacancy.author_id)
+            else:
+                self.index.remove(vacancy.pk)
+
+    def discard(self, pk):
+        with self.lock:
+            self.index.remove(pk)
+
+    def find(self, signature, author_id, exclude=None):
+        """Id of the most similar original posted by the author, if it reaches DEDUPE_THRESHOLD"""
+        self.ensure_built()
+        with self.lock:
+            candidates = self.index.candidates(signature, author_id)
+            built_from = self.built_from
+        candidates |= set(
+            Vacancy.objects.filter(author_id=author_id, updated_at__gte=built_from).values_list("pk", flat=True)
+        )
+        candidates.discard(exclude)
+        if not candidates:
+            return None
+        rows = Vacancy.objects.filter(pk__in=candidates, is_active=True, duplicate_of__isnull=True)
+        best, best_score = None, settings.DEDUPE_THRESHOLD
+        for pk, minhash in rows.values_list("pk", "minhash"):
+            if not valid(minhash):
+                continue
+            score = similarity(signature, minhash)
+            if score >= best_score:
+                best, best_score = pk, score
+        return best
+
+
+vacancy_duplicates = VacancyDuplicates()
+
+
+def lock_author(author_id):
+    """Serialise duplicate checks of one employer until the end of the transaction
+
+    check() and the save that follows are not atomic: two concurrent reposts
+    could both find no original and both be saved as one. Holding a row lock
+    on the author makes the second wait for the first to commit. SQLite has no
+    row locks; there the race remains and `dedupe_vacancies` flags such pairs
+    on its next run.
+    """
+    if settings.DEDUPE_ENABLED:
+        list(CustomUser.objects.select_for_update().filter(pk=author_id).values_list("pk", flat=True))
+
+
+def check(values, author_id, exclude=None):
+    """Signature of the vacancy text in `values` and the original it repeats, if any
+
+    Call it after lock_author() in the transaction that saves the vacancy.
+    """
+    minhash = signature(*(values.get(field) for field in TEXT_FIELDS))
+    if not settings.DEDUPE_ENABLED:
+        return minhash, None
+    return minhash, vacancy_duplicates.find(minhash, author_id, exclude=exclude)
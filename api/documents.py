@@ -0,0 +1,135 @@
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import Vacancy, VacancyDocument
+from .renderers import render_json
+from .serializers import VacancySerializer
+
+
+def can_serve(request):
+    """Stored documents hold the full JSON representation only"""
+    if not settings.VACANCY_DOCUMENTS_ENABLED:
+        return False
+    if request.query_params.get("fields") or request.query_params.get("exclude"):
+        return False
+    return request.accepted_renderer.format == "json"
+
+
+def build_document(vacancy, now=None):
+    body = render_json(VacancySerializer(vacancy).data)
+    return VacancyDocument(
+        vacancy=vacancy,
+        body=body,
+        body_gzip=gzip.compress(body, mtime=0) if settings.VACANCY_DOCUMENT_COMPRESS else None,
+        rendered_at=now or timezone.now(),
+    )
+
+
+def render_documents(vacancy_ids):
+    """Re-render and store documents for the given vacancies, returns {pk: document}"""
+    now = timezone.now()
+    documents = [
+        build_document(vacancy, now)
+        for vacancy in Vacancy.objects.filter(pk__in=vacancy_ids).select_related("author")
+    ]
+    VacancyDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=["vacancy"],
+        update_fields=["body", "body_gzip", "rendered_at"],
+    )
+    return {document.vacancy_id: document for document in documents}
+
+
+def is_fresh(rendered_at, now):
+    return rendered_at is not None and (now - rendered_at).total_seconds() <= settings.VACANCY_DOCUMENT_MAX_AGE
+
+
+def queue_render(vacancy_ids):
+    """Re-render documents through the task queue after their vacancies changed"""
+    from . import tasks
+
+    if settings.VACANCY_DOCUMENTS_ENABLED and vacancy_ids:
+        tasks.enqueue_many("vacancy.render_documents", [{"vacancy_id": pk} for pk in vacancy_ids])
+
+
+def queue_stale(vacancy_ids):
+    """Queue re-renders for documents found stale on read, at most once per max age per vacancy"""
+    queue_render([
+        pk for pk in vacancy_ids
+        if cache.add(f"vacancy-document:{pk}:queued", True, settings.VACANCY_DOCUMENT_MAX_AGE)
+    ])
+
+
+def load_documents(queryset):
+    """Stored bodies for a vacancy queryset in its order
+
+    Reads never write: stale documents are served as they are and queued for
+    re-rendering, vacancies without one are serialized for this response only.
+    Returns the bodies and the age in seconds of the oldest stored one served.
+    """
+    now = timezone.now()
+    rows = list(queryset.values_list("pk", "document__body", "document__rendered_at"))
+    missing = [pk for pk, body, _ in rows if body is None]
+    stale = [pk for pk, body, rendered_at in rows if body is not None and not is_fresh(rendered_at, now)]
+    rendered = {}
+    if missing:
+        rendered = {
+            vacancy.pk: render_json(VacancySerializer(vacancy).data)
+            for vacancy in Vacancy.objects.filter(pk__in=missing).select_related("author")
+        }
+    queue_stale(missing + stale)
+
+    bodies = []
+    oldest = now
+    for pk, body, rendered_at in rows:
+        if body is None:
+            if pk in rendered:
+                bodies.append(rendered[pk])
+        else:
+            bodies.append(bytes(body))
+            oldest = min(oldest, rendered_at)
+    return bodies, (now - oldest).total_seconds()
+
+
+def load_document(pk):
+    """Document for one vacancy, None when the vacancy doesn't exist
+
+    A missing document is built for this response without being stored.
+    """
+    document = VacancyDocument.objects.filter(vacancy_id=pk).first()
+    if document is not None:
+        if not is_fresh(document.rendered_at, timezone.now()):
+            queue_stale([pk])
+        return document
+    vacancy = Vacancy.objects.filter(pk=pk).select_related("author").first()
+    if vacancy is None:
+        return None
+    queue_stale([pk])
+    return build_document(vacancy)
+
+
+def document_response(body, age, status=200, headers=None):
+    response = HttpResponse(body, content_type="application/json", status=status, headers=headers)
+    response["X-Document-Age"] = f"{age:.3f}"
+    return response
+
+
+def list_response(queryset):
+    bodies, age = load_documents(queryset)
+    return document_response(b"[" + b",".join(bodies) + b"]", age)
+
+
+def detail_response(request, document):
+    age = (timezone.now() - document.rendered_at).total_seconds()
+    accepts_gzip = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+    if accepts_gzip and document.body_gzip is not None:
+        response = document_response(bytes(document.body_gzip), age, headers={"Content-Encoding": "gzip"})
+    else:
+        response = document_response(bytes(document.body), age)
+    response["Vary"] = "Accept-Encoding"
+    return response
@@ -0,0 +1,113 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import content_disposition_header, http_date, parse_etags
+
+
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single byte range, None to serve the whole file, False if unsatisfiable
+
+    Multi-range requests are answered with the whole file, which RFC 9110 allows.
+    """
+    match = RANGE_HEADER.match(header.strip())
+    if not match or size == 0:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def protected_file_response(request, field_file, filename=None, as_attachment=True):
+    """Send a stored file that the caller was already authorised to read
+
+    With PROTECTED_MEDIA_SERVER set to "nginx" or "sendfile" the transfer is
+    handed to the front server (X-Accel-Redirect to PROTECTED_MEDIA_PREFIX, or
+    X-Sendfile with the absolute path), which then takes care of ranges and
+    conditional requests itself. Otherwise the file is sent from here with
+    ETag, Last-Modified, Range and private caching headers; full responses go
+    through FileResponse so WSGI servers can use sendfile().
+    """
+    filename = filename or os.path.basename(field_file.name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    disposition = content_disposition_header(as_attachment, filename)
+
+    if settings.PROTECTED_MEDIA_SERVER in ("nginx", "sendfile"):
+        response = HttpResponse(content_type=content_type)
+        if settings.PROTECTED_MEDIA_SERVER == "nginx":
+            response["X-Accel-Redirect"] = settings.PROTECTED_MEDIA_PREFIX + quote(field_file.name)
+        else:
+            response["X-Sendfile"] = field_file.path
+        response["Content-Disposition"] = disposition
+        response["Cache-Control"] = f"private, max-age={settings.PROTECTED_MEDIA_MAX_AGE}"
+        return response
+
+    path = field_file.path
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("File not found")
+    etag = file_etag(stat)
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == "*"):
+        response = HttpResponseNotModified()
+    else:
+        byte_range = None
+        range_header = request.headers.get("Range")
+        if_range = request.headers.get("If-Range")
+        if range_header and (not if_range or if_range == etag):
+            byte_range = parse_range(range_header, stat.st_size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416, content_type=content_type)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+        elif byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(path, start, end - start + 1), status=206, content_type=content_type
+            )
+            response["Content-Length"] = str(end - start + 1)
+            response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            response["Content-Disposition"] = disposition
+        else:
+            response = FileResponse(
+                open(path, "rb"), as_attachment=as_attachment, filename=filename, content_type=content_type
+            )
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = f"private, max-age={settings.PROTECTED_MEDIA_MAX_AGE}"
+    patch_vary_headers(response, ["Authorization"])
+    return response
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import uuid
+from collections import defaultdict, deque
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from .renderers import render_json
+
+
+@dataclass
+class Event:
+    id: str
+    seq: int
+    user_ids: tuple
+    name: str
+    data: dict
+
+    def encode(self):
+        return f"id: {self.id}\nevent: {self.name}\ndata: {render_json(self.data).decode()}\n\n"
+
+
+class Subscriber:
+    """One open stream; events are pushed into a bounded queue on the stream's event loop"""
+
+    def __init__(self, user_id, loop, maxsize):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def push(self, event):
+        if self.queue.full():
+            # Slow consumer: drop what is buffered and end the stream, the client
+            # reconnects with Last-Event-ID and catches up from the history.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return
+        self.queue.put_nowait(event)
+
+
+class EventHub:
+    """In-process pub/sub with a replay history for resumable streams
+
+    Subscribers only see events published by the same process, so streams
+    are only complete when the ASGI server runs a single process; several
+    processes would need a shared broker behind publish(). Event ids are
+    "<hub epoch>:<sequence>", so ids from another process or from before a
+    restart are recognised and cannot be resumed from.
+    """
+
+    def __init__(self, history_size=None, queue_size=None):
+        self.lock = threading.Lock()
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.history = deque(maxlen=history_size or settings.EVENTS_HISTORY_SIZE)
+        self.queue_size = queue_size or settings.EVENTS_QUEUE_SIZE
+        self.subscribers = defaultdict(set)
+
+    def publish(self, user_ids, name, data):
+        """Thread-safe: may be called from sync views running in worker threads"""
+        with self.lock:
+            self.seq += 1
+            event = Event(f"{self.epoch}:{self.seq}", self.seq, tuple(user_ids), name, data)
+            self.history.append(event)
+            targets = [subscriber for user_id in user_ids for subscriber in self.subscribers.get(user_id, ())]
+        for subscriber in targets:
+            subscriber.loop.call_soon_threadsafe(subscriber.push, event)
+        return event
+
+    def subscribe(self, user_id, last_event_id=None):
+        """Register a stream and return it with the events it missed since `last_event_id`
+
+        The third value is False when `last_event_id` can't be resumed from and
+        the client has to refetch its state.
+        """
+        subscriber = Subscriber(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self.lock:
+            self.subscribers[user_id].add(subscriber)
+            missed, resumable = self.replay(user_id, last_event_id)
+        return subscriber, missed, resumable
+
+    def replay(self, user_id, last_event_id):
+        if not last_event_id:
+            return [], True
+        epoch, _, seq = last_event_id.partition(":")
+        if epoch != self.epoch or not seq.isdigit():
+            return [], False
+        seq = int(seq)
+        if self.history and self.history[0].seq > seq + 1:
+            # Part of what the client missed already fell out of the history
+            return [], False
+        return [event for event in self.history if event.seq > seq and user_id in event.user_ids], True
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            subscribers = self.subscribers.get(subscriber.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.subscribers[subscriber.user_id]
+
+
+application_events = EventHub()
+
+
+TICKET_SALT = "api.events.stream-ticket"
+
+
+def issue_ticket(user_id):
+    """Short-lived, single-use credential for opening a stream
+
+    EventSource can't send an Authorization header, and a JWT in the URL would
+    end up in access logs; a ticket in the URL is useless once redeemed or
+    after EVENTS_TICKET_SECONDS.
+    """
+    return signing.dumps({"user": user_id, "nonce": uuid.uuid4().hex}, salt=TICKET_SALT)
+
+
+def redeem_ticket(ticket):
+    """The user id of a valid ticket that wasn't used before, otherwise None"""
+    try:
+        data = signing.loads(ticket, salt=TICKET_SALT, max_age=settings.EVENTS_TICKET_SECONDS)
+    except signing.BadSignature:
+        return None
+    if not cache.add(f"stream-ticket:{data['nonce']}", True, settings.EVENTS_TICKET_SECONDS):
+        return None
+    return data["user"]
+
+
+async def event_stream(hub, user_id, last_event_id=None):
+    subscriber, missed, resumable = hub.subscribe(user_id, last_event_id)
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        if not resumable:
+            yield "event: reset\ndata: {}\n\n"
+        for event in missed:
+            yield event.encode()
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                break
+            yield event.encode()
+    finally:
+        hub.unsubscribe(subscriber)
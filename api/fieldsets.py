@@ -0,0 +1,130 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_fieldset(value):
+    """Turn "id,vacancy.title" into {"id": None, "vacancy": {"title": None}}"""
+    tree = {}
+    for item in value.split(","):
+        parts = [part for part in item.strip().split(".") if part]
+        node = tree
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:
+                break
+            node = node.setdefault(part, child)
+        else:
+            if parts:
+                node[parts[-1]] = None
+    return tree
+
+
+def requested_fieldset(request):
+    """Return the (include, exclude) trees of a request, include is None when not given"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, {}
+    fields = request.query_params.get("fields")
+    exclude = request.query_params.get("exclude")
+    return (parse_fieldset(fields) if fields else None), (parse_fieldset(exclude) if exclude else {})
+
+
+def trim_fields(serializer, include, exclude):
+    fields = serializer.fields
+    for name in list(fields):
+        if include is not None and name not in include:
+            fields.pop(name)
+        elif name in exclude and exclude[name] is None:
+            fields.pop(name)
+
+    for name, field in fields.items():
+        nested_include = include.get(name) if include else None
+        nested_exclude = exclude.get(name) or {}
+        if nested_include is None and not nested_exclude:
+            continue
+        child = getattr(field, "child", field)
+        if isinstance(child, serializers.Serializer):
+            trim_fields(child, nested_include, nested_exclude)
+
+
+def resolve_path(model, source):
+    """Map a serializer source like "vacancy.title" to an ORM path, None if it isn't a column"""
+    parts = source.split(".")
+    relations = []
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        if index < len(parts) - 1:
+            if not field.is_relation:
+                return None
+            relations.append("__".join(parts[: index + 1]))
+            model = field.related_model
+    return "__".join(parts), relations
+
+
+def queryset_paths(serializer, prefix=""):
+    """Columns and relations needed to render `serializer`, or None if they can't be derived"""
+    model = serializer.Meta.model
+    extra = getattr(serializer, "field_sources", {})
+    only, related = [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in extra:
+            only.extend(prefix + source for source in extra[name])
+            continue
+        if field.source == "*" or isinstance(field, serializers.ListSerializer):
+            return None
+        resolved = resolve_path(model, field.source)
+        if resolved is None:
+            return None
+        path, relations = resolved
+        related.extend(prefix + relation for relation in relations)
+        only.extend(prefix + relation for relation in relations)
+
+        if isinstance(field, serializers.BaseSerializer):
+            nested = queryset_paths(field, prefix + path + "__")
+            if nested is None:
+                return None
+            related.append(prefix + path)
+            related.extend(nested[1])
+            only.append(prefix + path)
+            only.extend(nested[0])
+        else:
+            if isinstance(field, serializers.RelatedField):
+                related.append(prefix + path)
+            only.append(prefix + path)
+    return only, related
+
+
+class SparseFieldsetSerializerMixin:
+    """Trims the serializer to the `fields` / `exclude` query parameters of a read request"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        include, exclude = requested_fieldset(self.context.get("request"))
+        if include is not None or exclude:
+            trim_fields(self, include, exclude)
+
+
+class SparseFieldsetViewMixin:
+    """Loads only the columns the trimmed serializer renders, so unused text columns stay on disk"""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        include, exclude = requested_fieldset(self.request)
+        if include is None and not exclude:
+            return queryset
+        paths = queryset_paths(self.get_serializer())
+        if paths is None:
+            return queryset
+        only, related = paths
+        if not only:
+            only = ["pk"]
+        if related:
+            queryset = queryset.select_related(*dict.fromkeys(related))
+        return queryset.only(*dict.fromkeys(only))
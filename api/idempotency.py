@@ -0,0 +1,57 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class IdempotentCreateMixin:
+    """Replays the stored response when a create is retried with the same `Idempotency-Key`
+
+    Keys are scoped to the user and the request path. While the first request
+    is still running, `cache.add` acts as a lock and retries get 409. Only
+    successful responses are stored, so a retry after an error runs again.
+    A hash of the request body is stored with the response; reusing a key
+    with a different body is a client bug and gets 422 instead of a replay.
+    The cache is the project's default cache; with a per-process backend
+    retries that land on another worker fall back to the database constraint.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return super().create(request, *args, **kwargs)
+
+        digest = hashlib.sha256(f"{request.user.pk}:{request.path}:{key}".encode()).hexdigest()
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+        response_key, lock_key = f"idempotency:{digest}", f"idempotency:{digest}:lock"
+        stored = cache.get(response_key)
+        if stored is not None:
+            if stored["fingerprint"] != fingerprint:
+                return Response(
+                    {"detail": "This Idempotency-Key was already used with a different request body"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            return self.replay(stored)
+        if not cache.add(lock_key, True, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            return Response(
+                {"detail": "A request with this Idempotency-Key is still being processed"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        try:
+            response = super().create(request, *args, **kwargs)
+            if status.is_success(response.status_code):
+                cache.set(
+                    response_key,
+                    {"status": response.status_code, "data": response.data, "fingerprint": fingerprint},
+                    settings.IDEMPOTENCY_KEY_TTL,
+                )
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    def replay(self, stored):
+        response = Response(stored["data"], status=stored["status"])
+        response["Idempotent-Replayed"] = "true"
+        return response
@@ -0,0 +1,71 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import CustomUser
+from api.models import Vacancy
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import VacancySerializer, FlatVacancySerializer
+
+
+class Command(BaseCommand):
+    help = "Benchmark vacancy list serialization: DRF defaults against the flat/orjson fast path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options["rows"])
+            queryset = Vacancy.objects.order_by("-created_at")
+
+            def default_path():
+                return JSONRenderer().render(VacancySerializer(queryset, many=True).data)
+
+            def fast_path():
+                return FastJSONRenderer().render(FlatVacancySerializer(queryset).data)
+
+            if default_path() != fast_path():
+                raise CommandError("Fast path output differs from VacancySerializer + JSONRenderer")
+
+            baseline = self.measure(default_path, options["repeat"])
+            fast = self.measure(fast_path, options["repeat"])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"orjson installed: {orjson is not None}")
+        self.stdout.write(f"VacancySerializer + JSONRenderer: {baseline * 1000:8.1f} ms")
+        self.stdout.write(f"Flat rows + FastJSONRenderer:     {fast * 1000:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {baseline / fast:.2f}x (byte-identical output)"))
+
+    def seed(self, rows):
+        author = CustomUser.objects.create_user("bench-serialization", role="employer")
+        Vacancy.objects.bulk_create(
+            Vacancy(
+                title=f"Backend developer {i}",
+                company="TajWorks" if i % 3 else "",
+                location="Dushanbe",
+                description="Описание вакансии " * 20,
+                responsibilities="Build APIs maintain services",
+                requirements="Python, Django",
+                salary_from=Decimal(3000 + i) if i % 2 else None,
+                salary_to=Decimal("9000.50") if i % 4 else None,
+                show_salary=bool(i % 5),
+                employment_type="full_time",
+                work_format="remote",
+                author=author,
+            )
+            for i in range(rows)
+        )
+
+    def measure(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
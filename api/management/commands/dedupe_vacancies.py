@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+from collections import defaultdict, deque
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.documents import queue_render
+from api.tasks import enqueue_many
+from api.dedupe import TEXT_FIELDS, LSHIndex, signature, similarity, valid
+from api.models import Vacancy
+
+
+def signatures(rows):
+    return [(pk, signature(*values)) for pk, *values in rows]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute missing MinHash signatures in parallel, then flag near-duplicate active vacancies "
+        "of each employer as duplicates of their earliest posting"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--recompute", action="store_true",
+                            help="Recompute every signature, e.g. after changing DEDUPE_PERMUTATIONS")
+        parser.add_argument("--dry-run", action="store_true", help="Report duplicates without saving duplicate_of")
+
+    def handle(self, *args, **options):
+        computed = self.compute_signatures(options["workers"], options["batch_size"], options["recompute"])
+        self.stdout.write(f"Computed {computed} signatures")
+        flagged, cleared = self.cluster(options["dry_run"])
+        verb = "Would flag" if options["dry_run"] else "Flagged"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {flagged} duplicates, cleared {cleared} stale flags"))
+
+    def batches(self, queryset, batch_size):
+        last_pk = 0
+        while True:
+            rows = list(queryset.filter(pk__gt=last_pk).order_by("pk").values_list("pk", *TEXT_FIELDS)[:batch_size])
+            if not rows:
+                return
+            last_pk = rows[-1][0]
+            yield rows
+
+    def compute_signatures(self, workers, batch_size, recompute):
+        queryset = Vacancy.objects.all() if recompute else Vacancy.objects.filter(minhash__isnull=True)
+        if not queryset.exists():
+            return 0
+        computed = 0
+        # Children must open their own connections
+        connections.close_all()
+        with multiprocessing.Pool(workers, initializer=django.setup) as pool:
+            pending = deque()
+            for rows in self.batches(queryset, batch_size):
+                pending.append(pool.apply_async(signatures, (rows,)))
+                # Bound the batches held in memory while the database stays busy
+                if len(pending) >= workers * 2:
+                    computed += self.store(pending.popleft().get())
+            while pending:
+                computed += self.store(pending.popleft().get())
+        return computed
+
+    def store(self, results):
+        Vacancy.objects.bulk_update([Vacancy(pk=pk, minhash=minhash) for pk, minhash in results], ["minhash"])
+        return len(results)
+
+    def cluster(self, dry_run):
+        """Within each author, the oldest posting of a group of similar ones is the original"""
+        rows = (
+            Vacancy.objects.filter(is_active=True, minhash__isnull=False)
+            .order_by("author_id", "created_at", "pk")
+            .values_list("pk", "author_id", "minhash", "duplicate_of_id")
+        )
+        changes = defaultdict(list)
+        author, index, originals = None, None, {}
+        for pk, author_id, minhash, current in rows.iterator():
+            if author_id != author:
+                author, index, originals = author_id, LSHIndex(), {}
+            minhash = bytes(minhash)
+            if not valid(minhash):
+                continue
+            best, best_score = None, settings.DEDUPE_THRESHOLD
+            for candidate in index.candidates(minhash, author_id):
+                score = similarity(minhash, originals[candidate])
+                if score >= best_score:
+                    best, best_score = candidate, score
+            if best is None:
+                index.add(pk, minhash, author_id)
+                originals[pk] = minhash
+            if best != current:
+                changes[best].append(pk)
+
+        flagged = sum(len(pks) for original, pks in changes.items() if original is not None)
+        cleared = len(changes.get(None, ()))
+        if not dry_run:
+            for original, pks in changes.items():
+                Vacancy.objects.filter(pk__in=pks).update(duplicate_of=original)
+                queue_render(pks)
+            if changes.get(None):
+                # Cleared flags list those vacancies again, like a new posting
+                enqueue_many("saved_search.percolate", [{"vacancy_id": pk} for pk in changes[None]])
+        return flagged, cleared
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.documents import queue_render
+from api.models import Vacancy, Application, ArchivedVacancy, ArchivedApplication
+
+
+class Command(BaseCommand):
+    help = "Deactivate expired vacancies and move long-inactive ones to the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--expire-days", type=int, default=settings.VACANCY_EXPIRY_DAYS)
+        parser.add_argument("--archive-days", type=int, default=settings.VACANCY_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=settings.VACANCY_ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = options["batch_size"]
+
+        expired = self.expire(now - timedelta(days=options["expire_days"]), now, batch_size)
+        self.stdout.write(f"Deactivated {expired} vacancies")
+
+        vacancies, applications = self.archive(now - timedelta(days=options["archive_days"]), batch_size)
+        self.stdout.write(f"Archived {vacancies} vacancies and {applications} applications")
+
+    def expire(self, cutoff, now, batch_size):
+        total = 0
+        while True:
+            ids = list(
+                Vacancy.objects.filter(is_active=True, created_at__lt=cutoff)
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            total += Vacancy.objects.filter(pk__in=ids).update(is_active=False, updated_at=now)
+            queue_render(ids)
+
+    def archive(self, cutoff, batch_size):
+        vacancy_total = application_total = 0
+        while True:
+            with transaction.atomic():
+                vacancies = list(
+                    Vacancy.objects.filter(is_active=False, updated_at__lt=cutoff)
+                    .order_by("pk")[:batch_size]
+                )
+                if not vacancies:
+                    return vacancy_total, application_total
+
+                archived = ArchivedVacancy.objects.bulk_create(
+                    [ArchivedVacancy.from_vacancy(vacancy) for vacancy in vacancies]
+                )
+                archived_by_id = {item.original_id: item for item in archived}
+                vacancy_ids = list(archived_by_id)
+
+                applications = Application.objects.filter(vacancy_id__in=vacancy_ids)
+                archived_applications = ArchivedApplication.objects.bulk_create(
+                    [
+                        ArchivedApplication.from_application(application, archived_by_id[application.vacancy_id])
+                        for application in applications
+                    ]
+                )
+                # Cascades to the hot applications and favorites
+                Vacancy.objects.filter(pk__in=vacancy_ids).delete()
+
+            vacancy_total += len(archived)
+            application_total += len(archived_applications)
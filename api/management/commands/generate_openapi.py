@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from server.openapi import generate_schema, write_artifact
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI document served at /docs/openapi.json"
+
+    def handle(self, *args, **options):
+        body = generate_schema()
+        write_artifact(body)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(body)} bytes to {settings.OPENAPI_SCHEMA_PATH}"))
@@ -0,0 +1,419 @@
+import asyncio
+import http.client
+import io
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import Vacancy
+
+
+PREFIX = "loadtest_"
+DEFAULT_MIX = "browse=70,apply=10,favorite=10,triage=10"
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+# In-process runs measure the application, not the rate limiter
+NO_THROTTLE = {"THROTTLE_RATES": dict.fromkeys(["anon", "seeker", "employer", "staff"]), "THROTTLE_ROUTE_RATES": {}}
+# SQLite reports both "database is locked" and "database table is locked"
+LOCK_ERRORS = ("database is locked", "database table is locked")
+
+
+def is_lock_error(text):
+    return any(message in text for message in LOCK_ERRORS)
+
+
+class WSGITransport:
+    def __init__(self):
+        from server.wsgi import application
+        self.application = application
+
+    def request(self, method, path, body=None, headers=None):
+        path, _, query = path.partition("?")
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body or b""),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+            "CONTENT_LENGTH": str(len(body or b"")),
+        }
+        for name, value in (headers or {}).items():
+            key = name.upper().replace("-", "_")
+            environ[key if key == "CONTENT_TYPE" else f"HTTP_{key}"] = value
+        status = []
+        chunks = self.application(environ, lambda line, response_headers, exc_info=None: status.append(line))
+        try:
+            content = b"".join(chunks)
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+        return int(status[0].split(" ", 1)[0]), content
+
+    def close(self):
+        pass
+
+
+class ASGITransport:
+    """Runs the ASGI app on one event loop thread, as an ASGI server would"""
+
+    def __init__(self):
+        from server.asgi import application
+        self.application = application
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    async def call(self, method, path, body, headers):
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"localhost")]
+            + [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        messages = [{"type": "http.request", "body": body or b"", "more_body": False}]
+        response = {"status": None, "body": []}
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        await self.application(scope, receive, send)
+        return response["status"], b"".join(response["body"])
+
+    def request(self, method, path, body=None, headers=None):
+        return asyncio.run_coroutine_threadsafe(self.call(method, path, body, headers), self.loop).result()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class HTTPTransport:
+    """Keep-alive connection per virtual user against a running server"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            conn.request(method, self.prefix + path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self.local.conn = None
+            raise
+
+    def close(self):
+        pass
+
+
+class Stats:
+    def __init__(self, inspect_bodies):
+        # In-process runs count lock errors from got_request_exception instead
+        self.inspect_bodies = inspect_bodies
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.locked = 0
+        self.exceptions = Counter()
+
+    def record(self, name, status, seconds, body=b""):
+        with self.lock:
+            # Latency is only sampled for successful responses: fast 429s and
+            # errors would otherwise pass for throughput
+            if status < 400:
+                self.latencies[name].append(seconds * 1000)
+            self.statuses[name][status] += 1
+            if self.inspect_bodies and status >= 500 and is_lock_error(body.decode(errors="replace")):
+                self.locked += 1
+
+    def exception(self, exc):
+        with self.lock:
+            self.exceptions[type(exc).__name__] += 1
+            if is_lock_error(str(exc)):
+                self.locked += 1
+
+
+class Session:
+    def __init__(self, transport, stats, token=None):
+        self.transport = transport
+        self.stats = stats
+        self.token = token
+
+    def call(self, name, method, path, payload=None):
+        headers = {"Accept": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            headers["Content-Type"] = "application/json"
+        started = time.perf_counter()
+        try:
+            status, content = self.transport.request(method, path, body, headers)
+        except Exception as exc:
+            self.stats.exception(exc)
+            self.stats.record(name, 599, time.perf_counter() - started)
+            return 599, None
+        self.stats.record(name, status, time.perf_counter() - started, content)
+        try:
+            return status, json.loads(content) if content else None
+        except ValueError:
+            return status, None
+
+
+def browse(fixture, session):
+    session.token = None
+    session.call("vacancy list", "GET", "/api/vacancies/")
+    session.call("vacancy detail", "GET", f"/api/vacancies/{random.choice(fixture['vacancies'])}/")
+    session.call("autocomplete", "GET", f"/api/vacancies/autocomplete/?q={random.choice('bdfjmps')}")
+
+
+def apply(fixture, session):
+    session.token = random.choice(fixture["seekers"])
+    vacancy_id = random.choice(fixture["vacancies"])
+    session.call("vacancy detail", "GET", f"/api/vacancies/{vacancy_id}/")
+    session.call("apply", "POST", f"/api/vacancies/{vacancy_id}/apply/", {"cover_letter": "Load test"})
+
+
+def favorite(fixture, session):
+    session.token = random.choice(fixture["seekers"])
+    session.call("favorite toggle", "POST", f"/api/vacancies/{random.choice(fixture['vacancies'])}/favorite/")
+    session.call("favorite list", "GET", "/api/favorites/")
+
+
+def triage(fixture, session):
+    session.token = random.choice(fixture["employers"])
+    status, data = session.call("application list", "GET", "/api/applications/")
+    rows = data.get("results", []) if isinstance(data, dict) else data
+    if status == 200 and rows:
+        application_id = random.choice(rows)["id"]
+        action = random.choice(("review", "accept", "reject"))
+        session.call(f"application {action}", "POST", f"/api/applications/{application_id}/{action}/")
+
+
+SCENARIOS = {"browse": browse, "apply": apply, "favorite": favorite, "triage": triage}
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise CommandError(f"Unknown scenario {name!r}, choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Closed-loop load test with a mix of browsing, applying, favorites and employer triage. "
+        "Runs the WSGI or ASGI application in-process, or targets a running server by url. "
+        f"Creates '{PREFIX}*' users and vacancies in the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", default="wsgi", help="wsgi, asgi or a base url like http://127.0.0.1:8000")
+        parser.add_argument("--users", type=int, default=16, help="Concurrent virtual users")
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument("--mix", default=DEFAULT_MIX, help="Scenario weights, e.g. %(default)s")
+        parser.add_argument("--think", type=float, default=0.0, help="Pause between scenarios, in milliseconds")
+        parser.add_argument("--seekers", type=int, default=50)
+        parser.add_argument("--employers", type=int, default=5)
+        parser.add_argument("--vacancies", type=int, default=100)
+        parser.add_argument("--cleanup", action="store_true", help=f"Delete the '{PREFIX}*' users and exit")
+        parser.add_argument("--throttle", action="store_true",
+                            help="Keep rate limits on for in-process targets; a server url uses its own settings, "
+                                 "start it with THROTTLE_ENABLED=false to measure without them")
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            deleted, _ = get_user_model().objects.filter(username__startswith=PREFIX).delete()
+            self.stdout.write(f"Deleted {deleted} load test rows")
+            return
+
+        mix = parse_mix(options["mix"])
+        fixture = self.prepare(options)
+        transport = self.transport(options["target"])
+        in_process = options["target"] in ("wsgi", "asgi")
+        stats = Stats(inspect_bodies=not in_process)
+        throttles = override_settings(**NO_THROTTLE) if in_process and not options["throttle"] else None
+
+        def on_exception(sender, request=None, **kwargs):
+            exc = sys.exc_info()[1]
+            if exc is not None and is_lock_error(str(exc)):
+                with stats.lock:
+                    stats.locked += 1
+
+        if in_process:
+            got_request_exception.connect(on_exception)
+        if throttles is not None:
+            throttles.enable()
+        deadline = time.perf_counter() + options["seconds"]
+        names, weights = list(mix), list(mix.values())
+
+        def user():
+            session = Session(transport, stats)
+            while time.perf_counter() < deadline:
+                SCENARIOS[random.choices(names, weights)[0]](fixture, session)
+                if options["think"]:
+                    time.sleep(options["think"] / 1000)
+
+        threads = [threading.Thread(target=user) for _ in range(options["users"])]
+        started = time.perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            elapsed = time.perf_counter() - started
+            transport.close()
+            if in_process:
+                got_request_exception.disconnect(on_exception)
+            if throttles is not None:
+                throttles.disable()
+        self.report(stats, elapsed, options)
+
+    def transport(self, target):
+        if target == "wsgi":
+            return WSGITransport()
+        if target == "asgi":
+            return ASGITransport()
+        if target.startswith("http://"):
+            return HTTPTransport(target)
+        raise CommandError("--target must be wsgi, asgi or an http:// url")
+
+    def prepare(self, options):
+        User = get_user_model()
+
+        def users(role, count):
+            result = []
+            for index in range(count):
+                user, created = User.objects.get_or_create(
+                    username=f"{PREFIX}{role}{index}", defaults={"role": role, "email": f"{role}{index}@loadtest.local"}
+                )
+                if created:
+                    user.set_unusable_password()
+                    user.save(update_fields=["password"])
+                result.append(user)
+            return result
+
+        employers = users("employer", options["employers"])
+        seekers = users("seeker", options["seekers"])
+        vacancies = list(
+            Vacancy.objects.filter(author__in=employers, is_active=True).values_list("pk", flat=True)
+        )
+        titles = ("Backend developer", "Data analyst", "Frontend developer", "Java engineer", "Marketing manager",
+                  "Product designer", "Sales specialist")
+        for index in range(len(vacancies), options["vacancies"]):
+            vacancies.append(Vacancy.objects.create(
+                author=employers[index % len(employers)],
+                title=f"{titles[index % len(titles)]} {index}",
+                description="Load test vacancy",
+                company=f"Load Test {index % 10}",
+                location=random.choice(("Dushanbe", "Khujand", "Bokhtar")),
+            ).pk)
+        return {
+            "employers": [str(AccessToken.for_user(user)) for user in employers],
+            "seekers": [str(AccessToken.for_user(user)) for user in seekers],
+            "vacancies": vacancies[:options["vacancies"]],
+        }
+
+    def report(self, stats, elapsed, options):
+        total = sum(sum(statuses.values()) for statuses in stats.statuses.values())
+        succeeded = sum(len(values) for values in stats.latencies.values())
+        errors = sum(count for statuses in stats.statuses.values() for status, count in statuses.items() if status >= 500)
+        throttled = sum(statuses[429] for statuses in stats.statuses.values())
+        self.stdout.write(
+            f"{options['target']}: {options['users']} users, {elapsed:.1f}s, {total} requests, "
+            f"{succeeded / elapsed:.1f} successful req/s, {total - succeeded} non-2xx/3xx ({throttled} throttled)"
+        )
+        self.stdout.write("latencies are of successful responses only")
+        self.stdout.write(
+            f"{'request':<22}{'ok':>7}{'ok/s':>8}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>9}{'429':>6}{'4xx':>6}{'5xx':>6}"
+        )
+        everything = []
+        for name in sorted(stats.statuses):
+            values = sorted(stats.latencies[name])
+            everything.extend(values)
+            statuses = stats.statuses[name]
+            client_errors = sum(count for status, count in statuses.items() if 400 <= status < 500 and status != 429)
+            server_errors = sum(count for status, count in statuses.items() if status >= 500)
+            timings = (
+                f"{percentile(values, 0.5):>8.1f}{percentile(values, 0.9):>8.1f}{percentile(values, 0.99):>8.1f}"
+                f"{values[-1]:>9.1f}" if values else f"{'-':>8}{'-':>8}{'-':>8}{'-':>9}"
+            )
+            self.stdout.write(
+                f"{name:<22}{len(values):>7}{len(values) / elapsed:>8.1f}{timings}"
+                f"{statuses[429]:>6}{client_errors:>6}{server_errors:>6}"
+            )
+        if throttled:
+            self.stdout.write(self.style.WARNING(
+                f"{throttled} requests were throttled; they are left out of the latencies and throughput"
+            ))
+        if not total:
+            return
+
+        if everything:
+            self.stdout.write("latency histogram (ms):")
+            counts = Counter(next(bound for bound in BUCKETS if value <= bound) for value in everything)
+            widest = max(counts.values())
+            lower = 0
+            for bound in BUCKETS:
+                label = f"{lower}-{bound}" if bound != float("inf") else f">{lower}"
+                self.stdout.write(f"  {label:>12} {counts[bound]:>8} {'#' * round(40 * counts[bound] / widest)}")
+                lower = bound
+
+        style = self.style.SUCCESS if not errors and not stats.locked else self.style.ERROR
+        self.stdout.write(style(
+            f"error rate {errors / total:.2%} ({errors} server errors), "
+            f"{stats.locked} database locked errors, exceptions: {dict(stats.exceptions) or 'none'}"
+        ))
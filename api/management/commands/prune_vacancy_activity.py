@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import VacancyActivity
+
+
+class Command(BaseCommand):
+    help = "Delete hourly vacancy activity older than the trending window (TRENDING_WINDOW_HOURS)"
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+        deleted, _ = VacancyActivity.objects.filter(hour__lt=cutoff).delete()
+        self.stdout.write(f"Deleted {deleted} activity buckets")
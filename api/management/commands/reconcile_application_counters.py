@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from api.models import Vacancy, Application
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized application counters on vacancies and repair drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        aggregates = {"applications_count": Count("id")}
+        for status, field in Vacancy.STATUS_COUNTERS.items():
+            aggregates[field] = Count("id", filter=Q(status=status))
+
+        checked = repaired = 0
+        last_pk = 0
+        while True:
+            vacancies = list(
+                Vacancy.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("pk", *Vacancy.COUNTER_FIELDS)[:batch_size]
+            )
+            if not vacancies:
+                break
+            last_pk = vacancies[-1].pk
+
+            actual = {
+                row.pop("vacancy_id"): row
+                for row in Application.objects.filter(vacancy_id__in=[v.pk for v in vacancies])
+                .values("vacancy_id")
+                .annotate(**aggregates)
+                .order_by()
+            }
+            drifted = []
+            for vacancy in vacancies:
+                counts = actual.get(vacancy.pk, dict.fromkeys(Vacancy.COUNTER_FIELDS, 0))
+                if any(getattr(vacancy, field) != counts[field] for field in Vacancy.COUNTER_FIELDS):
+                    for field in Vacancy.COUNTER_FIELDS:
+                        setattr(vacancy, field, counts[field])
+                    drifted.append(vacancy)
+            if drifted:
+                Vacancy.objects.bulk_update(drifted, Vacancy.COUNTER_FIELDS)
+
+            checked += len(vacancies)
+            repaired += len(drifted)
+
+        self.stdout.write(f"Checked {checked} vacancies, repaired {repaired}")
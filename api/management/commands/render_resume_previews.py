@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api import tasks
+from api.models import Resume
+
+
+class Command(BaseCommand):
+    help = "Queue preview rendering for resumes that have a file but no preview yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-render every resume, not just missing previews")
+
+    def handle(self, *args, **options):
+        resumes = Resume.objects.exclude(file="")
+        if not options["all"]:
+            resumes = resumes.filter(preview="")
+        queued = 0
+        for resume_id, name in resumes.values_list("pk", "file").iterator():
+            tasks.enqueue("resume.render_preview", resume_id=resume_id, name=name)
+            queued += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} resume previews"))
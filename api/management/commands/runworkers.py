@@ -0,0 +1,93 @@
+import multiprocessing
+import signal
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api import tasks
+
+
+# Seconds between a worker's reap() and prune() passes
+MAINTENANCE_INTERVAL = 60
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = "Run a pool of workers processing the database task queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+        parser.add_argument("--batch-size", type=int, default=100, help="Max tasks claimed at once by batch handlers")
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument("--burst", action="store_true", help="Exit once the queue is empty")
+        parser.add_argument("--stats", action="store_true", help="Print per-task latency metrics and exit")
+        parser.add_argument("--stats-window", type=int, default=60,
+                            help="Minutes of finished tasks sampled by the latency metrics")
+
+    def handle(self, *args, **options):
+        window = timedelta(minutes=options["stats_window"])
+        if options["stats"]:
+            self.print_stats(window)
+            return
+
+        stop = multiprocessing.Event() if options["mode"] == "process" else threading.Event()
+
+        def shutdown(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        worker_args = (stop, options["batch_size"], options["poll_interval"], options["burst"])
+        if options["mode"] == "process":
+            # Children must open their own database connections
+            connections.close_all()
+            workers = [multiprocessing.Process(target=work, args=worker_args) for _ in range(options["workers"])]
+        else:
+            workers = [threading.Thread(target=work, args=worker_args) for _ in range(options["workers"])]
+
+        self.stdout.write(f"Starting {len(workers)} {options['mode']} workers")
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.print_stats(window)
+
+    def print_stats(self, window):
+        for name, entry in sorted(tasks.latency_stats(window).items()):
+            counts = ", ".join(f"{status}={count}" for status, count in sorted(entry["statuses"].items()))
+            self.stdout.write(
+                f"{name}: {counts}; wait p50={percentile(entry['wait'], 0.5) * 1000:.1f}ms "
+                f"p95={percentile(entry['wait'], 0.95) * 1000:.1f}ms; "
+                f"run p50={percentile(entry['run'], 0.5) * 1000:.1f}ms "
+                f"p95={percentile(entry['run'], 0.95) * 1000:.1f}ms"
+            )
+
+
+def work(stop, batch_size, poll_interval, burst):
+    maintained_at = 0.0
+    try:
+        while not stop.is_set():
+            if time.monotonic() - maintained_at > MAINTENANCE_INTERVAL:
+                tasks.reap()
+                tasks.prune()
+                maintained_at = time.monotonic()
+            claimed = tasks.claim(batch_size)
+            if claimed:
+                tasks.process(claimed)
+            elif burst:
+                break
+            else:
+                stop.wait(poll_interval)
+    finally:
+        connections.close_all()
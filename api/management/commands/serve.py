@@ -0,0 +1,213 @@
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import get_resolver
+
+
+def cpu_count():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class QuietHandler(WSGIRequestHandler):
+    access_log = False
+    # Seconds a connection may stay idle or slow before the worker drops it;
+    # each worker serves one connection at a time
+    timeout = 30
+
+    def log_message(self, format, *args):
+        if self.access_log:
+            super().log_message(format, *args)
+
+
+class WorkerServer(WSGIServer):
+    """wsgiref server that accepts on a socket bound once by the parent"""
+
+    def __init__(self, sock, handler):
+        super().__init__(sock.getsockname()[:2], handler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.server_name = socket.getfqdn(self.server_address[0])
+        self.server_port = self.server_address[1]
+        self.setup_environ()
+        # Wake up regularly to notice shutdown requests
+        self.timeout = 1
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], TimeoutError):
+            # A client that went quiet; QuietHandler.timeout freed the worker
+            return
+        super().handle_error(request, client_address)
+
+
+def warm_up():
+    """Per-worker work that would otherwise land on the first requests
+
+    Only state that outlives a request is built here: url resolver caches, the
+    flat vacancy serializer's class-level field cache, the autocomplete and
+    duplicate indexes, the trending board and database connections. DRF serializers rebuild their fields for every
+    instance, so instantiating them here would warm nothing.
+    """
+    from api.autocomplete import vacancy_autocomplete
+    from api.dedupe import vacancy_duplicates
+    from api.serializers import FlatVacancySerializer
+    from api.trending import trending_vacancies
+
+    resolver = get_resolver()
+    for path in ("/api/vacancies/", "/api/vacancies/1/", "/api/resumes/", "/api/applications/", "/api/my-account/"):
+        resolver.resolve(path)
+    FlatVacancySerializer.serializer_fields()
+    vacancy_autocomplete.ensure_built()
+    if settings.DEDUPE_ENABLED:
+        vacancy_duplicates.ensure_built()
+    trending_vacancies.ensure_built()
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+class Command(BaseCommand):
+    help = (
+        "Preforking WSGI server: loads Django once, forks one worker per core, "
+        "warms each worker up and recycles workers after --max-requests requests. "
+        "Being WSGI, it answers the Server-Sent Events route (applications/stream/) with 501; "
+        "serve that route with a single-process ASGI server"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bind", default="127.0.0.1:8000", help="host:port")
+        parser.add_argument("--workers", type=int, default=cpu_count(), help="Default: usable CPU cores (%(default)s)")
+        parser.add_argument("--max-requests", type=int, default=1000, help="Recycle a worker after this many requests, 0 for never")
+        parser.add_argument("--max-requests-jitter", type=int, default=100,
+                            help="Random extra requests per worker so they don't all restart together")
+        parser.add_argument("--backlog", type=int, default=2048)
+        parser.add_argument("--access-log", action="store_true")
+        parser.add_argument("--timeout", type=float, default=QuietHandler.timeout,
+                            help="Socket timeout in seconds for client connections")
+
+    def handle(self, *args, **options):
+        if not hasattr(os, "fork"):
+            raise CommandError("serve needs os.fork(), use a WSGI server such as waitress on this platform")
+        self.started = time.monotonic()
+        self.options = options
+        host, _, port = options["bind"].rpartition(":")
+
+        # Preload: import the application, middleware, url conf and views in
+        # the parent so workers share those pages copy-on-write.
+        from server.wsgi import application
+        get_resolver().url_patterns
+        self.application = application
+        preloaded = time.monotonic()
+        # Sockets must not be shared across fork
+        connections.close_all()
+
+        self.sock = socket.create_server((host or "0.0.0.0", int(port)), backlog=options["backlog"])
+        self.stdout.write(
+            f"Preloaded in {(preloaded - self.started) * 1000:.0f} ms, "
+            f"listening on http://{options['bind']} with {options['workers']} workers"
+        )
+        self.stdout.flush()
+
+        self.workers = {}
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(options["workers"]):
+            self.spawn()
+        self.supervise()
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return
+        try:
+            code = self.run_worker()
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        os._exit(code)
+
+    def supervise(self):
+        while self.workers:
+            if self.stopping:
+                for pid in list(self.workers):
+                    try:
+                        os.kill(pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass
+                for pid in list(self.workers):
+                    os.waitpid(pid, 0)
+                    del self.workers[pid]
+                break
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.2)
+                continue
+            self.workers.pop(pid, None)
+            if not self.stopping:
+                if os.waitstatus_to_exitcode(status) != 0:
+                    self.stderr.write(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+                    # Don't spin on a worker that dies while starting
+                    time.sleep(1)
+                self.spawn()
+        self.sock.close()
+        self.stdout.write("Stopped")
+
+    def run_worker(self):
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        random.seed()
+        forked = time.monotonic()
+        warm_up()
+        warmed = time.monotonic()
+
+        QuietHandler.access_log = self.options["access_log"]
+        QuietHandler.timeout = self.options["timeout"]
+        server = WorkerServer(self.sock, QuietHandler)
+        server.set_app(self.application)
+        limit = self.options["max_requests"]
+        if limit:
+            limit += random.randint(0, self.options["max_requests_jitter"])
+
+        served = 0
+        first_request = True
+        original_process = server.process_request
+
+        def process_request(request, client_address):
+            nonlocal served, first_request
+            original_process(request, client_address)
+            served += 1
+            if first_request:
+                first_request = False
+                now = time.monotonic()
+                self.stdout.write(
+                    f"[{os.getpid()}] first request {(now - forked) * 1000:.0f} ms after fork "
+                    f"(warm-up {(warmed - forked) * 1000:.0f} ms), {(now - self.started) * 1000:.0f} ms after start"
+                )
+                self.stdout.flush()
+
+        server.process_request = process_request
+        while not stopping and not (limit and served >= limit):
+            server.handle_request()
+        connections.close_all()
+        return 0
@@ -0,0 +1,138 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+SCHEMA = """
+CREATE TABLE vacancy (id INTEGER PRIMARY KEY, title TEXT NOT NULL, views INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE application (
+    id INTEGER PRIMARY KEY,
+    vacancy_id INTEGER NOT NULL REFERENCES vacancy (id),
+    applicant_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending'
+);
+CREATE INDEX application_vacancy_status ON application (vacancy_id, status);
+"""
+
+
+class Profile:
+    def __init__(self, name, timeout, pragmas, begin):
+        self.name = name
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self.begin = begin
+
+    def connect(self, path):
+        conn = sqlite3.connect(path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        for pragma, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {pragma}={value}")
+        return conn
+
+
+# Django's defaults: rollback journal, python's 5 second timeout and deferred
+# transactions that deadlock when a reader upgrades to a writer.
+DEFAULT_PROFILE = Profile("default", 5.0, {}, "BEGIN")
+
+
+class Command(BaseCommand):
+    help = "Concurrent write stress test comparing the default and production SQLite profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--vacancies", type=int, default=200)
+
+    def handle(self, *args, **options):
+        production = Profile(
+            "production", settings.SQLITE_BUSY_TIMEOUT, settings.SQLITE_PRAGMAS, "BEGIN IMMEDIATE"
+        )
+        results = {}
+        for profile in (DEFAULT_PROFILE, production):
+            results[profile.name] = self.run_profile(profile, options)
+            stats = results[profile.name]
+            self.stdout.write(
+                f"{profile.name:>10}: {stats['writes'] / stats['elapsed']:10.1f} writes/s  "
+                f"{stats['reads'] / stats['elapsed']:10.1f} reads/s  "
+                f"{stats['locked']} locked errors"
+            )
+
+        base = results["default"]["writes"] / results["default"]["elapsed"]
+        tuned = results["production"]["writes"] / results["production"]["elapsed"]
+        if base:
+            self.stdout.write(self.style.SUCCESS(f"Speedup: {tuned / base:.2f}x writes per second"))
+
+    def run_profile(self, profile, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stress.sqlite3")
+            conn = profile.connect(path)
+            conn.executescript(SCHEMA)
+            conn.executemany(
+                "INSERT INTO vacancy (id, title) VALUES (?, ?)",
+                [(pk, f"Vacancy {pk}") for pk in range(1, options["vacancies"] + 1)],
+            )
+            conn.close()
+
+            stats = {"writes": 0, "reads": 0, "locked": 0}
+            lock = threading.Lock()
+            deadline = time.perf_counter() + options["seconds"]
+
+            def count(key):
+                with lock:
+                    stats[key] += 1
+
+            def writer(worker_id):
+                conn = profile.connect(path)
+                applicant = worker_id * 1_000_000
+                while time.perf_counter() < deadline:
+                    vacancy_id = random.randint(1, options["vacancies"])
+                    try:
+                        conn.execute(profile.begin)
+                        # Same shape as a detail view: read the row, then write.
+                        conn.execute("SELECT views FROM vacancy WHERE id = ?", (vacancy_id,)).fetchone()
+                        conn.execute("UPDATE vacancy SET views = views + 1 WHERE id = ?", (vacancy_id,))
+                        applicant += 1
+                        conn.execute(
+                            "INSERT INTO application (vacancy_id, applicant_id) VALUES (?, ?)",
+                            (vacancy_id, applicant),
+                        )
+                        conn.execute("COMMIT")
+                        count("writes")
+                    except sqlite3.OperationalError as exc:
+                        if conn.in_transaction:
+                            conn.execute("ROLLBACK")
+                        if "locked" not in str(exc) and "busy" not in str(exc):
+                            raise
+                        count("locked")
+                conn.close()
+
+            def reader():
+                conn = profile.connect(path)
+                while time.perf_counter() < deadline:
+                    try:
+                        conn.execute(
+                            "SELECT vacancy_id, COUNT(*) FROM application WHERE status = 'pending' "
+                            "GROUP BY vacancy_id ORDER BY 2 DESC LIMIT 20"
+                        ).fetchall()
+                        count("reads")
+                    except sqlite3.OperationalError as exc:
+                        if "locked" not in str(exc):
+                            raise
+                        count("locked")
+                conn.close()
+
+            threads = [threading.Thread(target=writer, args=(i,)) for i in range(options["writers"])]
+            threads += [threading.Thread(target=reader) for _ in range(options["readers"])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats["elapsed"] = time.perf_counter() - started
+            return stats
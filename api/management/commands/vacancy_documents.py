@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import F, Min
+from django.utils import timezone
+
+from api.documents import render_documents
+from api.models import Vacancy, VacancyDocument
+
+
+class Command(BaseCommand):
+    help = "Report staleness of pre-rendered vacancy documents, optionally rebuilding them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Re-render every document")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            ids = list(Vacancy.objects.order_by("pk").values_list("pk", flat=True))
+            for start in range(0, len(ids), options["batch_size"]):
+                render_documents(ids[start:start + options["batch_size"]])
+            self.stdout.write(f"Rendered {len(ids)} documents")
+
+        now = timezone.now()
+        documents = VacancyDocument.objects.count()
+        missing = Vacancy.objects.filter(document__isnull=True).count()
+        expired = VacancyDocument.objects.filter(
+            rendered_at__lt=now - timedelta(seconds=settings.VACANCY_DOCUMENT_MAX_AGE)
+        ).count()
+        # Edits that bypassed save() signals, e.g. queryset.update()
+        outdated = VacancyDocument.objects.filter(vacancy__updated_at__gt=F("rendered_at")).count()
+        oldest = VacancyDocument.objects.aggregate(oldest=Min("rendered_at"))["oldest"]
+
+        self.stdout.write(
+            f"Documents: {documents}, missing: {missing}, past max age: {expired}, "
+            f"outdated by edits: {outdated}"
+        )
+        if oldest:
+            self.stdout.write(
+                f"Oldest document: {(now - oldest).total_seconds():.1f}s "
+                f"(documents older than {settings.VACANCY_DOCUMENT_MAX_AGE}s are queued for re-rendering when read)"
+            )
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_simplify_resume'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True, verbose_name='Original ID')),
+                ('cover_letter', models.TextField(blank=True, verbose_name='Cover letter')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('reviewed', 'Reviewed'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], max_length=10, verbose_name='Status')),
+                ('applied_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived response',
+                'verbose_name_plural': 'Archived responses',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedVacancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True, verbose_name='Original ID')),
+                ('title', models.CharField(max_length=200, verbose_name='Job title')),
+                ('company', models.CharField(blank=True, max_length=200, verbose_name='Company')),
+                ('location', models.CharField(max_length=150, verbose_name='Location')),
+                ('description', models.TextField(verbose_name='Description')),
+                ('responsibilities', models.TextField(blank=True, verbose_name='Responsibilities')),
+                ('requirements', models.TextField(blank=True, verbose_name='Requirements')),
+                ('salary_from', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Salary from')),
+                ('salary_to', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Salary to')),
+                ('currency', models.CharField(default='TJS', max_length=10, verbose_name='Currency')),
+                ('show_salary', models.BooleanField(default=True, verbose_name='Show salary')),
+                ('employment_type', models.CharField(choices=[('full_time', 'Full-time'), ('part_time', 'Part-time'), ('contract', 'Contract'), ('internship', 'Internship'), ('fifo', 'FIFO'), ('volunteer', 'Volunteering')], max_length=20, verbose_name='Employment type')),
+                ('work_format', models.CharField(choices=[('on_site', 'On-site'), ('remote', 'Remote'), ('hybrid', 'Hybrid'), ('shift', 'Shift work')], max_length=10, verbose_name='Work format')),
+                ('experience_required', models.CharField(choices=[('no_exp', 'No experience'), ('1_3', '1–3 years'), ('3_6', '3–6 years'), ('6_plus', '6+ years')], max_length=10, verbose_name='Experience')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Views')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived vacancy',
+                'verbose_name_plural': 'Archived vacancies',
+                'ordering': ['-archived_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='vacancy_active_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedapplication',
+            name='applicant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_applications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedapplication',
+            name='resume',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_applications', to='api.resume'),
+        ),
+        migrations.AddField(
+            model_name='archivedvacancy',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_vacancies', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedapplication',
+            name='vacancy',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='api.archivedvacancy'),
+        ),
+    ]
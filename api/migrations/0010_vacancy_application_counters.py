@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:10
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_counters(apps, schema_editor):
+    Vacancy = apps.get_model('api', 'Vacancy')
+    Application = apps.get_model('api', 'Application')
+    rows = Application.objects.values('vacancy_id').annotate(
+        applications_count=Count('id'),
+        pending_count=Count('id', filter=Q(status='pending')),
+        reviewed_count=Count('id', filter=Q(status='reviewed')),
+        accepted_count=Count('id', filter=Q(status='accepted')),
+        rejected_count=Count('id', filter=Q(status='rejected')),
+    ).order_by()
+    for row in rows:
+        Vacancy.objects.filter(pk=row.pop('vacancy_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_vacancy_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='accepted_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Accepted applications'),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='applications_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Applications'),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Pending applications'),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='rejected_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Rejected applications'),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='reviewed_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Reviewed applications'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
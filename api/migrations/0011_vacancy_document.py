@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_vacancy_application_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VacancyDocument',
+            fields=[
+                ('vacancy', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='api.vacancy')),
+                ('body', models.BinaryField()),
+                ('body_gzip', models.BinaryField(blank=True, null=True)),
+                ('rendered_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Vacancy document',
+                'verbose_name_plural': 'Vacancy documents',
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:19
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_task_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('application', 'Application'), ('favorite', 'Favorite')], max_length=20, verbose_name='Kind')),
+                ('object_id', models.BigIntegerField(verbose_name='Object ID')),
+                ('user_id', models.BigIntegerField(verbose_name='User ID')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Deletion',
+                'verbose_name_plural': 'Deletion log',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['applicant', 'updated_at'], name='api_applica_applica_0411b4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['vacancy', 'updated_at'], name='api_applica_vacancy_a11c9d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='favoritevacancy',
+            index=models.Index(fields=['user', 'added_at'], name='api_favorit_user_id_1591d5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deletionlog',
+            index=models.Index(fields=['user_id', 'kind', 'deleted_at'], name='api_deletio_user_id_2e7204_idx'),
+        ),
+    ]
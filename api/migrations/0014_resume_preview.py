@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='preview',
+            field=models.FileField(blank=True, editable=False, max_length=255, upload_to='previews/'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_resume_preview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VacancyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Hour')),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('favorites', models.PositiveIntegerField(default=0)),
+                ('applications', models.PositiveIntegerField(default=0)),
+                ('vacancy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='api.vacancy')),
+            ],
+            options={
+                'verbose_name': 'Vacancy activity',
+                'verbose_name_plural': 'Vacancy activity',
+                'indexes': [models.Index(fields=['hour'], name='api_vacancy_hour_e8077d_idx')],
+                'unique_together': {('vacancy', 'hour')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_vacancy_activity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='api.vacancy', verbose_name='Duplicate of'),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='minhash',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
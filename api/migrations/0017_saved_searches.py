@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_vacancy_duplicates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100, verbose_name='Name')),
+                ('title', models.CharField(blank=True, max_length=200, verbose_name='Title contains')),
+                ('location', models.CharField(blank=True, max_length=150, verbose_name='Location')),
+                ('employment_type', models.CharField(blank=True, choices=[('full_time', 'Full-time'), ('part_time', 'Part-time'), ('contract', 'Contract'), ('internship', 'Internship'), ('fifo', 'FIFO'), ('volunteer', 'Volunteering')], max_length=20, verbose_name='Employment type')),
+                ('work_format', models.CharField(blank=True, choices=[('on_site', 'On-site'), ('remote', 'Remote'), ('hybrid', 'Hybrid'), ('shift', 'Shift work')], max_length=10, verbose_name='Work format')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Saved search',
+                'verbose_name_plural': 'Saved searches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedSearchMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matched_at', models.DateTimeField(auto_now_add=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='api.savedsearch')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_search_matches', to=settings.AUTH_USER_MODEL)),
+                ('vacancy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_search_matches', to='api.vacancy')),
+            ],
+            options={
+                'verbose_name': 'Saved search match',
+                'verbose_name_plural': 'Saved search matches',
+                'indexes': [models.Index(fields=['user', '-matched_at'], name='api_savedse_user_id_17f55a_idx'), models.Index(condition=models.Q(('read_at__isnull', True)), fields=['user'], name='search_match_unread_idx')],
+                'unique_together': {('search', 'vacancy')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:00
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_task_finished_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='resume',
+            index=models.Index(django.db.models.functions.text.Lower('full_name'), name='resume_full_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(django.db.models.functions.text.Lower('title'), name='vacancy_title_lower_idx'),
+        ),
+    ]
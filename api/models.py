@@ -1,8 +1,24 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.db.models.functions import Greatest, Lower
+from django.db.models.signals import post_save
 from django.core.validators import FileExtensionValidator
 from accounts.models import CustomUser
 
 
+def format_salary(show_salary, salary_from, salary_to, currency):
+    if not show_salary:
+        return "By agreement"
+    if salary_from and salary_to:
+        return f"{salary_from} – {salary_to} {currency}"
+    if salary_from:
+        return f"от {salary_from} {currency}"
+    if salary_to:
+        return f"до {salary_to} {currency}"
+    return "Not specified"
+
+
 class Vacancy(models.Model):
     EMPLOYMENT_TYPE_CHOICES = [
         ("full_time", "Full-time"),
@@ -46,16 +62,46 @@ class Vacancy(models.Model):
     is_active = models.BooleanField("Active", default=True)
     views = models.PositiveIntegerField("Views", default=0)
 
+    # Denormalized application counters, kept in sync by Application changes
+    applications_count = models.PositiveIntegerField("Applications", default=0)
+    pending_count = models.PositiveIntegerField("Pending applications", default=0)
+    reviewed_count = models.PositiveIntegerField("Reviewed applications", default=0)
+    accepted_count = models.PositiveIntegerField("Accepted applications", default=0)
+    rejected_count = models.PositiveIntegerField("Rejected applications", default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="vacancies")
 
+    # Near-duplicate detection (api.dedupe): MinHash of title, description and
+    # requirements, and the earlier posting this one repeats
+    minhash = models.BinaryField(null=True, blank=True, editable=False)
+    duplicate_of = models.ForeignKey(
+        "self", on_delete=models.SET_NULL, null=True, blank=True, related_name="duplicates",
+        verbose_name="Duplicate of",
+    )
+
+    STATUS_COUNTERS = {
+        "pending": "pending_count",
+        "reviewed": "reviewed_count",
+        "accepted": "accepted_count",
+        "rejected": "rejected_count",
+    }
+    COUNTER_FIELDS = ["applications_count", *STATUS_COUNTERS.values()]
+
     class Meta:
         verbose_name = "Vacancy"
         verbose_name_plural = "Vacancies"
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["location", "employment_type", "work_format"]),
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(is_active=True),
+                name="vacancy_active_created_idx",
+            ),
+            # Case-insensitive prefix search in the admin
+            models.Index(Lower("title"), name="vacancy_title_lower_idx"),
         ]
 
     def __str__(self):
@@ -63,19 +109,33 @@ class Vacancy(models.Model):
         return f"{self.title} в {company_name}"
 
     def increment_views(self):
-        Vacancy.objects.filter(pk=self.pk).update(views=models.F("views") + 1)
+        Vacancy.increment_views_for(self.pk)
         self.refresh_from_db()
 
+    @classmethod
+    def increment_views_for(cls, pk, views=1):
+        return cls.objects.filter(pk=pk).update(views=models.F("views") + views)
+
+    @classmethod
+    def adjust_application_counters(cls, vacancy_id, added=None, removed=None):
+        """Move one application into status `added` and/or out of status `removed`"""
+        changes = {}
+        if added and not removed:
+            changes["applications_count"] = models.F("applications_count") + 1
+        elif removed and not added:
+            changes["applications_count"] = Greatest(models.F("applications_count") - 1, 0)
+        if added:
+            field = cls.STATUS_COUNTERS[added]
+            changes[field] = models.F(field) + 1
+        if removed:
+            field = cls.STATUS_COUNTERS[removed]
+            changes[field] = Greatest(models.F(field) - 1, 0)
+        if not changes:
+            return 0
+        return cls.objects.filter(pk=vacancy_id).update(**changes)
+
     def salary_display(self):
-        if not self.show_salary:
-            return "By agreement"
-        if self.salary_from and self.salary_to:
-            return f"{self.salary_from} – {self.salary_to} {self.currency}"
-        if self.salary_from:
-            return f"от {self.salary_from} {self.currency}"
-        if self.salary_to:
-            return f"до {self.salary_to} {self.currency}"
-        return "Not specified"
+        return format_salary(self.show_salary, self.salary_from, self.salary_to, self.currency)
 
 
 class Resume(models.Model):
@@ -86,20 +146,43 @@ class Resume(models.Model):
         validators=[FileExtensionValidator(allowed_extensions=['pdf', 'doc', 'docx'])],
         help_text="Upload PDF or Word document (.pdf, .doc, .docx)"
     )
+    # First-page image rendered in the background, shared by resumes with identical files
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    preview = models.FileField(upload_to="previews/", max_length=255, blank=True, editable=False)
 
     class Meta:
         verbose_name = "Resume"
         verbose_name_plural = "Resumes"
+        indexes = [
+            models.Index(Lower("full_name"), name="resume_full_name_lower_idx"),
+        ]
 
     def __str__(self):
         return self.full_name
     
     @property
     def file_url(self):
+        # Files are only handed out through the access-checked download endpoint
         if self.file:
-            return self.file.url
+            return reverse("resume-download", args=[self.pk])
+        return None
+
+    @property
+    def preview_url(self):
+        if self.preview:
+            return reverse("resume-preview", args=[self.pk])
         return None
 
+    def can_download(self, user):
+        """The owner, staff, and employers the seeker applied to may read the file"""
+        if not user.is_authenticated:
+            return False
+        if user.pk == self.user_id or user.is_staff:
+            return True
+        return user.role == "employer" and Application.objects.filter(
+            applicant_id=self.user_id, vacancy__author=user
+        ).exists()
+
 
 
 class Application(models.Model):
@@ -126,22 +209,47 @@ class Application(models.Model):
         verbose_name_plural = "Responses"
         indexes = [
             models.Index(fields=["vacancy", "status"]),
+            models.Index(fields=["applicant", "updated_at"]),
+            models.Index(fields=["vacancy", "updated_at"]),
         ]
 
     def __str__(self):
         return f"{self.applicant} → {self.vacancy.title}"
 
     def mark_reviewed(self):
-        self.status = "reviewed"
-        self.save(update_fields=["status", "updated_at"])
+        return self.set_status("reviewed")
 
     def mark_accepted(self):
-        self.status = "accepted"
-        self.save(update_fields=["status", "updated_at"])
+        return self.set_status("accepted")
 
     def mark_rejected(self):
-        self.status = "rejected"
-        self.save(update_fields=["status", "updated_at"])
+        return self.set_status("rejected")
+
+    def set_status(self, status):
+        """Move from the status this instance read to `status`
+
+        Returns False, and reloads the current status, when another request
+        changed it first, so stale instances never move the counters twice.
+        """
+        previous = self.status
+        if previous == status:
+            return True
+        now = timezone.now()
+        with transaction.atomic():
+            updated = Application.objects.filter(pk=self.pk, status=previous).update(status=status, updated_at=now)
+            if updated != 1:
+                self.refresh_from_db(fields=["status", "updated_at"])
+                return False
+            Vacancy.adjust_application_counters(self.vacancy_id, added=status, removed=previous)
+            self.status, self.updated_at = status, now
+            # .update() sends no signals; status events and documents listen to post_save.
+            # The counters moved above, so a status read by an earlier, failed save() must not move them again
+            self._stored_status = None
+            post_save.send(
+                sender=Application, instance=self, created=False,
+                update_fields=frozenset(["status", "updated_at"]), raw=False, using=self._state.db,
+            )
+        return True
 
 class FavoriteVacancy(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="favorites")
@@ -153,10 +261,253 @@ class FavoriteVacancy(models.Model):
         verbose_name = "Featured vacancy"
         verbose_name_plural = "Featured vacancies"
         ordering = ["-added_at"]
+        indexes = [
+            models.Index(fields=["user", "added_at"]),
+        ]
 
     def __str__(self):
         return f"{self.user} Favorites {self.vacancy.title}"
 
     @staticmethod
     def is_favorited(user, vacancy):
-        return FavoriteVacancy.objects.filter(user=user, vacancy=vacancy).exists()
\ No newline at end of file
+        return FavoriteVacancy.objects.filter(user=user, vacancy=vacancy).exists()
+
+
+class VacancyActivity(models.Model):
+    """Hourly views, favorites and applications per vacancy, the history trending scores are rebuilt from"""
+    vacancy = models.ForeignKey(Vacancy, on_delete=models.CASCADE, related_name="activity")
+    hour = models.DateTimeField("Hour")
+    views = models.PositiveIntegerField(default=0)
+    favorites = models.PositiveIntegerField(default=0)
+    applications = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("vacancy", "hour")
+        verbose_name = "Vacancy activity"
+        verbose_name_plural = "Vacancy activity"
+        indexes = [
+            models.Index(fields=["hour"]),
+        ]
+
+    def __str__(self):
+        return f"{self.vacancy_id} @ {self.hour:%Y-%m-%d %H:00}"
+
+    @classmethod
+    def record(cls, vacancy_id, at=None, **counts):
+        """Add `counts` (views=, favorites=, applications=) to the vacancy's bucket for the hour of `at`"""
+        hour = (at or timezone.now()).replace(minute=0, second=0, microsecond=0)
+        changes = {field: models.F(field) + count for field, count in counts.items()}
+        rows = cls.objects.filter(vacancy_id=vacancy_id, hour=hour)
+        if rows.update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(vacancy_id=vacancy_id, hour=hour, **counts)
+        except IntegrityError:
+            # Another writer created the bucket first
+            rows.update(**changes)
+
+
+class SavedSearch(models.Model):
+    """Vacancy list filters a seeker saved; new matching vacancies go to their inbox
+
+    Predicates mirror the list endpoint: `title` is the `t` substring, the
+    others are exact values. Blank means any. Searches are not edited in place
+    so the percolator index (api.percolator) only ever sees additions.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="saved_searches")
+    name = models.CharField("Name", max_length=100, blank=True)
+    title = models.CharField("Title contains", max_length=200, blank=True)
+    location = models.CharField("Location", max_length=150, blank=True)
+    employment_type = models.CharField(
+        "Employment type", max_length=20, choices=Vacancy.EMPLOYMENT_TYPE_CHOICES, blank=True
+    )
+    work_format = models.CharField("Work format", max_length=10, choices=Vacancy.WORK_FORMAT_CHOICES, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    PREDICATE_FIELDS = ["title", "location", "employment_type", "work_format"]
+
+    class Meta:
+        verbose_name = "Saved search"
+        verbose_name_plural = "Saved searches"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return self.name or " / ".join(getattr(self, field) for field in self.PREDICATE_FIELDS if getattr(self, field))
+
+
+class SavedSearchMatch(models.Model):
+    """Inbox entry: a new vacancy that matched one of the user's saved searches"""
+    # Denormalized from search.user for the inbox query
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="saved_search_matches")
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name="matches")
+    vacancy = models.ForeignKey(Vacancy, on_delete=models.CASCADE, related_name="saved_search_matches")
+    matched_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("search", "vacancy")
+        verbose_name = "Saved search match"
+        verbose_name_plural = "Saved search matches"
+        indexes = [
+            models.Index(fields=["user", "-matched_at"]),
+            models.Index(fields=["user"], condition=models.Q(read_at__isnull=True), name="search_match_unread_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.search_id} matched {self.vacancy_id}"
+
+
+class DeletionLog(models.Model):
+    """Tombstones telling sync clients which rows disappeared from their lists"""
+    KIND_CHOICES = [
+        ("application", "Application"),
+        ("favorite", "Favorite"),
+    ]
+
+    kind = models.CharField("Kind", max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField("Object ID")
+    # Plain id rather than a foreign key: rows are written while users are being deleted
+    user_id = models.BigIntegerField("User ID")
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Deletion"
+        verbose_name_plural = "Deletion log"
+        indexes = [
+            models.Index(fields=["user_id", "kind", "deleted_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted"
+
+
+class VacancyDocument(models.Model):
+    """Pre-rendered VacancySerializer JSON for a vacancy"""
+    vacancy = models.OneToOneField(Vacancy, on_delete=models.CASCADE, primary_key=True, related_name="document")
+    body = models.BinaryField()
+    body_gzip = models.BinaryField(null=True, blank=True)
+    rendered_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Vacancy document"
+        verbose_name_plural = "Vacancy documents"
+
+    def __str__(self):
+        return f"Document for vacancy {self.vacancy_id}"
+
+
+class ArchivedVacancy(models.Model):
+    """Cold storage for vacancies that stayed inactive past the archive age"""
+    original_id = models.BigIntegerField("Original ID", unique=True)
+    title = models.CharField("Job title", max_length=200)
+    company = models.CharField("Company", max_length=200, blank=True)
+    location = models.CharField("Location", max_length=150)
+    description = models.TextField("Description")
+    responsibilities = models.TextField("Responsibilities", blank=True)
+    requirements = models.TextField("Requirements", blank=True)
+
+    salary_from = models.DecimalField("Salary from", max_digits=12, decimal_places=2, null=True, blank=True)
+    salary_to = models.DecimalField("Salary to", max_digits=12, decimal_places=2, null=True, blank=True)
+    currency = models.CharField("Currency", max_length=10, default="TJS")
+    show_salary = models.BooleanField("Show salary", default=True)
+
+    employment_type = models.CharField("Employment type", max_length=20, choices=Vacancy.EMPLOYMENT_TYPE_CHOICES)
+    work_format = models.CharField("Work format", max_length=10, choices=Vacancy.WORK_FORMAT_CHOICES)
+    experience_required = models.CharField("Experience", max_length=10, choices=Vacancy.EXPERIENCE_CHOICES)
+    views = models.PositiveIntegerField("Views", default=0)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="archived_vacancies")
+
+    ARCHIVED_FIELDS = [
+        "title", "company", "location", "description", "responsibilities", "requirements",
+        "salary_from", "salary_to", "currency", "show_salary", "employment_type", "work_format",
+        "experience_required", "views", "created_at", "updated_at", "author_id",
+    ]
+
+    class Meta:
+        verbose_name = "Archived vacancy"
+        verbose_name_plural = "Archived vacancies"
+        ordering = ["-archived_at"]
+
+    def __str__(self):
+        return self.title
+
+    @classmethod
+    def from_vacancy(cls, vacancy):
+        return cls(original_id=vacancy.pk, **{name: getattr(vacancy, name) for name in cls.ARCHIVED_FIELDS})
+
+
+class ArchivedApplication(models.Model):
+    original_id = models.BigIntegerField("Original ID", unique=True)
+    applicant = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="archived_applications")
+    vacancy = models.ForeignKey(ArchivedVacancy, on_delete=models.CASCADE, related_name="applications")
+    resume = models.ForeignKey(Resume, on_delete=models.SET_NULL, null=True, blank=True, related_name="archived_applications")
+
+    cover_letter = models.TextField("Cover letter", blank=True)
+    status = models.CharField("Status", max_length=10, choices=Application.STATUS_CHOICES)
+
+    applied_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archived response"
+        verbose_name_plural = "Archived responses"
+
+    def __str__(self):
+        return f"{self.applicant} → {self.vacancy.title}"
+
+    @classmethod
+    def from_application(cls, application, archived_vacancy):
+        return cls(
+            original_id=application.pk,
+            applicant_id=application.applicant_id,
+            vacancy=archived_vacancy,
+            resume_id=application.resume_id,
+            cover_letter=application.cover_letter,
+            status=application.status,
+            applied_at=application.applied_at,
+            updated_at=application.updated_at,
+        )
+
+
+class Task(models.Model):
+    """A unit of deferred work picked up by `runworkers`"""
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    name = models.CharField("Name", max_length=100)
+    payload = models.JSONField("Payload", default=dict)
+    status = models.CharField("Status", max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveSmallIntegerField("Attempts", default=0)
+    max_attempts = models.PositiveSmallIntegerField("Max attempts", default=3)
+    last_error = models.TextField("Last error", blank=True)
+
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    claim_token = models.CharField(max_length=32, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Task"
+        verbose_name_plural = "Tasks"
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+            models.Index(fields=["name", "status", "available_at"]),
+            models.Index(fields=["claim_token"]),
+            models.Index(fields=["status", "finished_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
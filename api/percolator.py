@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import defaultdict
+from itertools import product
+
+from django.conf import settings
+
+from .models import Vacancy, SavedSearch, SavedSearchMatch
+
+
+EQUALITY_FIELDS = ("location", "employment_type", "work_format")
+GRAM = 3
+
+
+def substrings(title):
+    """Every substring up to GRAM characters long, the anchors a title can hit"""
+    title = title.casefold()
+    return {title[i:i + size] for size in range(1, GRAM + 1) for i in range(len(title) - size + 1)}
+
+
+class SearchIndex:
+    """Saved searches filed under (title anchor, location, employment type, work format)"""
+
+    def __init__(self):
+        self.last_pk = 0
+        self.buckets = defaultdict(list)
+        self.keys = {}
+        self.anchors = {}
+
+    def add(self, pk, user_id, title, values):
+        self.last_pk = max(self.last_pk, pk)
+        if pk in self.keys:
+            return
+        title = title.casefold()
+        anchor = None
+        if title:
+            grams = {title[i:i + GRAM] for i in range(len(title) - GRAM + 1)} or {title}
+            anchor = min(sorted(grams), key=lambda gram: self.anchors.get(gram, 0))
+            self.anchors[anchor] = self.anchors.get(anchor, 0) + 1
+        key = (anchor, *(value or None for value in values))
+        self.keys[pk] = key
+        self.buckets[key].append((pk, user_id, title))
+
+    def discard(self, pk):
+        key = self.keys.pop(pk, None)
+        if key is None:
+            return
+        self.buckets[key] = [entry for entry in self.buckets[key] if entry[0] != pk]
+        if not self.buckets[key]:
+            del self.buckets[key]
+        if key[0] is not None:
+            self.anchors[key[0]] -= 1
+
+    def match(self, vacancy):
+        title = vacancy.title.casefold()
+        equality = [(getattr(vacancy, field), None) for field in EQUALITY_FIELDS]
+        found = []
+        for anchor in [None, *substrings(title)]:
+            for values in product(*equality):
+                for pk, user_id, text in self.buckets.get((anchor, *values), ()):
+                    if text in title:
+                        found.append((pk, user_id))
+        return found
+
+
+class SearchPercolator:
+    """Finds the saved searches a vacancy satisfies without scanning all of them
+
+    A search is filed under one key: its exact location, employment type and
+    work format (None for "any") plus one anchor from its title text, the
+    rarest trigram so far or the whole text when it is shorter. A vacancy
+    probes the keys built from its own values, "any", and its title's
+    substrings, so only searches that already agree on every equality filter
+    and share the anchor are looked at; their full title substring is then
+    checked. Searches saved in other processes are loaded by id on the next
+    match and the index is rebuilt every SAVED_SEARCH_REFRESH_SECONDS to drop
+    deleted ones.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.index = SearchIndex()
+
+    def ensure_current(self):
+        stale = self.built_at is None or time.monotonic() - self.built_at > settings.SAVED_SEARCH_REFRESH_SECONDS
+        if stale:
+            self.rebuild()
+            return
+        rows = self.rows(SavedSearch.objects.filter(pk__gt=self.index.last_pk))
+        if rows:
+            with self.lock:
+                for pk, user_id, title, *values in rows:
+                    self.index.add(pk, user_id, title, values)
+
+    def rows(self, queryset):
+        return list(queryset.order_by("pk").values_list("pk", "user_id", "title", *EQUALITY_FIELDS))
+
+    def rebuild(self):
+        index = SearchIndex()
+        for pk, user_id, title, *values in self.rows(SavedSearch.objects.all()):
+            index.add(pk, user_id, title, values)
+        with self.lock:
+            self.index = index
+            self.built_at = time.monotonic()
+
+    def discard(self, pk):
+        with self.lock:
+            self.index.discard(pk)
+
+    def match(self, vacancy):
+        """[(search id, user id)] of the saved searches the vacancy satisfies"""
+        with self.lock:
+            return self.index.match(vacancy)
+
+
+saved_search_percolator = SearchPercolator()
+
+
+def match_vacancies(vacancy_ids):
+    """File new vacancies into the inboxes of the saved searches they match, returns the number filed"""
+    vacancies = Vacancy.objects.filter(pk__in=vacancy_ids, is_active=True, duplicate_of__isnull=True).only(
+        "pk", "title", *EQUALITY_FIELDS
+    )
+    saved_search_percolator.ensure_current()
+    matches = [
+        (search_id, user_id, vacancy.pk)
+        for vacancy in vacancies
+        for search_id, user_id in saved_search_percolator.match(vacancy)
+    ]
+    if not matches:
+        return 0
+    # Searches deleted by other processes stay indexed until the next rebuild
+    alive = set(SavedSearch.objects.filter(pk__in={search_id for search_id, _, _ in matches}).values_list("pk", flat=True))
+    created = SavedSearchMatch.objects.bulk_create(
+        [
+            SavedSearchMatch(search_id=search_id, user_id=user_id, vacancy_id=vacancy_id)
+            for search_id, user_id, vacancy_id in matches
+            if search_id in alive
+        ],
+        ignore_conflicts=True,
+    )
+    return len(created)
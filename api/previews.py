@@ -0,0 +1,146 @@
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import textwrap
+import zipfile
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageDraw, ImageFont
+
+from .models import Resume
+from .profile_cache import profile_cache, employers_of
+
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# A4 proportions
+PAGE_RATIO = 297 / 210
+# Limits on a .docx member before it is decompressed, against zip bombs
+DOCX_MAX_MEMBER_SIZE = 20 * 1024 * 1024
+DOCX_MAX_COMPRESSION_RATIO = 100
+
+
+def content_hash(field_file):
+    digest = hashlib.sha256()
+    with field_file.open("rb") as handle:
+        for chunk in handle.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def preview_name(digest):
+    """Previews are keyed by content on purpose: resumes with identical files share one render
+
+    A preview is only served with the permission check of the resume it is
+    attached to, and shows nothing that the identical file doesn't.
+    """
+    return f"previews/{digest[:2]}/{digest}.png"
+
+
+def render_pdf(path, width):
+    """First page through poppler's pdftoppm, None when it isn't installed"""
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return None
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "page")
+        result = subprocess.run(
+            [pdftoppm, "-f", "1", "-l", "1", "-png", "-singlefile", "-scale-to-x", str(width), "-scale-to-y", "-1",
+             path, output],
+            capture_output=True,
+            timeout=30,
+        )
+        if result.returncode != 0:
+            return None
+        with Image.open(output + ".png") as image:
+            return image.copy()
+
+
+def read_member(archive, name):
+    """Read one archive member, refusing sizes and compression ratios no real document has"""
+    info = archive.getinfo(name)
+    if info.file_size > DOCX_MAX_MEMBER_SIZE:
+        raise ValueError(f"{name} is {info.file_size} bytes uncompressed")
+    if info.file_size > DOCX_MAX_COMPRESSION_RATIO * max(info.compress_size, 1):
+        raise ValueError(f"{name} compresses {info.file_size / max(info.compress_size, 1):.0f}:1")
+    return archive.read(name)
+
+
+def docx_text(archive):
+    root = ElementTree.fromstring(read_member(archive, "word/document.xml"))
+    return [
+        "".join(node.text or "" for node in paragraph.iter(f"{WORD_NAMESPACE}t"))
+        for paragraph in root.iter(f"{WORD_NAMESPACE}p")
+    ]
+
+
+def render_docx(path, width):
+    """The thumbnail Word embeds when saving, otherwise the document's opening text"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if name.startswith("docProps/thumbnail."):
+                    with Image.open(io.BytesIO(read_member(archive, name))) as image:
+                        return image.copy()
+            return render_text(docx_text(archive), width)
+    except (zipfile.BadZipFile, KeyError, ValueError, OSError, ElementTree.ParseError, Image.DecompressionBombError):
+        return None
+
+
+def render_text(paragraphs, width, title=None):
+    height = round(width * PAGE_RATIO)
+    margin = width // 12
+    font_size = max(width // 40, 8)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=font_size)
+    y = margin
+    if title:
+        draw.text((margin, y), title, fill="black", font=ImageFont.load_default(size=font_size * 2))
+        y += font_size * 4
+    columns = max((width - 2 * margin) * 2 // font_size, 10)
+    for paragraph in paragraphs:
+        for line in textwrap.wrap(paragraph, columns) or [""]:
+            if y + font_size > height - margin:
+                return image
+            draw.text((margin, y), line, fill="#333333", font=font)
+            y += round(font_size * 1.4)
+    return image
+
+
+def render_preview(path, width):
+    extension = os.path.splitext(path)[1].lower()
+    image = None
+    if extension == ".pdf":
+        image = render_pdf(path, width)
+    elif extension == ".docx":
+        image = render_docx(path, width)
+    if image is None:
+        # Legacy .doc files, or no renderer available: a card with the file type
+        image = render_text([os.path.basename(path)], width, title=extension.lstrip(".").upper() or "FILE")
+    image = image.convert("RGB")
+    image.thumbnail((width, round(width * PAGE_RATIO)))
+    return image
+
+
+def update_preview(resume_id, name):
+    """Render the preview of the resume's current file, reusing an existing render of identical content"""
+    resume = Resume.objects.filter(pk=resume_id, file=name).only("id", "file").first()
+    if resume is None or not resume.file.storage.exists(name):
+        # The file was replaced or the resume deleted since the task was queued
+        return
+    digest = content_hash(resume.file)
+    target = preview_name(digest)
+    if not default_storage.exists(target):
+        image = render_preview(resume.file.path, settings.RESUME_PREVIEW_WIDTH)
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG", optimize=True)
+        target = default_storage.save(target, ContentFile(buffer.getvalue()))
+    if Resume.objects.filter(pk=resume_id, file=name).update(content_hash=digest, preview=target):
+        user_id = Resume.objects.filter(pk=resume_id).values_list("user_id", flat=True).first()
+        profile_cache.invalidate([user_id, *employers_of(user_id)])
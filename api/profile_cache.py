@@ -0,0 +1,80 @@
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Vacancy, Application
+
+
+class ProfileCache:
+    """Cached /api/my-account/ payloads, invalidated per user
+
+    Each user has a token key; an entry is only valid while it was built under
+    the current token. Invalidating deletes the token, so an entry built from
+    data read before a write can't be served after it, even if it is stored
+    last. Entries also expire after PROFILE_CACHE_TTL, which bounds staleness of
+    counters changed with bulk updates (vacancy views). With PROFILE_CACHE_ENABLED
+    off, every lookup builds the payload and nothing is stored.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.invalidations = 0
+
+    def token(self, user_id):
+        key = f"profile:{user_id}:token"
+        token = cache.get(key)
+        if token is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            token = cache.get(key)
+        return token
+
+    def get_or_build(self, user_id, build):
+        """Returns (payload, hit)"""
+        if not settings.PROFILE_CACHE_ENABLED:
+            return build(), False
+        token = self.token(user_id)
+        entry = cache.get(f"profile:{user_id}")
+        hit = entry is not None and entry["token"] == token
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            return entry["data"], True
+        data = build()
+        cache.set(f"profile:{user_id}", {"token": token, "data": data}, settings.PROFILE_CACHE_TTL)
+        return data, False
+
+    def invalidate(self, user_ids):
+        user_ids = set(user_ids) - {None}
+        if not settings.PROFILE_CACHE_ENABLED or not user_ids:
+            return
+        cache.delete_many([f"profile:{user_id}:token" for user_id in user_ids])
+        with self.lock:
+            self.invalidations += len(user_ids)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.PROFILE_CACHE_ENABLED,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations,
+            }
+
+
+profile_cache = ProfileCache()
+
+
+def employers_of(applicant_id):
+    """Employers whose profiles list this seeker's applications (with the seeker's resume)"""
+    return Application.objects.filter(applicant_id=applicant_id).values_list("vacancy__author_id", flat=True).distinct()
+
+
+def vacancy_author(vacancy_id):
+    return Vacancy.objects.filter(pk=vacancy_id).values_list("author_id", flat=True).first()
@@ -0,0 +1,177 @@
+import cProfile
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+def frame_label(code):
+    filename = code.co_filename
+    for root in (str(settings.BASE_DIR), *sys.path):
+        if root and filename.startswith(root + os.sep):
+            filename = filename[len(root) + 1:]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def collapse(frame):
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class RouteProfiler:
+    """Aggregates profiles of sampled requests per route
+
+    In "stack" mode a background thread samples the stacks of the threads
+    serving profiled requests every PROFILER_INTERVAL seconds; it only runs
+    while such a request is in flight. In "pstats" mode each sampled request
+    runs under cProfile and the stats are merged per route.
+    Data is per process, a dump only covers the worker that served it.
+    """
+
+    def __init__(self, mode=None, interval=None):
+        self.mode = mode or settings.PROFILER_MODE
+        self.interval = interval or settings.PROFILER_INTERVAL
+        self.lock = threading.Lock()
+        self.active = {}
+        self.sampler = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = Counter()
+            self.stacks = defaultdict(Counter)
+            self.stats = {}
+
+    def start(self, route):
+        if self.mode == "pstats":
+            profile = cProfile.Profile()
+            profile.enable()
+            return profile
+        ident = threading.get_ident()
+        with self.lock:
+            self.active[ident] = route
+            if self.sampler is None:
+                self.sampler = threading.Thread(target=self.sample, name="route-profiler", daemon=True)
+                self.sampler.start()
+        return ident
+
+    def stop(self, route, handle):
+        if self.mode == "pstats":
+            handle.disable()
+            with self.lock:
+                if route in self.stats:
+                    self.stats[route].add(handle)
+                else:
+                    self.stats[route] = pstats.Stats(handle)
+                self.requests[route] += 1
+            return
+        with self.lock:
+            self.active.pop(handle, None)
+            self.requests[route] += 1
+
+    def sample(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.active:
+                    self.sampler = None
+                    return
+                active = dict(self.active)
+            frames = sys._current_frames()
+            collected = [(route, collapse(frames[ident])) for ident, route in active.items()
+                         if ident != own and ident in frames]
+            with self.lock:
+                for route, stack in collected:
+                    self.stacks[route][stack] += 1
+
+    def summary(self):
+        with self.lock:
+            routes = set(self.requests)
+            return {
+                "mode": self.mode,
+                "routes": {
+                    route: {
+                        "requests": self.requests[route],
+                        "samples": sum(self.stacks[route].values()) if route in self.stacks else 0,
+                    }
+                    for route in sorted(routes)
+                },
+            }
+
+    def collapsed(self, route=None):
+        """Stacks in the folded format read by flamegraph.pl and speedscope"""
+        with self.lock:
+            routes = [route] if route else list(self.stacks)
+            lines = [
+                f"{stack} {count}"
+                for name in routes
+                for stack, count in self.stacks.get(name, {}).items()
+            ]
+        return "\n".join(sorted(lines)) + "\n"
+
+    def pstats_dump(self, route=None):
+        """Merged stats marshalled like `pstats.Stats.dump_stats`, loadable with pstats/snakeviz"""
+        combined = pstats.Stats()
+        with self.lock:
+            for name, stats in self.stats.items():
+                if route is None or name == route:
+                    combined.add(stats)
+        return marshal.dumps(combined.stats)
+
+
+route_profiler = RouteProfiler()
+
+
+def is_admin_request(request):
+    if request.user.is_authenticated:
+        return request.user.is_staff
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return False
+    return result is not None and result[0].is_staff
+
+
+class SamplingProfilerMiddleware:
+    """Profiles a random sample of requests per route, see RouteProfiler
+
+    PROFILER_ROUTE_RATES overrides PROFILER_SAMPLE_RATE for individual url
+    patterns. Staff can force profiling of a request with `X-Profile: 1`.
+    With PROFILER_ENABLED off the middleware removes itself at startup.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, "_profile_session", None)
+        if session is not None:
+            route_profiler.stop(*session)
+            response["X-Profiled"] = session[0]
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = request.resolver_match.route
+        rate = settings.PROFILER_ROUTE_RATES.get(route, settings.PROFILER_SAMPLE_RATE)
+        forced = request.headers.get("X-Profile") == "1" and is_admin_request(request)
+        if forced or (rate > 0 and random.random() < rate):
+            request._profile_session = (route, route_profiler.start(route))
+        return None
@@ -0,0 +1,175 @@
+import contextlib
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections, transaction
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def normalize_sql(sql):
+    """Query shape: literals and placeholders replaced by ?, IN lists collapsed"""
+    shape = STRING_LITERAL.sub("?", sql)
+    shape = NUMBER_LITERAL.sub("?", shape.replace("%s", "?"))
+    shape = PLACEHOLDER_LIST.sub("(...)", shape)
+    return " ".join(shape.split())
+
+
+def plan_warnings(plan):
+    """Red flags in an SQLite query plan: full table scans and temporary sort b-trees"""
+    warnings = []
+    for line in plan:
+        detail = line.strip()
+        if detail.startswith("SCAN ") and " USING " not in detail:
+            warnings.append(f"full scan: {detail[5:]}")
+        elif "USE TEMP B-TREE" in detail:
+            warnings.append(detail.lower())
+    return warnings
+
+
+class SlowQueryLog:
+    """Slow queries of this process: a ring buffer of occurrences plus per-shape totals
+
+    The first time a shape is seen its plan is captured with EXPLAIN, so the
+    report shows why it was slow without re-running anything.
+    """
+
+    def __init__(self, buffer_size=None, max_shapes=None):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.buffer_size = buffer_size or settings.QUERYLOG_BUFFER_SIZE
+        self.max_shapes = max_shapes or settings.QUERYLOG_MAX_SHAPES
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.recent = deque(maxlen=self.buffer_size)
+            self.shapes = {}
+
+    @contextlib.contextmanager
+    def capture(self, request=None):
+        """Install the timing wrapper on every database connection of this thread"""
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(QueryTimer(self, connection, request)))
+            yield
+
+    def record(self, connection, sql, params, many, duration, view):
+        shape = normalize_sql(sql)
+        with self.lock:
+            entry = self.shapes.get(shape)
+            explain = entry is None
+            if explain:
+                if len(self.shapes) >= self.max_shapes:
+                    del self.shapes[min(self.shapes, key=lambda key: self.shapes[key]["total"])]
+                entry = self.shapes[shape] = {
+                    "shape": shape, "count": 0, "total": 0.0, "max": 0.0,
+                    "views": Counter(), "plan": None, "warnings": [],
+                }
+            entry["count"] += 1
+            entry["total"] += duration
+            entry["max"] = max(entry["max"], duration)
+            entry["views"][view] += 1
+            self.recent.append({
+                "at": timezone.now(),
+                "duration_ms": round(duration * 1000, 3),
+                "view": view,
+                "sql": sql,
+                "params": repr(params)[:200] if not many else f"<{len(params)} parameter sets>",
+                "shape": shape,
+            })
+        if explain and not many and settings.QUERYLOG_EXPLAIN:
+            plan = self.explain(connection, sql, params)
+            with self.lock:
+                entry["plan"] = plan
+                entry["warnings"] = plan_warnings(plan or ())
+
+    def explain(self, connection, sql, params):
+        if not sql.lstrip()[:6].upper() == "SELECT":
+            return None
+        prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        self.local.explaining = True
+        try:
+            # Savepoint so a failed EXPLAIN can't break the caller's transaction
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+        except Exception:
+            logger.warning("EXPLAIN failed for %s", sql, exc_info=True)
+            return None
+        finally:
+            self.local.explaining = False
+        # SQLite rows are (id, parent, notused, detail); other backends return the plan text
+        return [str(row[-1]) for row in rows]
+
+    def report(self, limit=20):
+        with self.lock:
+            shapes = sorted(self.shapes.values(), key=lambda entry: entry["total"], reverse=True)[:limit]
+            return {
+                "threshold_ms": settings.QUERYLOG_THRESHOLD_MS,
+                "shapes": [
+                    {
+                        "shape": entry["shape"],
+                        "count": entry["count"],
+                        "total_ms": round(entry["total"] * 1000, 3),
+                        "avg_ms": round(entry["total"] * 1000 / entry["count"], 3),
+                        "max_ms": round(entry["max"] * 1000, 3),
+                        "views": dict(entry["views"].most_common(5)),
+                        "plan": entry["plan"],
+                        "warnings": entry["warnings"],
+                    }
+                    for entry in shapes
+                ],
+                "recent": list(self.recent)[-limit:],
+            }
+
+
+class QueryTimer:
+    def __init__(self, log, connection, request):
+        self.log = log
+        self.connection = connection
+        self.request = request
+
+    def view_name(self):
+        match = getattr(self.request, "resolver_match", None)
+        if match is not None:
+            return match.view_name or match._func_path
+        return getattr(self.request, "path", "-")
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self.log.local, "explaining", False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration * 1000 >= settings.QUERYLOG_THRESHOLD_MS:
+                self.log.record(self.connection, sql, params, many, duration, self.view_name())
+
+
+slow_query_log = SlowQueryLog()
+
+
+class SlowQueryLogMiddleware:
+    """Times every query made while handling a request, see SlowQueryLog"""
+
+    def __init__(self, get_response):
+        if not settings.QUERYLOG_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with slow_query_log.capture(request):
+            return self.get_response(request)
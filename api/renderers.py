@@ -0,0 +1,73 @@
+import math
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+
+def plain_float(value):
+    """Whether orjson writes the float exactly like json does: finite and without an exponent
+
+    orjson prints 1e16 as "1e16" and 1e-05 as "0.00001" where json writes
+    "1e+16" and "1e-05", and it turns NaN and Infinity into null.
+    """
+    return math.isfinite(value) and "e" not in repr(value)
+
+
+def plain_floats(data):
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, float):
+            if not plain_float(item):
+                return False
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return True
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when installed, producing the same bytes
+
+    Payloads holding floats orjson would format differently go through the
+    json encoder, so do NaN and Infinity, which then raise under STRICT_JSON.
+    """
+
+    def __init__(self):
+        self.fallback_encoder = self.encoder_class()
+
+    def default(self, obj):
+        value = self.fallback_encoder.default(obj)
+        if isinstance(value, float) and not plain_float(value):
+            raise TypeError("Float needs the json encoder")
+        return value
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if not plain_floats(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # Datetimes go through DRF's encoder so they keep its "Z" suffix
+            ret = orjson.dumps(
+                data,
+                default=self.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+def render_json(data):
+    """Render `data` the way the API's JSON responses do"""
+    return FastJSONRenderer().render(data)
+
@@ -1,5 +1,8 @@
-from rest_framework import serializers
-from .models import Vacancy, Resume, Application, FavoriteVacancy
+from django.utils import timezone
+from rest_framework import serializers, ISO_8601
+from rest_framework.settings import api_settings
+from .models import Vacancy, Resume, Application, FavoriteVacancy, SavedSearch, SavedSearchMatch, format_salary
+from .fieldsets import SparseFieldsetSerializerMixin
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -24,10 +27,12 @@ class VacancyCreateSerializer(serializers.ModelSerializer):
             "is_active",
         ]
 
-class VacancySerializer(serializers.ModelSerializer):
+class VacancySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
     salary_display = serializers.SerializerMethodField()
 
+    field_sources = {"salary_display": ["show_salary", "salary_from", "salary_to", "currency"]}
+
     class Meta:
         model = Vacancy
         fields = [
@@ -47,15 +52,99 @@ class VacancySerializer(serializers.ModelSerializer):
             "experience_required",
             "is_active",
             "views",
+            "applications_count",
+            "pending_count",
+            "reviewed_count",
+            "accepted_count",
+            "rejected_count",
             "created_at",
             "updated_at",
             "author",
             "salary_display",
+            "duplicate_of",
         ]
+        read_only_fields = [*Vacancy.COUNTER_FIELDS, "duplicate_of"]
 
     def get_salary_display(self, obj):
         return obj.salary_display()
 
+
+class FlatVacancySerializer:
+    """Builds the same dicts as VacancySerializer straight from `.values()` rows
+
+    Only decimals and datetimes go through DRF fields, every other column is
+    copied as is, which skips the per-object field machinery on large lists.
+    """
+    fields = VacancySerializer.Meta.fields
+    computed = {"author", "salary_display"}
+    _serializer_fields = None
+
+    def __init__(self, queryset, fields=None):
+        self.queryset = queryset
+        if fields is not None:
+            self.fields = [name for name in self.fields if name in fields]
+
+    @classmethod
+    def serializer_fields(cls):
+        if cls._serializer_fields is None:
+            cls._serializer_fields = VacancySerializer().fields
+        return cls._serializer_fields
+
+    def converters(self):
+        converters = {}
+        for name, field in self.serializer_fields().items():
+            if isinstance(field, serializers.DateTimeField):
+                converters[name] = datetime_converter(field)
+            elif isinstance(field, serializers.DecimalField):
+                converters[name] = field.to_representation
+        return converters
+
+    @property
+    def data(self):
+        columns = [name for name in self.fields if name not in self.computed]
+        if "author" in self.fields:
+            columns.append("author__username")
+        if "salary_display" in self.fields:
+            columns.extend(VacancySerializer.field_sources["salary_display"])
+        rows = self.queryset.values(*dict.fromkeys(columns))
+        converters = self.converters()
+        return [self.to_representation(row, converters) for row in rows]
+
+    def to_representation(self, row, converters):
+        data = {}
+        for name in self.fields:
+            if name == "author":
+                data[name] = row["author__username"]
+            elif name == "salary_display":
+                data[name] = format_salary(
+                    row["show_salary"], row["salary_from"], row["salary_to"], row["currency"]
+                )
+            elif name in converters:
+                value = row[name]
+                data[name] = None if value is None else converters[name](value)
+            else:
+                data[name] = row[name]
+        return data
+
+
+def datetime_converter(field):
+    """DateTimeField.to_representation with the timezone lookup done once per call site"""
+    field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if field_timezone is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return convert
+
+
 class ResumeCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating resumes - file is required"""
     class Meta:
@@ -67,20 +156,27 @@ class ResumeCreateSerializer(serializers.ModelSerializer):
 
 
 class ResumeSerializer(serializers.ModelSerializer):
-    """Serializer for reading resumes - only file_url"""
+    """Serializer for reading resumes - file and preview urls"""
     file_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+
+    field_sources = {"file_url": ["file"], "preview_url": ["preview"]}
 
     class Meta:
         model = Resume
         fields = [
             "full_name",
             "file_url",
+            "preview_url",
         ]
-        read_only_fields = ["file_url"]
+        read_only_fields = ["file_url", "preview_url"]
 
     def get_file_url(self, obj):
         return obj.file_url
 
+    def get_preview_url(self, obj):
+        return obj.preview_url
+
 
 
 class VacancyShortSerializer(serializers.ModelSerializer):
@@ -90,7 +186,7 @@ class VacancyShortSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "company", "location"]
 
 
-class ApplicationSerializer(serializers.ModelSerializer):
+class ApplicationSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     applicant = serializers.StringRelatedField(read_only=True)
     vacancy = VacancyShortSerializer(read_only=True)
     resume = ResumeSerializer(read_only=True)
@@ -168,7 +264,7 @@ class FavoriteVacancySerializer(serializers.ModelSerializer):
         fields = ["id", "user", "vacancy", "vacancy_id", "added_at"]
 
 
-class FavoriteListSerializer(serializers.ModelSerializer):
+class FavoriteListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     vacancy = VacancySerializer(read_only=True)
     class Meta:
         model = FavoriteVacancy
@@ -176,4 +272,25 @@ class FavoriteListSerializer(serializers.ModelSerializer):
 
 
 class FavoriteToggleResponseSerializer(serializers.Serializer):
-    message = serializers.CharField()
\ No newline at end of file
+    message = serializers.CharField()
+
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SavedSearch
+        fields = ["id", "name", "title", "location", "employment_type", "work_format", "created_at"]
+
+    def validate(self, attrs):
+        if not any(attrs.get(field) for field in SavedSearch.PREDICATE_FIELDS):
+            raise serializers.ValidationError(
+                f"Set at least one of: {', '.join(SavedSearch.PREDICATE_FIELDS)}"
+            )
+        return attrs
+
+
+class SavedSearchMatchSerializer(serializers.ModelSerializer):
+    vacancy = VacancyShortSerializer(read_only=True)
+
+    class Meta:
+        model = SavedSearchMatch
+        fields = ["id", "search", "vacancy", "matched_at", "read_at"]
@@ -0,0 +1,275 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.fields import DateTimeField
+
+from . import documents, tasks
+from .batch import post_batch_save
+from .autocomplete import vacancy_autocomplete
+from .dedupe import vacancy_duplicates
+from .percolator import saved_search_percolator
+from .events import application_events
+from .trending import trending_vacancies
+from .profile_cache import profile_cache, employers_of, vacancy_author
+from accounts.models import CustomUser
+from .models import Vacancy, VacancyActivity, Resume, Application, FavoriteVacancy, DeletionLog, SavedSearch
+
+
+@receiver(pre_save, sender=Application)
+def remember_application_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._stored_status = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {"status", "vacancy"} & set(update_fields):
+        return
+    instance._stored_status = Application.objects.filter(pk=instance.pk).values_list("vacancy_id", "status").first()
+
+
+@receiver(post_save, sender=Application)
+def count_application(sender, instance, created, raw=False, **kwargs):
+    """Keep the vacancy counters in step with saves that bypass Application.set_status, e.g. the admin"""
+    stored = instance.__dict__.pop("_stored_status", None)
+    instance._moved_from = None
+    if raw:
+        return
+    if created:
+        Vacancy.adjust_application_counters(instance.vacancy_id, added=instance.status)
+        return
+    if stored is None or stored == (instance.vacancy_id, instance.status):
+        return
+    vacancy_id, status = stored
+    if vacancy_id == instance.vacancy_id:
+        Vacancy.adjust_application_counters(vacancy_id, added=instance.status, removed=status)
+    else:
+        Vacancy.adjust_application_counters(vacancy_id, removed=status)
+        Vacancy.adjust_application_counters(instance.vacancy_id, added=instance.status)
+    instance._moved_from = vacancy_id
+
+
+def status_changed(instance, created, update_fields):
+    return created or bool(update_fields and "status" in update_fields) or instance._moved_from is not None
+
+
+@receiver(post_delete, sender=Application)
+def count_deleted_application(sender, instance, **kwargs):
+    Vacancy.adjust_application_counters(instance.vacancy_id, removed=instance.status)
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def refresh_counters_document(sender, instance, signal, created=False, raw=False, update_fields=None, **kwargs):
+    # The counters are changed with .update(), which sends no Vacancy signals
+    if raw:
+        return
+    if signal is post_delete:
+        vacancy_ids = [instance.vacancy_id]
+    elif status_changed(instance, created, update_fields):
+        vacancy_ids = list({instance.vacancy_id, instance._moved_from} - {None})
+    else:
+        return
+    # Not part of the submission itself, so it stays out of its transaction
+    transaction.on_commit(lambda: documents.queue_render(vacancy_ids))
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_save, sender=FavoriteVacancy)
+def record_trending_activity(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    kind = "applications" if sender is Application else "favorites"
+    vacancy_id = instance.vacancy_id
+
+    def record():
+        VacancyActivity.record(vacancy_id, **{kind: 1})
+        trending_vacancies.record(vacancy_id, kind)
+    # The hourly bucket is a statistic; a lost increment on a crash is acceptable
+    transaction.on_commit(record)
+
+
+@receiver(post_save, sender=Vacancy)
+def render_vacancy_document(sender, instance, raw=False, **kwargs):
+    if not raw:
+        documents.queue_render([instance.pk])
+
+
+@receiver(post_batch_save, sender=Vacancy)
+def render_vacancy_documents(sender, instances, **kwargs):
+    documents.queue_render([instance.pk for instance in instances])
+
+
+# The in-process indexes only change once the write commits, so a rolled back
+# save never leaves suggestions or duplicate targets for rows that don't exist
+
+@receiver(post_save, sender=Vacancy)
+def index_vacancy_for_autocomplete(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: vacancy_autocomplete.update(instance))
+
+
+@receiver(post_delete, sender=Vacancy)
+def unindex_vacancy_for_autocomplete(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: vacancy_autocomplete.discard(pk))
+
+
+@receiver(post_save, sender=Vacancy)
+def index_vacancy_for_dedupe(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: vacancy_duplicates.update(instance))
+
+
+@receiver(post_delete, sender=Vacancy)
+def unindex_vacancy_for_dedupe(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: vacancy_duplicates.discard(pk))
+
+
+@receiver(post_batch_save, sender=Vacancy)
+def index_vacancies(sender, instances, **kwargs):
+    def update():
+        for instance in instances:
+            vacancy_autocomplete.update(instance)
+            vacancy_duplicates.update(instance)
+    transaction.on_commit(update)
+
+
+@receiver(pre_save, sender=Vacancy)
+def remember_vacancy_listing(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {"is_active", "duplicate_of"} & set(update_fields):
+        return
+    previous = Vacancy.objects.filter(pk=instance.pk).values_list("is_active", "duplicate_of_id").first()
+    instance._was_listed = previous is not None and previous[0] and previous[1] is None
+
+
+@receiver(post_save, sender=Vacancy)
+def percolate_new_vacancy(sender, instance, created, raw=False, **kwargs):
+    """Match saved searches when a vacancy starts being listed
+
+    That is on creation, on reactivation and when a duplicate flag is cleared;
+    flagged reposts don't notify anyone. Matches are stored with
+    ignore_conflicts, so a vacancy listed twice is never delivered twice.
+    """
+    if raw or not (instance.is_active and instance.duplicate_of_id is None):
+        return
+    if created or not getattr(instance, "_was_listed", True):
+        instance._was_listed = True
+        tasks.enqueue("saved_search.percolate", vacancy_id=instance.pk)
+
+
+@receiver(post_batch_save, sender=Vacancy)
+def percolate_new_vacancies(sender, instances, created, **kwargs):
+    payloads = [
+        {"vacancy_id": instance.pk}
+        for instance in instances
+        if created and instance.is_active and instance.duplicate_of_id is None
+    ]
+    if payloads:
+        tasks.enqueue_many("saved_search.percolate", payloads)
+
+
+@receiver(post_delete, sender=SavedSearch)
+def unindex_saved_search(sender, instance, **kwargs):
+    saved_search_percolator.discard(instance.pk)
+
+
+@receiver(pre_save, sender=Resume)
+def reset_replaced_resume_preview(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.pk is None:
+        instance._file_changed = bool(instance.file)
+        return
+    previous, previous_preview = Resume.objects.filter(pk=instance.pk).values_list("file", "preview").first() or ("", "")
+    instance._file_changed = bool(instance.file) and previous != instance.file.name
+    if previous and previous != instance.file.name:
+        instance.content_hash = ""
+        instance.preview = ""
+        if previous_preview:
+            transaction.on_commit(lambda: tasks.enqueue("resume.delete_preview", name=previous_preview))
+
+
+@receiver(post_save, sender=Resume)
+def render_resume_preview(sender, instance, raw=False, **kwargs):
+    if not raw and getattr(instance, "_file_changed", False):
+        instance._file_changed = False
+        resume_id, name = instance.pk, instance.file.name
+        transaction.on_commit(lambda: tasks.enqueue("resume.render_preview", resume_id=resume_id, name=name))
+
+
+@receiver(post_delete, sender=Resume)
+def delete_resume_preview(sender, instance, **kwargs):
+    if instance.preview:
+        preview = instance.preview.name
+        transaction.on_commit(lambda: tasks.enqueue("resume.delete_preview", name=preview))
+
+
+@receiver(post_save, sender=Application)
+def publish_application_status(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not status_changed(instance, created, update_fields):
+        return
+    if Application.vacancy.is_cached(instance):
+        employer_id = instance.vacancy.author_id
+    else:
+        employer_id = Vacancy.objects.filter(pk=instance.vacancy_id).values_list("author_id", flat=True).first()
+    data = {
+        "id": instance.pk,
+        "vacancy_id": instance.vacancy_id,
+        "status": instance.status,
+        "updated_at": DateTimeField().to_representation(instance.updated_at),
+    }
+    transaction.on_commit(
+        lambda: application_events.publish((instance.applicant_id, employer_id), "application.status", data)
+    )
+
+
+@receiver(post_delete, sender=Application)
+def log_deleted_application(sender, instance, **kwargs):
+    employer_id = Vacancy.objects.filter(pk=instance.vacancy_id).values_list("author_id", flat=True).first()
+    DeletionLog.objects.bulk_create([
+        DeletionLog(kind="application", object_id=instance.pk, user_id=user_id)
+        for user_id in {instance.applicant_id, employer_id} - {None}
+    ])
+
+
+@receiver(post_delete, sender=FavoriteVacancy)
+def log_deleted_favorite(sender, instance, **kwargs):
+    DeletionLog.objects.create(kind="favorite", object_id=instance.pk, user_id=instance.user_id)
+
+
+def profile_dependents(sender, instance):
+    """Users whose /api/my-account/ payload embeds this row"""
+    if sender is CustomUser:
+        return [instance.pk]
+    if sender is Resume:
+        # Employers see the resume next to the seeker's applications
+        return [instance.user_id, *employers_of(instance.user_id)]
+    if sender is Vacancy:
+        return [instance.author_id]
+    if Application.vacancy.is_cached(instance):
+        return [instance.vacancy.author_id]
+    return [vacancy_author(instance.vacancy_id)]
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=Resume)
+@receiver(post_save, sender=Vacancy)
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_delete, sender=Resume)
+@receiver(post_delete, sender=Vacancy)
+@receiver(post_delete, sender=Application)
+def invalidate_profiles(sender, instance, raw=False, **kwargs):
+    if raw or not settings.PROFILE_CACHE_ENABLED:
+        return
+    user_ids = profile_dependents(sender, instance)
+    transaction.on_commit(lambda: profile_cache.invalidate(user_ids))
+
+
+@receiver(post_batch_save, sender=Vacancy)
+def invalidate_author_profiles(sender, instances, **kwargs):
+    if settings.PROFILE_CACHE_ENABLED:
+        user_ids = {instance.author_id for instance in instances}
+        transaction.on_commit(lambda: profile_cache.invalidate(user_ids))
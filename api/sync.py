@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import DeletionLog
+
+
+def make_token(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def parse_token(token):
+    try:
+        return datetime.fromtimestamp(int(token) / 1_000_000, tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        raise ValidationError({"since": "Invalid sync token"})
+
+
+class DeltaSyncMixin:
+    """`?since=<token>` returns rows changed after the token plus ids deleted since then
+
+    Start a sync with `since=0`. Each response carries the token for the next
+    call; it trails the response time a little so that rows committed by
+    concurrent writers are picked up again rather than missed.
+    """
+    sync_field = "updated_at"
+    tombstone_kind = None
+
+    def list(self, request, *args, **kwargs):
+        token = request.query_params.get("since")
+        if token is None:
+            return super().list(request, *args, **kwargs)
+
+        since = parse_token(token)
+        now = timezone.now()
+        if since < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS) and token != "0":
+            return Response(
+                {"detail": "Sync token expired, fetch the full list again"},
+                status=status.HTTP_410_GONE,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(**{f"{self.sync_field}__gte": since})
+        deleted = DeletionLog.objects.filter(
+            user_id=request.user.pk, kind=self.tombstone_kind, deleted_at__gte=since
+        ).values_list("object_id", flat=True)
+        return Response({
+            "results": self.get_serializer(queryset, many=True).data,
+            "deleted": list(deleted),
+            "since": make_token(now - timedelta(seconds=settings.SYNC_TOKEN_MARGIN_SECONDS)),
+        })
@@ -0,0 +1,237 @@
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from .documents import render_documents
+from .models import Vacancy, VacancyActivity, Resume, Task
+from .previews import update_preview
+from .percolator import match_vacancies
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TaskHandler:
+    name: str
+    func: object
+    batch: bool
+    max_attempts: int
+
+
+registry = {}
+
+
+def task(name, batch=False, max_attempts=None):
+    """Register a task handler; batch handlers receive a list of payloads of the same task"""
+    def decorator(func):
+        registry[name] = TaskHandler(name, func, batch, max_attempts or settings.TASK_MAX_ATTEMPTS)
+        return func
+    return decorator
+
+
+def enqueue(name, /, **payload):
+    """Queue a task, or run it right away when TASK_QUEUE_EAGER is on"""
+    handler = registry[name]
+    if settings.TASK_QUEUE_EAGER:
+        run_handler(handler, [payload])
+        return None
+    return Task.objects.create(name=name, payload=payload, max_attempts=handler.max_attempts)
+
+
+def enqueue_many(name, payloads):
+    """Queue several tasks of one name with a single INSERT"""
+    handler = registry[name]
+    if settings.TASK_QUEUE_EAGER:
+        run_handler(handler, payloads)
+        return []
+    return Task.objects.bulk_create(
+        [Task(name=name, payload=payload, max_attempts=handler.max_attempts) for payload in payloads]
+    )
+
+
+def run_handler(handler, payloads):
+    if handler.batch:
+        handler.func(payloads)
+    else:
+        for payload in payloads:
+            handler.func(**payload)
+
+
+def claimable(now):
+    # Running tasks whose lock expired were abandoned by a dead worker; they are
+    # redelivered until they run out of attempts, then reap() fails them
+    return Task.objects.filter(
+        Q(status="queued", available_at__lte=now)
+        | Q(status="running", locked_until__lt=now, attempts__lt=models.F("max_attempts"))
+    )
+
+
+def claim(batch_size):
+    """Atomically lock the next tasks, batching tasks that share a batch handler"""
+    now = timezone.now()
+    first = claimable(now).order_by("available_at", "pk").values_list("name", flat=True).first()
+    if first is None:
+        return []
+    handler = registry.get(first)
+    limit = batch_size if handler is not None and handler.batch else 1
+    ids = list(
+        claimable(now).filter(name=first).order_by("available_at", "pk").values_list("pk", flat=True)[:limit]
+    )
+    token = uuid.uuid4().hex
+    # The WHERE clause is re-checked by the UPDATE, so a task is only won by one worker
+    claimable(now).filter(pk__in=ids).update(
+        status="running",
+        claim_token=token,
+        locked_until=now + timedelta(seconds=settings.TASK_VISIBILITY_TIMEOUT),
+        attempts=models.F("attempts") + 1,
+        started_at=now,
+    )
+    return list(Task.objects.filter(claim_token=token, status="running"))
+
+
+def process(tasks):
+    handler = registry.get(tasks[0].name)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for task {tasks[0].name!r}")
+        run_handler(handler, [item.payload for item in tasks])
+    except Exception as exc:
+        logger.exception("Task %s failed", tasks[0].name)
+        fail(tasks, exc)
+        return False
+    # A task whose lock expired may have been claimed again; only the current claim finishes it
+    owned(tasks).update(status="done", finished_at=timezone.now(), locked_until=None, last_error="")
+    return True
+
+
+def owned(tasks):
+    return Task.objects.filter(pk__in=[item.pk for item in tasks], claim_token=tasks[0].claim_token, status="running")
+
+
+def fail(tasks, exc):
+    now = timezone.now()
+    exhausted = [item.pk for item in tasks if item.attempts >= item.max_attempts]
+    owned(tasks).filter(pk__in=exhausted).update(
+        status="failed", finished_at=now, locked_until=None, last_error=repr(exc)
+    )
+    for attempts in {item.attempts for item in tasks if item.pk not in exhausted}:
+        owned(tasks).filter(attempts=attempts).update(
+            status="queued", available_at=now + timedelta(seconds=2 ** attempts), locked_until=None,
+            last_error=repr(exc),
+        )
+
+
+def reap():
+    """Fail running tasks whose lock expired after their last allowed attempt"""
+    now = timezone.now()
+    return Task.objects.filter(
+        status="running", locked_until__lt=now, attempts__gte=models.F("max_attempts")
+    ).update(status="failed", finished_at=now, locked_until=None, last_error="Lock expired on the last attempt")
+
+
+def prune(batch_size=1000):
+    """Delete done tasks older than TASK_RETENTION_HOURS; failed ones stay for inspection"""
+    cutoff = timezone.now() - timedelta(hours=settings.TASK_RETENTION_HOURS)
+    deleted = 0
+    while True:
+        ids = list(Task.objects.filter(status="done", finished_at__lt=cutoff).values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += Task.objects.filter(pk__in=ids).delete()[0]
+
+
+def latency_stats(window):
+    """Per task name: status counts plus queue wait and run time samples in seconds
+
+    Only tasks finished within `window` are sampled, through the (status, finished_at) index.
+    """
+    stats = {}
+    rows = Task.objects.filter(
+        status__in=["done", "failed"], finished_at__gte=timezone.now() - window, started_at__isnull=False
+    ).values_list(
+        "name", "status", "created_at", "started_at", "finished_at"
+    )
+    for name, status, created_at, started_at, finished_at in rows.iterator():
+        entry = stats.setdefault(name, {"statuses": Counter(), "wait": [], "run": []})
+        entry["statuses"][status] += 1
+        entry["wait"].append((started_at - created_at).total_seconds())
+        if finished_at:
+            entry["run"].append((finished_at - started_at).total_seconds())
+    for name, status in Task.objects.filter(status__in=["queued", "running"]).values_list("name", "status"):
+        stats.setdefault(name, {"statuses": Counter(), "wait": [], "run": []})["statuses"][status] += 1
+    return stats
+
+
+class ViewBuffer:
+    """Counts vacancy views in process memory and queues them once per VIEW_FLUSH_SECONDS
+
+    Detail reads then insert one Task row per vacancy and interval instead of
+    one per view. Views still buffered when a worker process dies are lost,
+    which is acceptable for a popularity counter.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.flushed_at = time.monotonic()
+
+    def add(self, vacancy_id, views=1):
+        now = time.monotonic()
+        with self.lock:
+            self.counts[vacancy_id] += views
+            if not settings.TASK_QUEUE_EAGER and now - self.flushed_at < settings.VIEW_FLUSH_SECONDS:
+                return
+            counts, self.counts, self.flushed_at = self.counts, Counter(), now
+        enqueue_many("vacancy.increment_views", [
+            {"vacancy_id": vacancy_id, "views": views} for vacancy_id, views in counts.items()
+        ])
+
+
+view_buffer = ViewBuffer()
+
+
+@task("vacancy.increment_views", batch=True)
+def increment_views(payloads):
+    changed = []
+    totals = Counter()
+    for payload in payloads:
+        totals[payload["vacancy_id"]] += payload.get("views", 1)
+    for vacancy_id, views in totals.items():
+        if Vacancy.increment_views_for(vacancy_id, views):
+            VacancyActivity.record(vacancy_id, views=views)
+            changed.append(vacancy_id)
+    if changed and settings.VACANCY_DOCUMENTS_ENABLED:
+        render_documents(changed)
+
+
+@task("vacancy.render_documents", batch=True)
+def render_vacancy_documents(payloads):
+    render_documents({payload["vacancy_id"] for payload in payloads})
+
+
+@task("saved_search.percolate", batch=True)
+def percolate_vacancies(payloads):
+    match_vacancies({payload["vacancy_id"] for payload in payloads})
+
+
+@task("resume.render_preview")
+def render_resume_preview(resume_id, name):
+    update_preview(resume_id, name)
+
+
+@task("resume.delete_preview")
+def delete_resume_preview(name):
+    # Previews are shared between resumes with identical files
+    if name and not Resume.objects.filter(preview=name).exists() and default_storage.exists(name):
+        default_storage.delete(name)
@@ -1,3 +1,1020 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import marshal
+import os
+import random
+import runpy
+import tempfile
+import time
+import uuid
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.conf import settings
+from django.contrib import admin
+from django.db import connection, transaction
+from django.db.utils import ConnectionHandler
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import CustomUser
+from server import openapi
+from .autocomplete import PrefixIndex, vacancy_autocomplete
+from .batch import send_batch_saved
+from .dedupe import TEXT_FIELDS, signature, vacancy_duplicates
+from . import tasks, throttling
+from .documents import render_documents
+from .events import EventHub, event_stream
+from .fieldsets import parse_fieldset
+from .previews import render_docx
+from .profiling import RouteProfiler, route_profiler
+from .querylog import SlowQueryLog, normalize_sql, plan_warnings
+from .renderers import FastJSONRenderer, render_json
+from .management.commands.dedupe_vacancies import Command as DedupeCommand, signatures
+from .management.commands.loadtest import Stats as LoadStats, parse_mix, percentile
+from .management.commands.serve import WorkerServer, warm_up
+from .models import (
+    Vacancy, Resume, Application, VacancyDocument, Task, SavedSearch, SavedSearchMatch, ArchivedVacancy,
+    FavoriteVacancy, VacancyActivity,
+)
+from .percolator import match_vacancies
+from .sync import make_token
+from .trending import HourlyRing, TrendingBoard, trending_vacancies
+from .views import authenticate_stream
+
+
+NO_THROTTLE = dict.fromkeys(["anon", "seeker", "employer", "staff"])
+
+
+def make_vacancy(author, **fields):
+    values = {
+        "title": "Python developer",
+        "location": "Dushanbe",
+        "description": "Build and run the job board API",
+        "employment_type": "full_time",
+        "work_format": "remote",
+    }
+    values.update(fields)
+    return Vacancy.objects.create(author=author, **values)
+
+
+@override_settings(THROTTLE_RATES=NO_THROTTLE, THROTTLE_ROUTE_RATES={}, TASK_QUEUE_EAGER=False)
+class APITestBase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = CustomUser.objects.create_user(username="employer", password="x", role="employer")
+        self.seeker = CustomUser.objects.create_user(username="seeker", password="x", role="seeker")
+        self.client = APIClient()
+
+    def login(self, user):
+        self.client.force_authenticate(user)
+
+    def queued(self, name):
+        return list(Task.objects.filter(name=name, status="queued").values_list("payload", flat=True))
+
+
+@override_settings(VACANCY_DOCUMENTS_ENABLED=True)
+class VacancyDocumentTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.vacancy = make_vacancy(self.employer)
+        Task.objects.all().delete()
+
+    def test_reads_never_write_documents(self):
+        self.assertFalse(VacancyDocument.objects.exists())
+        response = self.client.get("/api/vacancies/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["title"], "Python developer")
+        response = self.client.get(f"/api/vacancies/{self.vacancy.pk}/")
+        self.assertEqual(response.json()["title"], "Python developer")
+        self.assertFalse(VacancyDocument.objects.exists())
+        self.assertEqual(self.queued("vacancy.render_documents"), [{"vacancy_id": self.vacancy.pk}])
+
+    def test_stale_document_is_served_and_queued(self):
+        render_documents([self.vacancy.pk])
+        VacancyDocument.objects.update(rendered_at=timezone.now() - timedelta(hours=1))
+        Vacancy.objects.filter(pk=self.vacancy.pk).update(title="Renamed")
+        response = self.client.get(f"/api/vacancies/{self.vacancy.pk}/")
+        self.assertEqual(response.json()["title"], "Python developer")
+        self.assertEqual(len(self.queued("vacancy.render_documents")), 1)
+        # Queued once per max age, not on every read
+        self.client.get(f"/api/vacancies/{self.vacancy.pk}/")
+        self.assertEqual(len(self.queued("vacancy.render_documents")), 1)
+
+    @override_settings(VIEW_FLUSH_SECONDS=3600)
+    def test_document_and_serializer_paths_show_the_same_views(self):
+        Vacancy.objects.filter(pk=self.vacancy.pk).update(views=7)
+        render_documents([self.vacancy.pk])
+        url = f"/api/vacancies/{self.vacancy.pk}/"
+        from_document = self.client.get(url)
+        self.assertEqual(from_document["Content-Type"], "application/json")
+        from_serializer = self.client.get(url, {"exclude": "description"})
+        browsable = self.client.get(url, {"format": "api"})
+        self.assertEqual(from_document.json()["views"], 7)
+        self.assertEqual(from_serializer.json()["views"], 7)
+        self.assertContains(browsable, "&quot;views&quot;: 7,")
+        tasks.view_buffer.__init__()
+
+    def test_counter_changes_queue_a_render(self):
+        resume = Resume.objects.create(user=self.seeker, full_name="Seeker", file="resumes/cv.pdf")
+        with self.captureOnCommitCallbacks(execute=True):
+            Application.objects.create(applicant=self.seeker, vacancy=self.vacancy, resume=resume)
+        self.assertIn({"vacancy_id": self.vacancy.pk}, self.queued("vacancy.render_documents"))
+
+
+class ApplicationStatusTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.vacancy = make_vacancy(self.employer)
+        resume = Resume.objects.create(user=self.seeker, full_name="Seeker", file="resumes/cv.pdf")
+        self.application = Application.objects.create(applicant=self.seeker, vacancy=self.vacancy, resume=resume)
+
+    def counters(self):
+        return Vacancy.objects.values(*Vacancy.COUNTER_FIELDS).get(pk=self.vacancy.pk)
+
+    def test_stale_instances_move_counters_once(self):
+        first = Application.objects.get(pk=self.application.pk)
+        second = Application.objects.get(pk=self.application.pk)
+        self.assertTrue(first.mark_accepted())
+        self.assertFalse(second.mark_rejected())
+        self.assertEqual(second.status, "accepted")
+        self.assertEqual(self.counters(), {
+            "applications_count": 1, "pending_count": 0, "reviewed_count": 0,
+            "accepted_count": 1, "rejected_count": 0,
+        })
+
+    @override_settings(VACANCY_DOCUMENTS_ENABLED=True)
+    def test_status_change_still_notifies_receivers(self):
+        Task.objects.all().delete()
+        self.login(self.employer)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/applications/{self.application.pk}/accept/")
+        self.assertEqual(response.json()["status"], "accepted")
+        self.assertEqual(self.queued("vacancy.render_documents"), [{"vacancy_id": self.vacancy.pk}])
+
+    @override_settings(VACANCY_DOCUMENTS_ENABLED=True)
+    def test_admin_status_change_moves_counters(self):
+        staff = CustomUser.objects.create_superuser(username="admin", password="x", email="admin@example.com")
+        self.client.force_login(staff)
+        Task.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/admin/api/application/{self.application.pk}/change/", {
+                "applicant": self.seeker.pk,
+                "vacancy": self.vacancy.pk,
+                "resume": self.application.resume_id,
+                "cover_letter": "",
+                "status": "rejected",
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Application.objects.get().status, "rejected")
+        self.assertEqual(self.counters(), {
+            "applications_count": 1, "pending_count": 0, "reviewed_count": 0,
+            "accepted_count": 0, "rejected_count": 1,
+        })
+        self.assertEqual(self.queued("vacancy.render_documents"), [{"vacancy_id": self.vacancy.pk}])
+
+    def test_moving_an_application_between_vacancies(self):
+        other = make_vacancy(self.employer, title="Tester")
+        self.application.vacancy, self.application.status = other, "reviewed"
+        self.application.save()
+        self.assertEqual(self.counters()["applications_count"], 0)
+        self.assertEqual(self.counters()["pending_count"], 0)
+        moved = Vacancy.objects.values(*Vacancy.COUNTER_FIELDS).get(pk=other.pk)
+        self.assertEqual((moved["applications_count"], moved["reviewed_count"]), (1, 1))
+        # Saving other fields leaves the counters alone
+        self.application.cover_letter = "Hello"
+        self.application.save()
+        self.assertEqual(Vacancy.objects.get(pk=other.pk).reviewed_count, 1)
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def test_ranked_nodes_match_a_full_scan(self):
+        rng = random.Random(7)
+        index = PrefixIndex(top_k=3, depth=2)
+        words = ["java", "jakarta", "python", "pyramid", "junior", "dev"]
+        live = []
+        for _ in range(500):
+            if live and rng.random() < 0.4:
+                index.remove(live.pop(rng.randrange(len(live))))
+            else:
+                live.append(" ".join(rng.sample(words, 2)))
+                index.add(live[-1])
+            for prefix in ("j", "ja", "p", "py", "d", "de"):
+                self.assertEqual(index.search(prefix, 3), index.scan(prefix, 3))
+        built = PrefixIndex.build(live, top_k=3, depth=2)
+        for prefix in ("j", "ja", "p", "py", "d", "jav"):
+            self.assertEqual(built.search(prefix, 3), index.search(prefix, 3))
+
+    def test_heavier_values_first_then_alphabetical(self):
+        titles = [f"Backend developer {number}" for number in (7, 14, 0)]
+        index = PrefixIndex(top_k=5, depth=3)
+        for title in titles:
+            index.add(title)
+        index.add("Backend lead", weight=2)
+        expected = ["Backend lead", "Backend developer 0", "Backend developer 14", "Backend developer 7"]
+        # Node list, range scan and bulk build agree
+        self.assertEqual(index.search("bac"), expected)
+        self.assertEqual(index.search("backend"), expected)
+        self.assertEqual(PrefixIndex.build([*titles, "Backend lead", "Backend lead"], top_k=5, depth=3).search("b"),
+                         expected)
+
+
+class VacancyAutocompleteTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        make_vacancy(self.employer)
+        vacancy_autocomplete.built_at = None
+
+    def test_stale_index_is_rebuilt_outside_the_request(self):
+        self.assertEqual(self.client.get("/api/vacancies/autocomplete/?q=py&field=title").json(),
+                         {"title": ["Python developer"]})
+        vacancy_autocomplete.built_at -= settings.AUTOCOMPLETE_REFRESH_SECONDS + 1
+        with mock.patch.object(vacancy_autocomplete, "rebuild") as rebuild, \
+                mock.patch("api.background.threading.Thread") as thread:
+            response = self.client.get("/api/vacancies/autocomplete/?q=dev&field=title")
+        self.assertEqual(response.json(), {"title": ["Python developer"]})
+        rebuild.assert_not_called()
+        thread.assert_called_once()
+        vacancy_autocomplete.rebuilding = False
+
+
+class TaskQueueTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.vacancy = make_vacancy(self.employer)
+        Task.objects.all().delete()
+
+    def test_expired_lock_is_redelivered_until_attempts_run_out(self):
+        task = tasks.enqueue("vacancy.increment_views", vacancy_id=self.vacancy.pk)
+        expired = timezone.now() - timedelta(seconds=1)
+        Task.objects.filter(pk=task.pk).update(status="running", attempts=1, locked_until=expired)
+        self.assertEqual([item.pk for item in tasks.claim(10)], [task.pk])
+        Task.objects.filter(pk=task.pk).update(attempts=task.max_attempts, locked_until=expired)
+        self.assertEqual(tasks.claim(10), [])
+        self.assertEqual(tasks.reap(), 1)
+        self.assertEqual(Task.objects.get(pk=task.pk).status, "failed")
+
+    def test_only_the_current_claim_finishes_a_task(self):
+        tasks.enqueue("vacancy.increment_views", vacancy_id=self.vacancy.pk)
+        stale = tasks.claim(10)
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        current = tasks.claim(10)
+        tasks.process(stale)
+        self.assertEqual(Task.objects.get().status, "running")
+        tasks.process(current)
+        self.assertEqual(Task.objects.get().status, "done")
+
+    @override_settings(TASK_RETENTION_HOURS=1)
+    def test_prune_deletes_old_done_tasks_only(self):
+        old = timezone.now() - timedelta(hours=2)
+        for status in ("done", "failed"):
+            Task.objects.create(name="vacancy.increment_views", status=status, finished_at=old)
+        Task.objects.create(name="vacancy.increment_views", status="done", finished_at=timezone.now())
+        self.assertEqual(tasks.prune(), 1)
+        self.assertEqual(sorted(Task.objects.values_list("status", flat=True)), ["done", "failed"])
+
+    @override_settings(VIEW_FLUSH_SECONDS=3600)
+    def test_detail_views_are_buffered(self):
+        tasks.view_buffer.__init__()
+        for _ in range(3):
+            self.client.get(f"/api/vacancies/{self.vacancy.pk}/")
+        self.assertEqual(self.queued("vacancy.increment_views"), [])
+        with self.settings(VIEW_FLUSH_SECONDS=0):
+            self.client.get(f"/api/vacancies/{self.vacancy.pk}/")
+        self.assertEqual(self.queued("vacancy.increment_views"), [{"vacancy_id": self.vacancy.pk, "views": 4}])
+        while claimed := tasks.claim(10):
+            tasks.process(claimed)
+        self.vacancy.refresh_from_db()
+        self.assertEqual(self.vacancy.views, 4)
+
+
+class ApplicationStreamTests(APITestBase):
+    def test_stream_needs_asgi(self):
+        self.login(self.seeker)
+        self.assertEqual(self.client.get("/api/applications/stream/").status_code, 501)
+
+    def test_tickets_are_single_use_and_tokens_stay_out_of_the_url(self):
+        self.login(self.seeker)
+        ticket = self.client.post("/api/applications/stream/ticket/").json()["ticket"]
+        factory = RequestFactory()
+        self.assertEqual(authenticate_stream(factory.get("/", {"ticket": ticket})), self.seeker)
+        with self.assertRaises(AuthenticationFailed):
+            authenticate_stream(factory.get("/", {"ticket": ticket}))
+        token = str(AccessToken.for_user(self.seeker))
+        self.assertIsNone(authenticate_stream(factory.get("/", {"token": token})))
+
+
+class EventHubTests(SimpleTestCase):
+    async def test_resumes_from_last_event_id(self):
+        hub = EventHub(history_size=10, queue_size=10)
+        first = hub.publish((1,), "application.status", {"id": 1})
+        hub.publish((2,), "application.status", {"id": 2})
+        third = hub.publish((1, 2), "application.status", {"id": 3})
+        subscriber, missed, resumable = hub.subscribe(1, first.id)
+        self.assertTrue(resumable)
+        self.assertEqual(missed, [third])
+        hub.unsubscribe(subscriber)
+
+        stream = event_stream(hub, 1, first.id)
+        self.assertTrue((await anext(stream)).startswith("retry: "))
+        self.assertEqual(await anext(stream), third.encode())
+        await stream.aclose()
+        self.assertEqual(dict(hub.subscribers), {})
+
+    async def test_unknown_or_expired_ids_get_a_reset(self):
+        hub = EventHub(history_size=2, queue_size=10)
+        first = hub.publish((1,), "application.status", {"id": 1})
+        for number in range(2, 5):
+            hub.publish((1,), "application.status", {"id": number})
+        for last_event_id in (first.id, f"{EventHub().epoch}:4", "garbage"):
+            subscriber, missed, resumable = hub.subscribe(1, last_event_id)
+            hub.unsubscribe(subscriber)
+            self.assertEqual((missed, resumable), ([], False))
+        stream = event_stream(hub, 1, first.id)
+        await anext(stream)
+        self.assertEqual(await anext(stream), "event: reset\ndata: {}\n\n")
+        await stream.aclose()
+
+    async def test_slow_consumer_is_disconnected(self):
+        hub = EventHub(history_size=10, queue_size=2)
+        stream = event_stream(hub, 1)
+        await anext(stream)
+        for number in range(3):
+            hub.publish((1,), "application.status", {"id": number})
+        # publish() hands events to the stream's loop with call_soon_threadsafe
+        await asyncio.sleep(0)
+        with self.assertRaises(StopAsyncIteration):
+            await asyncio.wait_for(anext(stream), 1)
+        self.assertEqual(dict(hub.subscribers), {})
+
+
+class AdminSearchTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.python = make_vacancy(self.employer, title="Python developer")
+        self.senior = make_vacancy(self.employer, title="Senior Python engineer")
+        self.model_admin = admin.site._registry[Vacancy]
+
+    def search(self, term):
+        queryset, _ = self.model_admin.get_search_results(None, Vacancy.objects.all(), term)
+        return set(queryset)
+
+    def test_search_returns_prefix_and_substring_matches(self):
+        self.assertEqual(self.search("python"), {self.python, self.senior})
+        self.assertEqual(self.search("engineer"), {self.senior})
+        self.assertEqual(self.search("employer"), {self.python, self.senior})
+
+    def test_caret_searches_title_prefixes_ignoring_case(self):
+        self.assertEqual(self.search("^pYTHON"), {self.python})
+        self.assertEqual(self.search("^engineer"), set())
+        self.assertIn("^", self.model_admin.search_help_text)
+
+    def test_changelist_search(self):
+        staff = CustomUser.objects.create_superuser(username="admin", password="x", email="admin@example.com")
+        self.client.force_login(staff)
+        response = self.client.get("/admin/api/vacancy/", {"q": "python"})
+        self.assertContains(response, "Senior Python engineer")
+        self.assertContains(response, "Python developer")
+
+
+class ResumeDownloadTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        os.makedirs(os.path.join(self.media.name, "resumes"))
+        with open(os.path.join(self.media.name, "resumes", "cv.pdf"), "wb") as handle:
+            handle.write(b"%PDF-1.4 resume")
+        override = self.settings(MEDIA_ROOT=self.media.name, PROTECTED_MEDIA_SERVER="")
+        override.enable()
+        self.addCleanup(override.disable)
+        self.resume = Resume.objects.create(user=self.seeker, full_name="Seeker", file="resumes/cv.pdf")
+        self.login(self.seeker)
+
+    def test_owner_gets_ranges(self):
+        response = self.client.get(f"/api/resumes/{self.resume.pk}/file/", HTTP_RANGE="bytes=0-3")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF")
+
+    def test_missing_file_is_not_found(self):
+        os.remove(os.path.join(self.media.name, "resumes", "cv.pdf"))
+        self.assertEqual(self.client.get(f"/api/resumes/{self.resume.pk}/file/").status_code, 404)
+
+    def test_other_users_are_refused(self):
+        self.login(self.employer)
+        self.assertEqual(self.client.get(f"/api/resumes/{self.resume.pk}/file/").status_code, 403)
+
+
+class DocxPreviewTests(SimpleTestCase):
+    def write_docx(self, directory, document):
+        path = os.path.join(directory, "cv.docx")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("word/document.xml", document)
+        return path
+
+    def test_opening_text_is_rendered(self):
+        with tempfile.TemporaryDirectory() as directory:
+            document = (
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                "<w:body><w:p><w:r><w:t>Seeker</w:t></w:r></w:p></w:body></w:document>"
+            )
+            self.assertIsNotNone(render_docx(self.write_docx(directory, document), 120))
+
+    def test_zip_bombs_are_not_decompressed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write_docx(directory, "<w:document>" + " " * 5_000_000 + "</w:document>")
+            with mock.patch("zipfile.ZipFile.read", side_effect=AssertionError("decompressed")):
+                self.assertIsNone(render_docx(path, 120))
+
+
+class ApplicationCreateTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.vacancy = make_vacancy(self.employer)
+        self.url = f"/api/vacancies/{self.vacancy.pk}/apply/"
+        self.login(self.seeker)
+
+    def test_second_application_is_refused(self):
+        self.assertEqual(self.client.post(self.url, {"cover_letter": "Hi"}, format="json").status_code, 201)
+        response = self.client.post(self.url, {"cover_letter": "Hi"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["detail"], "You have already applied for this vacancy")
+
+    def test_idempotent_retries_replay_and_reject_a_different_body(self):
+        first = self.client.post(self.url, {"cover_letter": "Hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        retry = self.client.post(self.url, {"cover_letter": "Hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        other = self.client.post(self.url, {"cover_letter": "Bye"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(other.status_code, 422)
+        self.assertEqual(Application.objects.count(), 1)
+
+    @override_settings(VACANCY_DOCUMENTS_ENABLED=True)
+    def test_submission_query_count(self):
+        Resume.objects.create(user=self.seeker, full_name="Seeker", file="resumes/cv.pdf")
+        Task.objects.all().delete()
+        # Vacancy and resume lookup, then savepoint, INSERT, counter UPDATE and release
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(5):
+            self.assertEqual(self.client.post(self.url, {"cover_letter": "Hi"}, format="json").status_code, 201)
+        # After commit: the document render task and the hourly activity bucket
+        with self.assertNumQueries(5):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(self.queued("vacancy.render_documents"), [{"vacancy_id": self.vacancy.pk}])
+        self.assertEqual(VacancyActivity.objects.get(vacancy=self.vacancy).applications, 1)
+
+
+class ProfileCacheTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.login(self.employer)
+
+    @override_settings(PROFILE_CACHE_ENABLED=True)
+    def test_cached_until_a_write_invalidates(self):
+        self.assertEqual(self.client.get("/api/my-account/")["X-Cache"], "miss")
+        self.assertEqual(self.client.get("/api/my-account/")["X-Cache"], "hit")
+        with self.captureOnCommitCallbacks(execute=True):
+            make_vacancy(self.employer)
+        self.assertEqual(self.client.get("/api/my-account/")["X-Cache"], "miss")
+
+    @override_settings(PROFILE_CACHE_ENABLED=False)
+    def test_disabled_cache_always_builds(self):
+        self.client.get("/api/my-account/")
+        self.assertEqual(self.client.get("/api/my-account/")["X-Cache"], "miss")
+
+
+class ThrottleTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = self.settings(
+            THROTTLE_RATES={"anon": "1/min"}, THROTTLE_SHARED_FILE=os.path.join(directory.name, "buckets.bin")
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(setattr, throttling, "_buckets", None)
+        throttling._buckets = None
+
+    def test_forwarded_for_does_not_reset_the_anonymous_bucket(self):
+        self.assertEqual(self.client.get("/api/vacancies/trending/").status_code, 200)
+        response = self.client.get("/api/vacancies/trending/", HTTP_X_FORWARDED_FOR="203.0.113.7")
+        self.assertEqual(response.status_code, 429)
+
+    def test_bucket_file_must_be_a_private_regular_file(self):
+        path = settings.THROTTLE_SHARED_FILE
+        target = path + ".target"
+        open(target, "wb").close()
+        os.chmod(target, 0o600)
+        os.symlink(target, path)
+        with self.assertRaises(OSError):
+            throttling.TokenBuckets(path, 64).open()
+        os.remove(path)
+        with open(path, "wb") as handle:
+            handle.write(b"planted")
+        os.chmod(path, 0o644)
+        with self.assertRaises(PermissionError):
+            throttling.TokenBuckets(path, 64).open()
+
+    def test_file_of_another_size_is_reset(self):
+        path = settings.THROTTLE_SHARED_FILE
+        with open(path, "wb") as handle:
+            handle.write(b"TBKT" + b"\xff" * 100)
+        os.chmod(path, 0o600)
+        buckets = throttling.TokenBuckets(path, 64)
+        self.assertEqual(buckets.consume("key", 1, 60), 0)
+        self.assertEqual(os.path.getsize(path), buckets.size)
+        self.assertGreater(buckets.consume("key", 1, 60), 0)
+
+
+VACANCY_PAYLOAD = {
+    "title": "Senior Python developer",
+    "location": "Dushanbe",
+    "description": "Design, build and operate the public job board API and its background workers",
+    "requirements": "Five years of Python, Django REST framework, PostgreSQL and production on-call experience",
+    "employment_type": "full_time",
+    "work_format": "remote",
+}
+
+
+class VacancyDuplicateTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.login(self.employer)
+        vacancy_duplicates.built_at = None
+
+    def test_repost_is_flagged(self):
+        self.client.post("/api/vacancies/", VACANCY_PAYLOAD, format="json")
+        original = Vacancy.objects.get()
+        repost = self.client.post("/api/vacancies/", VACANCY_PAYLOAD, format="json")
+        self.assertEqual(repost.status_code, 201)
+        self.assertEqual(repost["X-Duplicate-Of"], str(original.pk))
+        self.assertEqual(Vacancy.objects.exclude(pk=original.pk).get().duplicate_of, original)
+
+    def test_posts_missing_from_the_index_are_still_found(self):
+        self.client.post("/api/vacancies/", VACANCY_PAYLOAD, format="json")
+        original = Vacancy.objects.get().pk
+        # As if another process saved it after this process built its index
+        vacancy_duplicates.discard(original)
+        repost = self.client.post("/api/vacancies/", VACANCY_PAYLOAD, format="json")
+        self.assertEqual(repost["X-Duplicate-Of"], str(original))
+
+    def test_stale_index_is_rebuilt_outside_the_request(self):
+        vacancy_duplicates.rebuild()
+        vacancy_duplicates.built_at -= settings.DEDUPE_REFRESH_SECONDS + 1
+        with mock.patch.object(vacancy_duplicates, "rebuild") as rebuild, \
+                mock.patch("api.background.threading.Thread") as thread:
+            self.client.post("/api/vacancies/", VACANCY_PAYLOAD, format="json")
+        rebuild.assert_not_called()
+        thread.assert_called_once()
+        vacancy_duplicates.rebuilding = False
+
+
+class VacancyIndexCommitTests(APITestBase):
+    def test_rolled_back_saves_leave_no_index_entries(self):
+        make_vacancy(self.employer)
+        vacancy_autocomplete.built_at = vacancy_duplicates.built_at = None
+        vacancy_autocomplete.ensure_built()
+        vacancy_duplicates.ensure_built()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                ghosts = [
+                    Vacancy(author=self.employer, title="Rust developer", location="Khujand", description="x",
+                            employment_type="full_time", work_format="remote", minhash=signature("Rust", "x", ""))
+                ]
+                send_batch_saved(Vacancy, Vacancy.objects.bulk_create(ghosts), created=True)
+                make_vacancy(self.employer, title="Rust engineer", minhash=signature("Rust engineer", "x", ""))
+                raise RuntimeError
+            make_vacancy(self.employer, title="Kotlin developer")
+        self.assertEqual(vacancy_autocomplete.suggest("r", fields=["title"]), {"title": []})
+        self.assertEqual(vacancy_autocomplete.suggest("k", fields=["title"]), {"title": ["Kotlin developer"]})
+        self.assertEqual(vacancy_duplicates.index.candidates(signature("Rust", "x", ""), self.employer.pk), set())
+
+
+class VacancyBatchCreateTests(APITestBase):
+    url = "/api/vacancies/batch/"
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.employer)
+        vacancy_duplicates.built_at = None
+        Task.objects.all().delete()
+
+    def item(self, number, **fields):
+        return {
+            **VACANCY_PAYLOAD,
+            "title": f"Vacancy {number}",
+            "description": f"Unrelated posting number {number} about {'abcdefghij'[number]} things",
+            "requirements": f"Requirement set {number}",
+            **fields,
+        }
+
+    def test_all_created(self):
+        response = self.client.post(self.url, [self.item(1), self.item(2)], format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result["status"] for result in response.json()["results"]], ["created", "created"])
+        ids = {result["id"] for result in response.json()["results"]}
+        self.assertEqual(set(Vacancy.objects.values_list("pk", flat=True)), ids)
+        # One payload per vacancy, queued by the batch receivers rather than per-row post_save
+        self.assertEqual({payload["vacancy_id"] for payload in self.queued("saved_search.percolate")}, ids)
+
+    def test_partial_success_is_multi_status(self):
+        response = self.client.post(self.url, [self.item(1), self.item(2, title="")], format="json")
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual([result["status"] for result in results], ["created", "invalid"])
+        self.assertIn("title", results[1]["errors"])
+
+    def test_nothing_valid_is_bad_request(self):
+        response = self.client.post(self.url, [self.item(1, title="")], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Vacancy.objects.exists())
+
+    @override_settings(VACANCY_BATCH_MAX_SIZE=2)
+    def test_batch_size_is_capped(self):
+        response = self.client.post(self.url, [self.item(1), self.item(2), self.item(3)], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Vacancy.objects.exists())
+
+    def test_duplicates_within_the_batch_are_refused(self):
+        response = self.client.post(self.url, [VACANCY_PAYLOAD, VACANCY_PAYLOAD], format="json")
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual(results[1]["errors"], {"non_field_errors": ["Near-duplicate of item 0 in this batch"]})
+        self.assertEqual(Vacancy.objects.count(), 1)
+
+    @override_settings(DEDUPE_ACTION="merge")
+    def test_reposts_merge_into_their_originals(self):
+        self.client.post("/api/vacancies/", {**VACANCY_PAYLOAD, "location": "Khujand"}, format="json")
+        original = Vacancy.objects.get()
+        response = self.client.post(self.url, [VACANCY_PAYLOAD, self.item(1)], format="json")
+        self.assertEqual(response.json()["results"][0], {"index": 0, "status": "merged", "id": original.pk})
+        original.refresh_from_db()
+        self.assertEqual(original.location, "Dushanbe")
+        self.assertEqual(Vacancy.objects.count(), 2)
+
+
+class SavedSearchPercolationTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.search = SavedSearch.objects.create(user=self.seeker, title="python", location="Dushanbe")
+        Task.objects.all().delete()
+
+    def percolate(self):
+        match_vacancies({payload["vacancy_id"] for payload in self.queued("saved_search.percolate")})
+
+    def test_new_vacancy_lands_in_the_inbox(self):
+        vacancy = make_vacancy(self.employer)
+        make_vacancy(self.employer, title="Accountant")
+        self.percolate()
+        self.assertEqual(list(SavedSearchMatch.objects.values_list("vacancy_id", flat=True)), [vacancy.pk])
+        self.login(self.seeker)
+        inbox = self.client.get("/api/saved-searches/inbox/").json()
+        self.assertEqual(len(inbox["results"] if isinstance(inbox, dict) else inbox), 1)
+
+    def test_reactivated_and_unflagged_vacancies_are_matched(self):
+        inactive = make_vacancy(self.employer, is_active=False)
+        original = make_vacancy(self.employer, title="Senior python engineer")
+        repost = make_vacancy(self.employer, duplicate_of=original)
+        Task.objects.all().delete()
+        SavedSearchMatch.objects.all().delete()
+        inactive.is_active = True
+        inactive.save()
+        repost.duplicate_of = None
+        repost.save(update_fields=["duplicate_of"])
+        self.assertEqual(
+            {payload["vacancy_id"] for payload in self.queued("saved_search.percolate")}, {inactive.pk, repost.pk}
+        )
+        # Saving a vacancy that was already listed doesn't match it again
+        Task.objects.all().delete()
+        original.title = "Lead python engineer"
+        original.save()
+        self.assertEqual(self.queued("saved_search.percolate"), [])
+
+    def test_cleared_flags_from_the_dedupe_command_are_matched(self):
+        repost = make_vacancy(self.employer, duplicate_of=make_vacancy(self.employer, title="Chef"))
+        rows = Vacancy.objects.values_list("pk", *TEXT_FIELDS)
+        DedupeCommand().store(signatures(rows))
+        Task.objects.all().delete()
+        with mock.patch.object(DedupeCommand, "compute_signatures", return_value=0):
+            call_command("dedupe_vacancies", stdout=io.StringIO())
+        self.assertIn({"vacancy_id": repost.pk}, self.queued("saved_search.percolate"))
+
+
+class ExpireVacanciesTests(APITestBase):
+    def test_expires_then_archives_with_applications(self):
+        long_ago = timezone.now() - timedelta(days=400)
+        fresh = make_vacancy(self.employer)
+        expired = make_vacancy(self.employer, title="Old posting")
+        stale = make_vacancy(self.employer, title="Closed posting", is_active=False)
+        resume = Resume.objects.create(user=self.seeker, full_name="Seeker", file="resumes/cv.pdf")
+        application = Application.objects.create(applicant=self.seeker, vacancy=stale, resume=resume)
+        Vacancy.objects.filter(pk=expired.pk).update(created_at=long_ago)
+        Vacancy.objects.filter(pk=stale.pk).update(created_at=long_ago, updated_at=long_ago)
+
+        call_command("expire_vacancies", stdout=io.StringIO())
+
+        self.assertEqual(set(Vacancy.objects.filter(is_active=True).values_list("pk", flat=True)), {fresh.pk})
+        self.assertFalse(Vacancy.objects.get(pk=expired.pk).is_active)
+        # Just deactivated, so it stays hot until the archive age passes
+        self.assertFalse(ArchivedVacancy.objects.filter(original_id=expired.pk).exists())
+        archived = ArchivedVacancy.objects.get(original_id=stale.pk)
+        self.assertEqual(archived.title, "Closed posting")
+        self.assertEqual(archived.applications.get().original_id, application.pk)
+        self.assertFalse(Vacancy.objects.filter(pk=stale.pk).exists())
+        self.assertFalse(Application.objects.exists())
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_matches_drf_output(self):
+        data = {
+            "title": "Разработчик\u2028\u2029☕",
+            "salary": Decimal("1500.50"),
+            "created_at": timezone.now(),
+            "day": date(2024, 5, 1),
+            "token": uuid.uuid4(),
+            "tags": ["a", None, True, 1.5],
+            7: "non-string key",
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(render_json([data]), JSONRenderer().render([data]))
+
+    def test_floats_orjson_formats_differently(self):
+        for value in (1e16, 1e-5, 1.5e300, -2.5e-10, 0.1, 123456789.125):
+            data = {"value": value, "nested": [{"value": value}]}
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        # DRF's encoder turns Decimal values into floats
+        data = {"salary": Decimal("1E+16"), "rate": Decimal("0.5")}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_non_finite_floats_raise_under_strict_json(self):
+        for value in (float("nan"), float("inf"), -float("inf")):
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({"value": [value]})
+
+
+class SparseFieldsetTests(APITestBase):
+    def test_parse_fieldset(self):
+        self.assertEqual(
+            parse_fieldset("id, vacancy.title,vacancy.location,,status"),
+            {"id": None, "vacancy": {"title": None, "location": None}, "status": None},
+        )
+        # A whole relation wins over its subfields
+        self.assertEqual(parse_fieldset("vacancy,vacancy.title"), {"vacancy": None})
+
+    def test_list_loads_only_requested_columns(self):
+        make_vacancy(self.employer)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/vacancies/?fields=id,title")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()[0]), {"id", "title"})
+        select = next(query["sql"] for query in queries if '"api_vacancy"."title"' in query["sql"])
+        self.assertNotIn('"api_vacancy"."description"', select)
+
+    def test_nested_fields_and_exclude(self):
+        vacancy = make_vacancy(self.employer)
+        resume = Resume.objects.create(user=self.seeker, full_name="Seeker", file="resumes/cv.pdf")
+        Application.objects.create(applicant=self.seeker, vacancy=vacancy, resume=resume)
+        self.login(self.seeker)
+        item = self.client.get("/api/applications/?fields=id,vacancy.title").json()
+        item = (item["results"] if isinstance(item, dict) else item)[0]
+        self.assertEqual(item["vacancy"], {"title": "Python developer"})
+        self.assertEqual(set(item), {"id", "vacancy"})
+        detail = self.client.get(f"/api/vacancies/{vacancy.pk}/?exclude=description").json()
+        self.assertNotIn("description", detail)
+        self.assertEqual(detail["title"], "Python developer")
+
+
+class DeltaSyncTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.login(self.seeker)
+        self.first, self.second = make_vacancy(self.employer), make_vacancy(self.employer, title="Tester")
+
+    def test_favorites_since_token(self):
+        FavoriteVacancy.objects.create(user=self.seeker, vacancy=self.first)
+        full = self.client.get("/api/favorites/?since=0").json()
+        self.assertEqual(len(full["results"]), 1)
+        self.assertEqual(full["deleted"], [])
+
+        # Rows stay visible for the token margin so concurrent commits aren't missed
+        with override_settings(SYNC_TOKEN_MARGIN_SECONDS=0):
+            token = self.client.get("/api/favorites/?since=0").json()["since"]
+        removed = FavoriteVacancy.objects.get().pk
+        FavoriteVacancy.objects.get().delete()
+        FavoriteVacancy.objects.create(user=self.seeker, vacancy=self.second)
+        delta = self.client.get(f"/api/favorites/?since={token}").json()
+        self.assertEqual(len(delta["results"]), 1)
+        self.assertEqual(delta["deleted"], [removed])
+
+    def test_invalid_and_expired_tokens(self):
+        self.assertEqual(self.client.get("/api/applications/?since=soon").status_code, 400)
+        expired = make_token(timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1))
+        self.assertEqual(self.client.get(f"/api/applications/?since={expired}").status_code, 410)
+        self.assertEqual(self.client.get("/api/applications/?since=0").status_code, 200)
+
+
+class OpenAPIArtifactTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "openapi.json"
+        self.enterContext(override_settings(OPENAPI_SCHEMA_PATH=self.path))
+        self.enterContext(mock.patch.object(openapi, "_artifact", None))
+
+    def test_serves_the_artifact_with_etag_and_gzip(self):
+        openapi.write_artifact(b'{"swagger": "2.0"}')
+        response = self.client.get("/docs/openapi.json")
+        self.assertEqual(response.content, b'{"swagger": "2.0"}')
+        etag = response["ETag"]
+        response = self.client.get("/docs/openapi.json", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), b'{"swagger": "2.0"}')
+        self.assertEqual(self.client.get("/docs/openapi.json", headers={"If-None-Match": etag}).status_code, 304)
+
+    def test_generate_command_writes_the_artifact(self):
+        call_command("generate_openapi", stdout=io.StringIO())
+        schema = json.loads(self.path.read_bytes())
+        self.assertIn("/api/vacancies/", schema["paths"])
+        self.assertEqual(gzip.decompress(self.path.with_name("openapi.json.gz").read_bytes()), self.path.read_bytes())
+
+
+class RouteProfilerTests(APITestBase):
+    def test_pstats_mode_merges_requests_per_route(self):
+        profiler = RouteProfiler(mode="pstats")
+        for _ in range(2):
+            profiler.stop("api/vacancies/", profiler.start("api/vacancies/"))
+        self.assertEqual(profiler.summary()["routes"]["api/vacancies/"]["requests"], 2)
+        self.assertIsInstance(marshal.loads(profiler.pstats_dump("api/vacancies/")), dict)
+
+    def test_stack_mode_samples_the_serving_thread(self):
+        profiler = RouteProfiler(mode="stack", interval=0.001)
+        handle = profiler.start("api/vacancies/")
+        deadline = time.monotonic() + 5
+        while not profiler.stacks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        profiler.stop("api/vacancies/", handle)
+        self.assertIn("test_stack_mode_samples_the_serving_thread", profiler.collapsed())
+
+    @override_settings(PROFILER_ENABLED=True, PROFILER_SAMPLE_RATE=0, PROFILER_ROUTE_RATES={})
+    def test_staff_can_force_a_profile(self):
+        staff = CustomUser.objects.create_user(username="admin", password="x", is_staff=True)
+        self.enterContext(mock.patch.object(route_profiler, "mode", "pstats"))
+        self.addCleanup(route_profiler.reset)
+        client = APIClient()
+        self.assertNotIn("X-Profiled", client.get("/api/vacancies/", headers={"X-Profile": "1"}))
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(staff)}")
+        self.assertEqual(client.get("/api/vacancies/", headers={"X-Profile": "1"})["X-Profiled"], "api/vacancies/")
+        summary = client.get("/api/profiling/").json()
+        self.assertEqual(summary["routes"]["api/vacancies/"]["requests"], 1)
+
+
+class SlowQueryLogTests(APITestBase):
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE a = 'it''s' AND b IN (%s, %s,%s) AND c > 10"),
+            "SELECT * FROM t WHERE a = ? AND b IN (...) AND c > ?",
+        )
+
+    def test_plan_warnings(self):
+        plan = ["SCAN api_vacancy", "SEARCH api_task USING INDEX x (status=?)", "USE TEMP B-TREE FOR ORDER BY"]
+        self.assertEqual(plan_warnings(plan), ["full scan: api_vacancy", "use temp b-tree for order by"])
+
+    @override_settings(QUERYLOG_THRESHOLD_MS=0, QUERYLOG_EXPLAIN=True)
+    def test_groups_shapes_and_explains_once(self):
+        log = SlowQueryLog(buffer_size=10, max_shapes=10)
+        make_vacancy(self.employer)
+        with log.capture():
+            for title in ("Python developer", "Tester"):
+                list(Vacancy.objects.filter(description__contains=title))
+        shape = next(entry for entry in log.report()["shapes"] if "description" in entry["shape"])
+        self.assertEqual(shape["count"], 2)
+        self.assertTrue(shape["plan"])
+        self.assertIn("full scan: api_vacancy", shape["warnings"])
+
+
+class TrendingTests(APITestBase):
+    def test_hourly_ring_forgets_hours_outside_the_window(self):
+        ring = HourlyRing(3)
+        ring.add(10, "views", 3)
+        ring.add(11, "favorites", 1)
+        self.assertEqual(ring.totals(11), {"views": 3, "favorites": 1, "applications": 0})
+        # Hour 13 reuses hour 10's slot
+        ring.add(13, "applications", 2)
+        self.assertEqual(ring.totals(13), {"views": 0, "favorites": 1, "applications": 2})
+        self.assertEqual(ring.totals(20), {"views": 0, "favorites": 0, "applications": 0})
+
+    def test_recent_activity_outranks_decayed_activity(self):
+        older, newer, closed = (make_vacancy(self.employer, title=title) for title in ("Older", "Newer", "Closed"))
+        Vacancy.objects.filter(pk=closed.pk).update(is_active=False)
+        VacancyActivity.objects.all().delete()
+        # 50 views 30 hours ago are worth about 9 now with a 12 hour half-life
+        VacancyActivity.record(older.pk, at=timezone.now() - timedelta(hours=30), views=50)
+        VacancyActivity.record(newer.pk, views=10)
+        VacancyActivity.record(closed.pk, views=100)
+        board = TrendingBoard()
+        self.assertEqual([vacancy_id for vacancy_id, _, _ in board.leaderboard()], [closed.pk, newer.pk, older.pk])
+
+        with mock.patch("api.views.trending_vacancies", board):
+            results = self.client.get("/api/vacancies/trending/").json()
+            self.assertEqual([item["title"] for item in results], ["Newer", "Older"])
+            self.assertEqual(results[1]["trending"]["views"], 50)
+            # Events move the board before the next rebuild
+            board.record(older.pk, "applications")
+            results = self.client.get("/api/vacancies/trending/").json()
+            self.assertEqual([item["title"] for item in results], ["Older", "Newer"])
+
+    def test_stale_board_is_rebuilt_outside_the_request(self):
+        vacancy = make_vacancy(self.employer)
+        repost = make_vacancy(self.employer, duplicate_of=vacancy)
+        VacancyActivity.record(vacancy.pk, views=3)
+        VacancyActivity.record(repost.pk, views=5)
+        board = TrendingBoard()
+        with mock.patch("api.views.trending_vacancies", board):
+            # Flagged reposts stay off the board like they stay off the list
+            self.assertEqual([item["id"] for item in self.client.get("/api/vacancies/trending/").json()], [vacancy.pk])
+            board.built_at -= settings.TRENDING_REFRESH_SECONDS + 1
+            with mock.patch.object(board, "rebuild") as rebuild, \
+                    mock.patch("api.background.threading.Thread") as thread:
+                response = self.client.get("/api/vacancies/trending/")
+        self.assertEqual(len(response.json()), 1)
+        rebuild.assert_not_called()
+        thread.assert_called_once()
+
+
+class SQLiteProfileTests(SimpleTestCase):
+    # The connection under test is opened on a scratch file, not the test database
+    databases = {"default"}
+
+    def test_production_profile_applies_pragmas_on_connect(self):
+        with mock.patch.dict(os.environ, {"DB_PROFILE": "production"}):
+            profile = runpy.run_path(str(settings.BASE_DIR / "server" / "settings.py"))
+        database = profile["DATABASES"]["default"]
+        self.assertEqual(database["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+        self.assertGreater(database["CONN_MAX_AGE"], 0)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        handler = ConnectionHandler({"default": {**database, "NAME": Path(directory.name) / "db.sqlite3"}})
+        self.addCleanup(handler.close_all)
+        with handler["default"].cursor() as cursor:
+            values = {}
+            for pragma in ("journal_mode", "synchronous", "foreign_keys", "temp_store"):
+                cursor.execute(f"PRAGMA {pragma}")
+                values[pragma] = cursor.fetchone()[0]
+        # synchronous NORMAL is 1, temp_store MEMORY is 2
+        self.assertEqual(values, {"journal_mode": "wal", "synchronous": 1, "foreign_keys": 1, "temp_store": 2})
+
+
+class LoadTestHelperTests(SimpleTestCase):
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("browse=3, apply"), {"browse": 3.0, "apply": 1.0})
+        with self.assertRaises(CommandError):
+            parse_mix("browse,scrape=2")
+
+    def test_only_successful_responses_are_timed(self):
+        stats = LoadStats(inspect_bodies=True)
+        stats.record("vacancy list", 200, 0.010)
+        stats.record("vacancy list", 429, 0.001)
+        stats.record("apply", 500, 0.002, b"OperationalError: database is locked")
+        self.assertEqual(stats.latencies["vacancy list"], [10.0])
+        self.assertEqual(stats.statuses["vacancy list"], {200: 1, 429: 1})
+        self.assertEqual(stats.locked, 1)
+        self.assertEqual(percentile([1, 2, 3, 4], 0.5), 3)
+
+
+class ServeTests(APITestBase):
+    def test_warm_up_builds_the_indexes(self):
+        make_vacancy(self.employer)
+        for index in (vacancy_autocomplete, vacancy_duplicates, trending_vacancies):
+            self.enterContext(mock.patch.object(index, "built_at", None))
+        warm_up()
+        for index in (vacancy_autocomplete, vacancy_duplicates, trending_vacancies):
+            self.assertIsNotNone(index.built_at)
+
+    def test_idle_client_timeouts_are_not_reported(self):
+        server = mock.Mock(spec=WorkerServer)
+        with mock.patch("socketserver.BaseServer.handle_error") as report:
+            try:
+                raise TimeoutError
+            except TimeoutError:
+                WorkerServer.handle_error(server, None, ("127.0.0.1", 1))
+            report.assert_not_called()
+            try:
+                raise ValueError
+            except ValueError:
+                WorkerServer.handle_error(server, None, ("127.0.0.1", 1))
+            report.assert_called_once()
@@ -0,0 +1,177 @@
+import hashlib
+import mmap
+import os
+import stat
+import struct
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialised
+    fcntl = None
+
+
+HEADER = struct.Struct("<4sII")
+MAGIC = b"TBKT"
+VERSION = 1
+# key hash, tokens left, time of the last update
+SLOT = struct.Struct("<Qdd")
+SHARD_SLOTS = 64
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """'100/min' -> (100, 60); None means unlimited"""
+    if not rate:
+        return None
+    count, _, period = rate.partition("/")
+    return int(count), PERIODS[period.strip()[0]]
+
+
+def key_hash(key):
+    # 0 marks an empty slot
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+
+class TokenBuckets:
+    """Fixed-size table of token buckets in a memory-mapped file shared by all workers
+
+    Keys hash to a shard of SHARD_SLOTS slots; a shard is locked with a
+    threading lock plus an fcntl byte-range lock on its part of the file, so
+    workers only contend on the same shard. A new key takes a free slot in its
+    shard, or the one updated longest ago.
+    """
+
+    def __init__(self, path, slots):
+        self.slots = max(SHARD_SLOTS, slots - slots % SHARD_SLOTS)
+        self.path = path
+        self.size = HEADER.size + self.slots * SLOT.size
+        self.thread_locks = [threading.Lock() for _ in range(self.slots // SHARD_SLOTS)]
+        self.fd = None
+        self.map = None
+        self.open_lock = threading.Lock()
+
+    def open(self):
+        with self.open_lock:
+            if self.map is not None:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", mode=0o700, exist_ok=True)
+            # A symlink or someone else's file planted at the path is refused
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+            try:
+                self.check_owner(os.fstat(fd))
+            except OSError:
+                os.close(fd)
+                raise
+            if fcntl:
+                fcntl.lockf(fd, fcntl.LOCK_EX, HEADER.size, 0)
+            try:
+                header = os.pread(fd, HEADER.size, 0)
+                if (
+                    os.fstat(fd).st_size != self.size or len(header) != HEADER.size
+                    or HEADER.unpack(header) != (MAGIC, VERSION, self.slots)
+                ):
+                    # New file, or a different size or layout: start from empty buckets. The
+                    # default file name includes the slot count, so a resize never
+                    # truncates a table that running workers still have mapped.
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self.size)
+                    os.pwrite(fd, HEADER.pack(MAGIC, VERSION, self.slots), 0)
+            finally:
+                if fcntl:
+                    fcntl.lockf(fd, fcntl.LOCK_UN, HEADER.size, 0)
+            self.map = mmap.mmap(fd, self.size)
+            self.fd = fd
+
+    def check_owner(self, info):
+        if not stat.S_ISREG(info.st_mode):
+            raise PermissionError(f"Throttle bucket file {self.path} is not a regular file")
+        if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+            raise PermissionError(f"Throttle bucket file {self.path} must belong to this user with mode 0600")
+
+    def consume(self, key, capacity, period):
+        """Take a token from `key`'s bucket; returns 0 when allowed, else seconds until a token is available"""
+        if self.map is None:
+            self.open()
+        digest = key_hash(key)
+        start = digest % self.slots
+        shard = start // SHARD_SLOTS
+        shard_offset = HEADER.size + shard * SHARD_SLOTS * SLOT.size
+        refill = capacity / period
+        now = time.time()
+        with self.thread_locks[shard]:
+            if fcntl:
+                fcntl.lockf(self.fd, fcntl.LOCK_EX, SHARD_SLOTS * SLOT.size, shard_offset)
+            try:
+                offset, tokens = self.find(digest, start, shard_offset, capacity, refill, now)
+                tokens -= 1
+                allowed = tokens >= 0
+                SLOT.pack_into(self.map, offset, digest, tokens if allowed else tokens + 1, now)
+            finally:
+                if fcntl:
+                    fcntl.lockf(self.fd, fcntl.LOCK_UN, SHARD_SLOTS * SLOT.size, shard_offset)
+        return 0 if allowed else -tokens / refill
+
+    def find(self, digest, start, shard_offset, capacity, refill, now):
+        """Offset of `digest`'s slot and its refilled token count"""
+        oldest_offset, oldest_stamp = None, None
+        first = start % SHARD_SLOTS
+        for step in range(SHARD_SLOTS):
+            offset = shard_offset + ((first + step) % SHARD_SLOTS) * SLOT.size
+            slot_key, tokens, stamp = SLOT.unpack_from(self.map, offset)
+            if slot_key == digest:
+                # Clock steps backwards count as no time passed
+                elapsed = max(now - stamp, 0)
+                return offset, min(capacity, tokens + elapsed * refill)
+            if slot_key == 0:
+                return offset, capacity
+            if oldest_stamp is None or stamp < oldest_stamp:
+                oldest_offset, oldest_stamp = offset, stamp
+        return oldest_offset, capacity
+
+
+_buckets = None
+
+
+def get_buckets():
+    global _buckets
+    if _buckets is None:
+        _buckets = TokenBuckets(str(settings.THROTTLE_SHARED_FILE), settings.THROTTLE_SLOTS)
+    return _buckets
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Per-client token buckets with rates by role, overridable per url name
+
+    The role is "anon", "staff" or the user's role. A route listed in
+    THROTTLE_ROUTE_RATES for the caller's role gets its own bucket; every
+    other request draws from the client's bucket for THROTTLE_RATES.
+    Anonymous clients are keyed by get_ident(), which honours NUM_PROXIES.
+    """
+
+    def allow_request(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            role, ident = "anon", f"ip:{self.get_ident(request)}"
+        else:
+            role, ident = ("staff" if user.is_staff else user.role), f"user:{user.pk}"
+
+        route = getattr(request.resolver_match, "url_name", None)
+        route_rates = settings.THROTTLE_ROUTE_RATES.get(route, {})
+        if role in route_rates:
+            scope, rate = route, route_rates[role]
+        else:
+            scope, rate = "*", settings.THROTTLE_RATES.get(role)
+        parsed = parse_rate(rate)
+        if parsed is None:
+            self.delay = 0
+            return True
+        self.delay = get_buckets().consume(f"{scope}|{ident}", *parsed)
+        return self.delay == 0
+
+    def wait(self):
+        return self.delay
@@ -0,0 +1,135 @@
+import math
+import threading
+import time
+from array import array
+from datetime import timedelta
+from heapq import nlargest
+
+from django.conf import settings
+from django.utils import timezone
+
+from .background import BackgroundRebuild
+from .models import VacancyActivity
+
+
+KINDS = ("views", "favorites", "applications")
+
+
+class HourlyRing:
+    """Per-kind event counts for the last `hours` hours in fixed-size arrays"""
+
+    __slots__ = ("stamps", "counts")
+
+    def __init__(self, hours):
+        self.stamps = array("q", [-1]) * hours
+        self.counts = array("I", [0]) * (hours * len(KINDS))
+
+    def add(self, hour, kind, count):
+        slot = hour % len(self.stamps)
+        if self.stamps[slot] != hour:
+            # The slot still holds an hour that fell out of the window
+            self.stamps[slot] = hour
+            for index in range(len(KINDS)):
+                self.counts[slot * len(KINDS) + index] = 0
+        self.counts[slot * len(KINDS) + KINDS.index(kind)] += count
+
+    def totals(self, hour):
+        oldest = hour - len(self.stamps)
+        result = dict.fromkeys(KINDS, 0)
+        for slot, stamp in enumerate(self.stamps):
+            if stamp > oldest:
+                for index, kind in enumerate(KINDS):
+                    result[kind] += self.counts[slot * len(KINDS) + index]
+        return result
+
+
+class TrendingBoard(BackgroundRebuild):
+    """Top-K vacancies by exponentially decayed activity, kept in memory
+
+    Uses forward decay: an event of weight w at time t adds w * e^(λ(t - L))
+    for a fixed landmark L, and the decayed score is that sum times
+    e^(-λ(now - L)). The factor is the same for every vacancy, so time alone
+    never reorders the board and an event only has to re-place its own vacancy.
+    The board is rebuilt in the background from the hourly VacancyActivity
+    rows after TRENDING_REFRESH_SECONDS, which picks up other processes'
+    activity and moves the landmark forward.
+    """
+
+    refresh_setting = "TRENDING_REFRESH_SECONDS"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.rate = math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+        self.landmark = time.time()
+        self.scores = {}
+        self.rings = {}
+        self.top = []
+
+    def rebuild(self):
+        now = timezone.now()
+        landmark = now.timestamp()
+        window = settings.TRENDING_WINDOW_HOURS
+        scores, rings = {}, {}
+        rows = VacancyActivity.objects.filter(hour__gt=now - timedelta(hours=window)).values_list(
+            "vacancy_id", "hour", *KINDS
+        )
+        for vacancy_id, hour, *counts in rows.iterator():
+            moment = hour.timestamp() + 1800
+            ring = rings.get(vacancy_id)
+            if ring is None:
+                ring = rings[vacancy_id] = HourlyRing(window)
+            weight = math.exp(self.rate * (moment - landmark))
+            for kind, count in zip(KINDS, counts):
+                if count:
+                    ring.add(int(moment // 3600), kind, count)
+                    scores[vacancy_id] = scores.get(vacancy_id, 0.0) + settings.TRENDING_WEIGHTS[kind] * count * weight
+        top = nlargest(settings.TRENDING_TOP_K, scores, key=scores.get)
+        with self.lock:
+            self.landmark, self.scores, self.rings, self.top = landmark, scores, rings, top
+            self.built_at = time.monotonic()
+
+    def record(self, vacancy_id, kind, count=1):
+        """Count an event in this process right away, without waiting for the next rebuild"""
+        now = time.time()
+        with self.lock:
+            if self.built_at is None:
+                return
+            ring = self.rings.get(vacancy_id)
+            if ring is None:
+                ring = self.rings[vacancy_id] = HourlyRing(settings.TRENDING_WINDOW_HOURS)
+            ring.add(int(now // 3600), kind, count)
+            score = self.scores.get(vacancy_id, 0.0) + (
+                settings.TRENDING_WEIGHTS[kind] * count * math.exp(self.rate * (now - self.landmark))
+            )
+            self.scores[vacancy_id] = score
+            self.place(vacancy_id, score)
+
+    def place(self, vacancy_id, score):
+        top = self.top
+        if vacancy_id in top:
+            top.remove(vacancy_id)
+        elif len(top) >= settings.TRENDING_TOP_K:
+            if score <= self.scores[top[-1]]:
+                return
+            top.pop()
+        # The board is short (TRENDING_TOP_K), a linear scan from the bottom is enough
+        index = len(top)
+        while index > 0 and self.scores[top[index - 1]] < score:
+            index -= 1
+        top.insert(index, vacancy_id)
+
+    def leaderboard(self, limit=None):
+        """[(vacancy id, decayed score, activity counts within the window)] best first"""
+        self.ensure_built()
+        now = time.time()
+        hour = int(now // 3600)
+        with self.lock:
+            decay = math.exp(-self.rate * (now - self.landmark))
+            return [
+                (vacancy_id, self.scores[vacancy_id] * decay, self.rings[vacancy_id].totals(hour))
+                for vacancy_id in self.top[:limit]
+            ]
+
+
+trending_vacancies = TrendingBoard()
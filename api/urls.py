@@ -2,8 +2,13 @@ from django.urls import path
 from .views import (
     VacancyListCreateView,
     VacancyRetrieveUpdateDeleteView,
+    VacancyBatchCreateView,
+    VacancyAutocompleteView,
+    VacancyTrendingView,
     ResumeListCreateView,
     ResumeRetrieveUpdateDeleteView,
+    ResumeDownloadView,
+    ResumePreviewView,
     ApplicationCreateView,
     ApplicationListView,
     ApplicationAcceptView,
@@ -13,17 +18,32 @@ from .views import (
     FavoriteVacancyToggleView,
     FavoriteVacancyDeleteView,
     UserProfileView,
+    SavedSearchListCreateView,
+    SavedSearchDetailView,
+    SavedSearchInboxView,
+    ProfileDumpView,
+    SlowQueryReportView,
+    MetricsView,
+    ApplicationStreamTicketView,
+    application_status_stream,
 )
 
 urlpatterns = [
     path("vacancies/", VacancyListCreateView.as_view(), name="vacancy-list-create"),
     path("vacancies/<int:pk>/", VacancyRetrieveUpdateDeleteView.as_view(), name="vacancy-detail"),
+    path("vacancies/batch/", VacancyBatchCreateView.as_view(), name="vacancy-batch-create"),
+    path("vacancies/autocomplete/", VacancyAutocompleteView.as_view(), name="vacancy-autocomplete"),
+    path("vacancies/trending/", VacancyTrendingView.as_view(), name="vacancy-trending"),
 
     path("resumes/", ResumeListCreateView.as_view(), name="resume-list-create"),
     path("resumes/<int:pk>/", ResumeRetrieveUpdateDeleteView.as_view(), name="resume-detail"),
+    path("resumes/<int:pk>/file/", ResumeDownloadView.as_view(), name="resume-download"),
+    path("resumes/<int:pk>/preview/", ResumePreviewView.as_view(), name="resume-preview"),
 
     path("vacancies/<int:vacancy_id>/apply/", ApplicationCreateView.as_view(), name="application-create"),
     path("applications/", ApplicationListView.as_view(), name="application-list"),
+    path("applications/stream/", application_status_stream, name="application-stream"),
+    path("applications/stream/ticket/", ApplicationStreamTicketView.as_view(), name="application-stream-ticket"),
     path("applications/<int:application_id>/accept/", ApplicationAcceptView.as_view(), name="application-accept"),
     path("applications/<int:application_id>/reject/", ApplicationRejectView.as_view(), name="application-reject"),
     path("applications/<int:application_id>/review/", ApplicationReviewView.as_view(), name="application-review"),
@@ -32,5 +52,13 @@ urlpatterns = [
     path("favorites/", FavoriteVacancyListView.as_view(), name="favorite-list"),
     path("vacancies/<int:vacancy_id>/favorite/delete/", FavoriteVacancyDeleteView.as_view(), name="favorite-delete"),
 
+    path("saved-searches/", SavedSearchListCreateView.as_view(), name="saved-search-list-create"),
+    path("saved-searches/<int:pk>/", SavedSearchDetailView.as_view(), name="saved-search-detail"),
+    path("saved-searches/inbox/", SavedSearchInboxView.as_view(), name="saved-search-inbox"),
+
     path("my-account/", UserProfileView.as_view(), name="user-profile"),
+
+    path("profiling/", ProfileDumpView.as_view(), name="profiling-dump"),
+    path("querylog/", SlowQueryReportView.as_view(), name="querylog-report"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
 ]
@@ -1,17 +1,41 @@
 from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Subquery
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
-from .models import Vacancy, Resume, Application, FavoriteVacancy
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, IsAdminUser
+from rest_framework.exceptions import PermissionDenied, AuthenticationFailed, ValidationError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from accounts.models import CustomUser
+from .models import Vacancy, Resume, Application, FavoriteVacancy, SavedSearch, SavedSearchMatch
+from .fieldsets import SparseFieldsetViewMixin
+from . import documents, tasks
+from .downloads import protected_file_response
+from .autocomplete import vacancy_autocomplete, FIELDS as AUTOCOMPLETE_FIELDS
+from . import dedupe
+from .trending import trending_vacancies
+from .profile_cache import profile_cache
+from .events import application_events, event_stream, issue_ticket, redeem_ticket
+from .sync import DeltaSyncMixin
+from .idempotency import IdempotentCreateMixin
+from .batch import BatchCreateMixin, send_batch_saved
+from .profiling import route_profiler
+from .querylog import slow_query_log
 
 from rest_framework import viewsets
 
 
 from .serializers import (
-    VacancySerializer, 
+    VacancySerializer,
+    FlatVacancySerializer,
     ResumeSerializer,
     ResumeCreateSerializer,
     ApplicationSerializer,
@@ -22,6 +46,8 @@ from .serializers import (
     VacancyCreateSerializer,
     ApplicationCreateSerializer,
     ApplicationCompactSerializer,
+    SavedSearchSerializer,
+    SavedSearchMatchSerializer,
 )
 
 
@@ -30,15 +56,14 @@ class UserProfileView(APIView):
 
     def get(self, request):
         user = request.user
-        if user.role == "seeker":
-            serializer = SeekerProfileSerializer(user)
-        else:
-            serializer = EmployerProfileSerializer(user)
-        return Response(serializer.data)
+        serializer_class = SeekerProfileSerializer if user.role == "seeker" else EmployerProfileSerializer
+        data, hit = profile_cache.get_or_build(user.pk, lambda: serializer_class(user).data)
+        return Response(data, headers={"X-Cache": "hit" if hit else "miss"})
 
 
-class VacancyListCreateView(generics.ListCreateAPIView):
-    queryset = Vacancy.objects.order_by("-created_at")
+class VacancyListCreateView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
+    # Served by the partial index on active vacancies; flagged reposts are left out
+    queryset = Vacancy.objects.filter(is_active=True, duplicate_of__isnull=True).order_by("-created_at")
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_serializer_class(self):
@@ -51,6 +76,11 @@ class VacancyListCreateView(generics.ListCreateAPIView):
         title = self.request.query_params.get("t")
         if title:
             qs = qs.filter(title__icontains=title)
+        # Exact values, served by the (location, employment_type, work_format) index
+        for field in ("location", "employment_type", "work_format"):
+            value = self.request.query_params.get(field)
+            if value:
+                qs = qs.filter(**{field: value})
 
         date_obj = self.request.query_params.get("d")
         if date_obj:
@@ -62,19 +92,176 @@ class VacancyListCreateView(generics.ListCreateAPIView):
             )
         return qs
 
+    def list(self, request, *args, **kwargs):
+        if documents.can_serve(request):
+            return documents.list_response(self.filter_queryset(self.get_queryset()))
+        if not settings.API_FLAT_SERIALIZATION:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = list(self.get_serializer().fields)
+        return Response(FlatVacancySerializer(queryset, fields=fields).data)
+
+    def create(self, request, *args, **kwargs):
+        self.duplicate_of = None
+        self.merged = False
+        response = super().create(request, *args, **kwargs)
+        if self.duplicate_of:
+            response["X-Duplicate-Of"] = str(self.duplicate_of)
+            if self.merged:
+                response.status_code = status.HTTP_200_OK
+        return response
+
     def perform_create(self, serializer):
         if self.request.user.role != 'employer':
             raise PermissionDenied("Only employers can create vacancies")
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            dedupe.lock_author(self.request.user.pk)
+            minhash, self.duplicate_of = dedupe.check(serializer.validated_data, self.request.user.pk)
+            if self.duplicate_of and settings.DEDUPE_ACTION == "merge":
+                original = Vacancy.objects.filter(pk=self.duplicate_of).first()
+                if original is not None:
+                    # The repost refreshes the original instead of adding a row
+                    serializer.instance = original
+                    serializer.save(minhash=minhash)
+                    self.merged = True
+                    return
+            serializer.save(author=self.request.user, minhash=minhash, duplicate_of_id=self.duplicate_of)
+
+class VacancyBatchCreateView(IdempotentCreateMixin, BatchCreateMixin, generics.GenericAPIView):
+    """Creates up to VACANCY_BATCH_MAX_SIZE vacancies from a list of payloads in one insert"""
+    serializer_class = VacancyCreateSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_max_batch_size(self):
+        return settings.VACANCY_BATCH_MAX_SIZE
+
+    def post(self, request, *args, **kwargs):
+        if request.user.role != 'employer':
+            raise PermissionDenied("Only employers can create vacancies")
+        return self.create(request, *args, **kwargs)
+
+    def perform_batch_create(self, items):
+        author = self.request.user
+        results = {}
+        vacancies, merged = [], {}
+        # Reposts within the batch itself, which the shared index can't see yet
+        batch_index, batch_signatures = dedupe.LSHIndex(), {}
+        with transaction.atomic():
+            dedupe.lock_author(author.pk)
+            originals = {}
+            for index, serializer in items:
+                minhash, original = dedupe.check(serializer.validated_data, author.pk)
+                if original is None and settings.DEDUPE_ENABLED:
+                    earlier = next((
+                        candidate for candidate in sorted(batch_index.candidates(minhash, author.pk))
+                        if dedupe.similarity(minhash, batch_signatures[candidate]) >= settings.DEDUPE_THRESHOLD
+                    ), None)
+                    if earlier is not None:
+                        results[index] = {
+                            "status": "invalid",
+                            "errors": {"non_field_errors": [f"Near-duplicate of item {earlier} in this batch"]},
+                        }
+                        continue
+                    batch_index.add(index, minhash, author.pk)
+                    batch_signatures[index] = minhash
+                if original and settings.DEDUPE_ACTION == "merge":
+                    originals[index] = (original, minhash, serializer.validated_data)
+                    continue
+                vacancy = Vacancy(**serializer.validated_data, author=author, minhash=minhash, duplicate_of_id=original)
+                vacancies.append((index, vacancy))
+
+            if originals:
+                # Reposts refresh their originals, in one UPDATE for the batch
+                found = Vacancy.objects.in_bulk({original for original, _, _ in originals.values()})
+                fields = {"minhash", "updated_at"}
+                now = timezone.now()
+                for index, (original, minhash, values) in originals.items():
+                    vacancy = found.get(original)
+                    if vacancy is None:
+                        vacancy = Vacancy(**values, author=author, minhash=minhash)
+                        vacancies.append((index, vacancy))
+                        continue
+                    for field, value in values.items():
+                        setattr(vacancy, field, value)
+                    vacancy.minhash, vacancy.updated_at = minhash, now
+                    fields.update(values)
+                    merged[vacancy.pk] = vacancy
+                    results[index] = {"status": "merged", "id": original}
+                Vacancy.objects.bulk_update(list(merged.values()), sorted(fields))
+
+            Vacancy.objects.bulk_create([vacancy for _, vacancy in vacancies])
+            # bulk_create and bulk_update skip post_save; the batch receivers
+            # queue documents, percolation and index updates once per batch
+            send_batch_saved(Vacancy, [vacancy for _, vacancy in vacancies], created=True)
+            send_batch_saved(Vacancy, list(merged.values()), created=False)
+
+        for index, vacancy in vacancies:
+            results[index] = {"status": "created", "id": vacancy.pk}
+            if vacancy.duplicate_of_id:
+                results[index]["duplicate_of"] = vacancy.duplicate_of_id
+        return results
+
+
+class VacancyAutocompleteView(APIView):
+    """Search-as-you-type suggestions for vacancy titles, companies and locations"""
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        prefix = request.query_params.get("q", "")
+        field = request.query_params.get("field")
+        if field and field not in AUTOCOMPLETE_FIELDS:
+            return Response(
+                {"detail": f"field must be one of: {', '.join(AUTOCOMPLETE_FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), settings.AUTOCOMPLETE_TOP_K)
+        except ValueError:
+            limit = 10
+        fields = [field] if field else AUTOCOMPLETE_FIELDS
+        return Response(vacancy_autocomplete.suggest(prefix, fields, limit))
+
+
+class VacancyTrendingView(APIView):
+    """Active vacancies with the most recent activity, best first, from the in-memory board"""
+    permission_classes = [IsAuthenticatedOrReadOnly]
 
-class VacancyRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 50)
+        except ValueError:
+            limit = 20
+        board = trending_vacancies.leaderboard()
+        vacancies = Vacancy.objects.filter(
+            pk__in=[vacancy_id for vacancy_id, _, _ in board], is_active=True, duplicate_of__isnull=True
+        )
+        rows = {row["id"]: row for row in FlatVacancySerializer(vacancies).data}
+        results = []
+        for vacancy_id, score, activity in board:
+            if vacancy_id in rows:
+                results.append({**rows[vacancy_id], "trending": {"score": round(score, 3), **activity}})
+                if len(results) == limit:
+                    break
+        return Response(results)
+
+
+class VacancyRetrieveUpdateDeleteView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Vacancy.objects.all()
     serializer_class = VacancySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def retrieve(self, request, *args, **kwargs):
+        if documents.can_serve(request):
+            document = documents.load_document(kwargs["pk"])
+            if document is None:
+                raise Http404
+            tasks.view_buffer.add(document.vacancy_id)
+            trending_vacancies.record(document.vacancy_id, "views")
+            return documents.detail_response(request, document)
         vacancy = self.get_object()
-        vacancy.increment_views()
+        tasks.view_buffer.add(vacancy.pk)
+        trending_vacancies.record(vacancy.pk, "views")
+        # Like the stored document, show the views counted so far; this one is still buffered
         serializer = self.get_serializer(vacancy)
         return Response(serializer.data)
 
@@ -82,7 +269,14 @@ class VacancyRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         vacancy = self.get_object()
         if vacancy.author != self.request.user:
             raise PermissionDenied("You can only edit your own vacancies")
-        serializer.save()
+        values = {field: serializer.validated_data.get(field, getattr(vacancy, field)) for field in dedupe.TEXT_FIELDS}
+        if values == {field: getattr(vacancy, field) for field in dedupe.TEXT_FIELDS} and vacancy.minhash:
+            serializer.save()
+            return
+        with transaction.atomic():
+            dedupe.lock_author(vacancy.author_id)
+            minhash, duplicate_of = dedupe.check(values, vacancy.author_id, exclude=vacancy.pk)
+            serializer.save(minhash=minhash, duplicate_of_id=duplicate_of)
 
     def perform_destroy(self, instance):
         if instance.author != self.request.user:
@@ -126,31 +320,67 @@ class ResumeRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         instance.delete()
 
 
-class ApplicationCreateView(generics.CreateAPIView):
+class ResumeDownloadView(APIView):
+    """Resume file for its owner and for employers the seeker applied to"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        resume = get_object_or_404(Resume.objects.only("id", "user_id", "file"), pk=pk)
+        if not resume.can_download(request.user):
+            raise PermissionDenied("You don't have access to this resume")
+        if not resume.file:
+            raise Http404
+        return protected_file_response(request, resume.file)
+
+
+class ResumePreviewView(APIView):
+    """First-page preview image of a resume, with the same access rules as the file"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        resume = get_object_or_404(Resume.objects.only("id", "user_id", "preview"), pk=pk)
+        if not resume.can_download(request.user):
+            raise PermissionDenied("You don't have access to this resume")
+        if not resume.preview:
+            raise Http404
+        return protected_file_response(
+            request, resume.preview, filename=f"resume-{resume.pk}-preview.png", as_attachment=False
+        )
+
+
+class ApplicationCreateView(IdempotentCreateMixin, generics.CreateAPIView):
     serializer_class = ApplicationCreateSerializer
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
-        if self.request.user.role != 'seeker':
+        user = self.request.user
+        if user.role != 'seeker':
             raise PermissionDenied("Only seekers can apply for vacancies")
-        vacancy = get_object_or_404(Vacancy, id=self.kwargs["vacancy_id"])
-        
-        # Check if user already applied
-        if Application.objects.filter(applicant=self.request.user, vacancy=vacancy).exists():
-            raise PermissionDenied("You have already applied for this vacancy")
-        
-        # Automatically get user's resume if exists
-        resume = None
-        if hasattr(self.request.user, 'resume'):
-            resume = self.request.user.resume
-        
-        serializer.save(applicant=self.request.user, vacancy=vacancy, resume=resume)
 
+        # One query for the vacancy and the user's resume, if any
+        vacancy = get_object_or_404(
+            Vacancy.objects.only("id", "author_id").annotate(
+                seeker_resume_id=Subquery(Resume.objects.filter(user_id=user.pk).values("pk")[:1])
+            ),
+            id=self.kwargs["vacancy_id"],
+        )
+
+        # The unique (applicant, vacancy) constraint decides, so concurrent
+        # double submits can't both pass a separate existence check
+        try:
+            with transaction.atomic():
+                serializer.save(applicant=user, vacancy=vacancy, resume_id=vacancy.seeker_resume_id)
+        except IntegrityError:
+            if Application.objects.filter(applicant=user, vacancy=vacancy).exists():
+                raise PermissionDenied("You have already applied for this vacancy")
+            raise
 
-class ApplicationListView(generics.ListAPIView):
+
+class ApplicationListView(DeltaSyncMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """List applications - for employer: all applications to their vacancies, for seeker: their own applications"""
     serializer_class = ApplicationSerializer
     permission_classes = [IsAuthenticated]
+    tombstone_kind = "application"
 
     def get_queryset(self):
         if self.request.user.role == 'employer':
@@ -167,6 +397,60 @@ class ApplicationListView(generics.ListAPIView):
             raise PermissionDenied("Invalid user role")
 
 
+def authenticate_stream(request):
+    """JWT from the Authorization header, or a single-use `ticket` query parameter since EventSource can't set headers"""
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    if header:
+        raw_token = auth.get_raw_token(header)
+        return auth.get_user(auth.get_validated_token(raw_token)) if raw_token else None
+    ticket = request.GET.get("ticket")
+    if not ticket:
+        return None
+    user_id = redeem_ticket(ticket)
+    if user_id is None:
+        raise AuthenticationFailed("Stream ticket is invalid, expired or already used.")
+    return CustomUser.objects.filter(pk=user_id, is_active=True).first()
+
+
+class ApplicationStreamTicketView(APIView):
+    """Issue a single-use ticket for opening the application status stream"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response(
+            {"ticket": issue_ticket(request.user.pk), "expires_in": settings.EVENTS_TICKET_SECONDS},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+async def application_status_stream(request):
+    """Server-Sent Events stream of status changes for the user's applications
+
+    Needs an ASGI server: under WSGI a stream would hold a worker for as long
+    as the client stays connected, so it is refused with 501.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "Event streams are only served under ASGI."}, status=501)
+    try:
+        user = await sync_to_async(authenticate_stream)(request)
+    except (InvalidToken, AuthenticationFailed) as exc:
+        return JsonResponse(exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}, status=401)
+    except TokenError as exc:
+        return JsonResponse({"detail": str(exc)}, status=401)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    response = StreamingHttpResponse(
+        event_stream(application_events, user.pk, last_event_id),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 class ApplicationAcceptView(APIView):
     """Accept an application"""
     permission_classes = [IsAuthenticated]
@@ -181,7 +465,11 @@ class ApplicationAcceptView(APIView):
         if application.vacancy.author != request.user:
             raise PermissionDenied("You can only accept applications for your own vacancies")
         
-        application.mark_accepted()
+        if not application.mark_accepted():
+            return Response(
+                {"detail": "The application status was changed by another request", "status": application.status},
+                status=status.HTTP_409_CONFLICT
+            )
         return Response(
             {"message": "Application accepted", "status": application.status},
             status=status.HTTP_200_OK
@@ -202,7 +490,11 @@ class ApplicationRejectView(APIView):
         if application.vacancy.author != request.user:
             raise PermissionDenied("You can only reject applications for your own vacancies")
         
-        application.mark_rejected()
+        if not application.mark_rejected():
+            return Response(
+                {"detail": "The application status was changed by another request", "status": application.status},
+                status=status.HTTP_409_CONFLICT
+            )
         return Response(
             {"message": "Application rejected", "status": application.status},
             status=status.HTTP_200_OK
@@ -223,7 +515,11 @@ class ApplicationReviewView(APIView):
         if application.vacancy.author != request.user:
             raise PermissionDenied("You can only review applications for your own vacancies")
         
-        application.mark_reviewed()
+        if not application.mark_reviewed():
+            return Response(
+                {"detail": "The application status was changed by another request", "status": application.status},
+                status=status.HTTP_409_CONFLICT
+            )
         return Response(
             {"message": "Application marked as reviewed", "status": application.status},
             status=status.HTTP_200_OK
@@ -251,9 +547,11 @@ class FavoriteVacancyToggleView(generics.GenericAPIView):
             return Response({"message": "Added to favorites"}, status=status.HTTP_201_CREATED)
         
 
-class FavoriteVacancyListView(generics.ListAPIView):
+class FavoriteVacancyListView(DeltaSyncMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     serializer_class = FavoriteListSerializer
     permission_classes = [IsAuthenticated]
+    sync_field = "added_at"
+    tombstone_kind = "favorite"
 
     def get_queryset(self):
         return FavoriteVacancy.objects.filter(user=self.request.user)
@@ -271,3 +569,116 @@ class FavoriteVacancyDeleteView(generics.DestroyAPIView):
         favorite.delete()
         return Response({"message": "Deleted from favorites"}, status=status.HTTP_200_OK)
 
+
+class SavedSearchListCreateView(generics.ListCreateAPIView):
+    """A seeker's saved searches; vacancies posted later that match one land in the inbox"""
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return SavedSearch.objects.none()
+        return SavedSearch.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        if user.role != 'seeker':
+            raise PermissionDenied("Only seekers can save searches")
+        if SavedSearch.objects.filter(user=user).count() >= settings.SAVED_SEARCH_MAX_PER_USER:
+            raise ValidationError(f"You can keep at most {settings.SAVED_SEARCH_MAX_PER_USER} saved searches")
+        serializer.save(user=user)
+
+
+class SavedSearchDetailView(generics.RetrieveDestroyAPIView):
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return SavedSearch.objects.none()
+        return SavedSearch.objects.filter(user=self.request.user)
+
+
+class SavedSearchInboxView(APIView):
+    """New vacancies that matched the user's saved searches, newest first
+
+    `?unread=1` leaves out read entries and `?search=<id>` keeps one search's
+    matches. POST marks entries read: the given `ids`, or all of them.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 50)), 1), 200)
+        except ValueError:
+            limit = 50
+        matches = SavedSearchMatch.objects.filter(user=request.user)
+        unread = matches.filter(read_at__isnull=True)
+        if request.query_params.get("unread", "").lower() in ("1", "true"):
+            matches = unread
+        search = request.query_params.get("search")
+        if search:
+            if not search.isdigit():
+                raise ValidationError({"search": "Expected a saved search id"})
+            matches = matches.filter(search_id=search)
+        matches = matches.select_related("vacancy").order_by("-matched_at")[:limit]
+        return Response({"unread": unread.count(), "results": SavedSearchMatchSerializer(matches, many=True).data})
+
+    def post(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        matches = SavedSearchMatch.objects.filter(user=request.user, read_at__isnull=True)
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+                raise ValidationError({"ids": "Expected a list of inbox entry ids"})
+            matches = matches.filter(pk__in=ids)
+        return Response({"marked_read": matches.update(read_at=timezone.now())})
+
+
+
+class ProfileDumpView(APIView):
+    """Profiles collected by SamplingProfilerMiddleware in the serving process
+
+    `?dump=collapsed` returns folded stacks for flamegraph tools,
+    `?dump=pstats` a marshalled pstats file; `?route=` limits the dump to one
+    url pattern. DELETE discards everything collected so far.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        dump_format = request.query_params.get("dump")
+        route = request.query_params.get("route") or None
+        if dump_format == "collapsed":
+            return HttpResponse(route_profiler.collapsed(route), content_type="text/plain; charset=utf-8")
+        if dump_format == "pstats":
+            response = HttpResponse(route_profiler.pstats_dump(route), content_type="application/octet-stream")
+            response["Content-Disposition"] = 'attachment; filename="profile.pstats"'
+            return response
+        return Response(route_profiler.summary())
+
+    def delete(self, request):
+        route_profiler.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SlowQueryReportView(APIView):
+    """Slowest query shapes of the serving process, with their plans and flagged scans"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            limit = max(1, int(request.query_params.get("limit", 20)))
+        except ValueError:
+            limit = 20
+        return Response(slow_query_log.report(limit))
+
+    def delete(self, request):
+        slow_query_log.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MetricsView(APIView):
+    """Cache counters of the serving process"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({"profile_cache": profile_cache.stats()})
@@ -0,0 +1,110 @@
+"""OpenAPI schema served from a pre-generated artifact.
+
+drf_yasg is only imported when the docs UI is opened or the schema has to be
+generated, so it stays out of every worker's startup path. Build the artifact
+at deploy time with `python manage.py generate_openapi`.
+"""
+import gzip
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+
+_lock = threading.Lock()
+_swagger_ui = None
+_artifact = None
+
+
+def schema_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="TajWorks",
+        default_version='v1',
+        description="Job search and recruitment web service in Tajikistan",
+        terms_of_service="https://www.google.com/policies/terms/",
+        contact=openapi.Contact(email="contact@jobsearch.local"),
+        license=openapi.License(name="BSD License"),
+    )
+
+
+def generate_schema():
+    """Introspect every view and return the schema as compact JSON bytes"""
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    # Views pick serializers by request method, so introspection needs a request.
+    # An empty url keeps the mock request's host out of the schema, the UI then
+    # targets whichever host served it.
+    request = Request(APIRequestFactory().get("/docs/openapi.json"))
+    generator = OpenAPISchemaGenerator(schema_info(), url=settings.OPENAPI_BASE_URL)
+    schema = generator.get_schema(request=request, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def write_artifact(body):
+    path = settings.OPENAPI_SCHEMA_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
+    path.with_name(path.name + ".gz").write_bytes(gzip.compress(body, mtime=0))
+
+
+class Artifact:
+    def __init__(self, body, body_gzip):
+        self.body = body
+        self.body_gzip = body_gzip
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+def load_artifact():
+    global _artifact
+    if _artifact is None:
+        with _lock:
+            if _artifact is None:
+                path = settings.OPENAPI_SCHEMA_PATH
+                gz_path = path.with_name(path.name + ".gz")
+                if path.exists():
+                    body = path.read_bytes()
+                    body_gzip = gz_path.read_bytes() if gz_path.exists() else gzip.compress(body, mtime=0)
+                else:
+                    # No deploy-time artifact: generate once per process
+                    body = generate_schema()
+                    body_gzip = gzip.compress(body, mtime=0)
+                _artifact = Artifact(body, body_gzip)
+    return _artifact
+
+
+@require_safe
+def schema_json(request):
+    artifact = load_artifact()
+    if request.headers.get("If-None-Match") == artifact.etag:
+        response = HttpResponseNotModified()
+    elif "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = HttpResponse(artifact.body_gzip, content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(artifact.body, content_type="application/json")
+    response["ETag"] = artifact.etag
+    response["Cache-Control"] = f"public, max-age={settings.OPENAPI_MAX_AGE}"
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+def swagger_ui(request, *args, **kwargs):
+    global _swagger_ui
+    if request.GET.get("format") == "openapi":
+        return schema_json(request)
+    if _swagger_ui is None:
+        from drf_yasg.views import get_schema_view
+        from rest_framework import permissions
+
+        schema_view = get_schema_view(schema_info(), public=True, permission_classes=(permissions.AllowAny,))
+        # The UI page itself doesn't introspect views, it loads the artifact from SPEC_URL
+        _swagger_ui = schema_view.with_ui('swagger', cache_timeout=0)
+    return _swagger_ui(request, *args, **kwargs)
@@ -51,6 +51,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.profiling.SamplingProfilerMiddleware',
+    'api.querylog.SlowQueryLogMiddleware',
 ]
 
 ROOT_URLCONF = 'server.urls'
@@ -77,7 +79,153 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.TokenBucketThrottle',
+    ),
+    # Anonymous clients are throttled by address. X-Forwarded-For is only
+    # trusted for the NUM_PROXIES reverse proxies in front of the app; with 0
+    # REMOTE_ADDR is used, so a forged header can't buy a fresh bucket.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
+}
+
+# Token bucket throttling shared by all worker processes through a memory-mapped
+# file of THROTTLE_SLOTS buckets. THROTTLE_SHARED_FILE defaults to run/ in this
+# checkout, so deployments never share buckets; point it at a directory on
+# tmpfs owned by the service user (e.g. under /run) to keep it off the disk.
+# The file must be a regular file owned by that user with mode 0600.
+# Rates are "count/period" by role; THROTTLE_ROUTE_RATES gives url names their
+# own buckets and rates. None means unlimited.
+THROTTLE_RATES = {
+    'anon': os.getenv('THROTTLE_ANON_RATE', '120/min'),
+    'seeker': os.getenv('THROTTLE_USER_RATE', '600/min'),
+    'employer': os.getenv('THROTTLE_USER_RATE', '600/min'),
+    'staff': None,
+}
+THROTTLE_ROUTE_RATES = {
+    'vacancy-list-create': {'anon': '30/min'},
+    'vacancy-detail': {'anon': '60/min'},
+    'vacancy-autocomplete': {'anon': '300/min', 'seeker': '600/min', 'employer': '600/min'},
+}
+THROTTLE_SLOTS = int(os.getenv('THROTTLE_SLOTS', '65536'))
+THROTTLE_SHARED_FILE = os.getenv('THROTTLE_SHARED_FILE', str(BASE_DIR / 'run' / f'throttle-{THROTTLE_SLOTS}.bin'))
+if os.getenv('THROTTLE_ENABLED', 'True').strip().lower() not in ('true', '1', 'yes'):
+    REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = ()
+
+# Build vacancy list responses from .values() rows instead of VacancySerializer
+API_FLAT_SERIALIZATION = os.getenv('API_FLAT_SERIALIZATION', 'True').strip().lower() in ('true', '1', 'yes')
+
+# Serve vacancy list/detail JSON from pre-rendered documents. Documents are
+# re-rendered through the task queue when a vacancy or its counters change;
+# reads never render. A document older than VACANCY_DOCUMENT_MAX_AGE seconds is
+# still served but queued for a re-render, as a backstop for missed changes.
+VACANCY_DOCUMENTS_ENABLED = os.getenv('VACANCY_DOCUMENTS_ENABLED', 'True').strip().lower() in ('true', '1', 'yes')
+VACANCY_DOCUMENT_MAX_AGE = int(os.getenv('VACANCY_DOCUMENT_MAX_AGE', '60'))
+VACANCY_DOCUMENT_COMPRESS = True
+
+# In-memory autocomplete indexes are rebuilt from the database in the background
+# after this many seconds so that writes made by other worker processes show up.
+AUTOCOMPLETE_REFRESH_SECONDS = int(os.getenv('AUTOCOMPLETE_REFRESH_SECONDS', '300'))
+
+# Prefixes up to AUTOCOMPLETE_PREFIX_DEPTH characters keep a ranked list of
+# their best AUTOCOMPLETE_TOP_K suggestions; this is also the largest `limit`.
+AUTOCOMPLETE_TOP_K = int(os.getenv('AUTOCOMPLETE_TOP_K', '50'))
+AUTOCOMPLETE_PREFIX_DEPTH = int(os.getenv('AUTOCOMPLETE_PREFIX_DEPTH', '4'))
+
+# Trending vacancies: views, favorites and applications are counted in hourly
+# buckets; scores decay with TRENDING_HALF_LIFE_HOURS and the in-memory board
+# is rebuilt from the last TRENDING_WINDOW_HOURS of buckets periodically.
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '12'))
+TRENDING_WINDOW_HOURS = int(os.getenv('TRENDING_WINDOW_HOURS', '72'))
+TRENDING_REFRESH_SECONDS = int(os.getenv('TRENDING_REFRESH_SECONDS', '60'))
+TRENDING_TOP_K = 100
+TRENDING_WEIGHTS = {'views': 1, 'favorites': 5, 'applications': 10}
+
+# Database-backed task queue processed by `manage.py runworkers`. With
+# TASK_QUEUE_EAGER on, tasks run inline in the request instead; that is meant
+# for development without a worker, never for production.
+TASK_QUEUE_EAGER = os.getenv('TASK_QUEUE_EAGER', 'False').strip().lower() in ('true', '1', 'yes')
+TASK_VISIBILITY_TIMEOUT = int(os.getenv('TASK_VISIBILITY_TIMEOUT', '60'))
+TASK_MAX_ATTEMPTS = int(os.getenv('TASK_MAX_ATTEMPTS', '3'))
+# Workers delete done tasks after this many hours; failed ones are kept.
+TASK_RETENTION_HOURS = int(os.getenv('TASK_RETENTION_HOURS', '24'))
+
+# Vacancy views are counted in process memory and queued once per interval.
+VIEW_FLUSH_SECONDS = int(os.getenv('VIEW_FLUSH_SECONDS', '5'))
+
+# Server-Sent Events for application status changes. Streams need an ASGI
+# server running a single process: the event hub lives in process memory.
+# Streams are opened with single-use tickets valid for EVENTS_TICKET_SECONDS.
+EVENTS_HISTORY_SIZE = int(os.getenv('EVENTS_HISTORY_SIZE', '5000'))
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '100'))
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_RETRY_MS = 3000
+EVENTS_TICKET_SECONDS = int(os.getenv('EVENTS_TICKET_SECONDS', '30'))
+
+# Delta sync (`?since=`) on application and favorite lists
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '30'))
+SYNC_TOKEN_MARGIN_SECONDS = 5
+
+# Saved searches: new vacancies are matched against them by the task queue
+# through an in-memory percolator index (api.percolator) and matches go to the
+# owner's inbox at /api/saved-searches/inbox/. The index picks up new searches
+# on every run and is rebuilt after SAVED_SEARCH_REFRESH_SECONDS.
+SAVED_SEARCH_MAX_PER_USER = int(os.getenv('SAVED_SEARCH_MAX_PER_USER', '20'))
+SAVED_SEARCH_REFRESH_SECONDS = int(os.getenv('SAVED_SEARCH_REFRESH_SECONDS', '300'))
+
+# Default cache. LocMemCache is private to each process, so with several
+# worker processes set CACHE_BACKEND to a shared backend, e.g.
+# django.core.cache.backends.redis.RedisCache with CACHE_LOCATION=redis://host:6379/0
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+PROCESS_LOCAL_CACHES = ('LocMemCache', 'DummyCache')
+
+# /api/my-account/ payloads are cached per user in the default cache and
+# invalidated by signals; the TTL bounds staleness of bulk-updated view counts.
+# Invalidations made by one process must reach the others, so the cache is off
+# with a process-local backend unless PROFILE_CACHE_ENABLED says otherwise
+# (e.g. a single-process development server).
+PROFILE_CACHE_ENABLED = os.getenv(
+    'PROFILE_CACHE_ENABLED', str(not CACHES['default']['BACKEND'].endswith(PROCESS_LOCAL_CACHES))
+).strip().lower() in ('true', '1', 'yes')
+PROFILE_CACHE_TTL = int(os.getenv('PROFILE_CACHE_TTL', '300'))
+
+# `Idempotency-Key` on application submission: successful responses are kept in
+# the default cache for IDEMPOTENCY_KEY_TTL seconds and replayed to retries.
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', str(24 * 60 * 60)))
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+
+# Admin changelists of unfiltered tables above this size show an estimated count
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv('ADMIN_EXACT_COUNT_LIMIT', '10000'))
+
+# Sampling profiler middleware, dumps at /api/profiling/ (staff only).
+# PROFILER_ROUTE_RATES is "route=rate,..." keyed by url pattern, e.g.
+# "api/vacancies/=0.05,api/vacancies/<int:pk>/=0.01". PROFILER_MODE is
+# "stack" (sampled stacks, flamegraph dumps) or "pstats" (cProfile).
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'False').strip().lower() in ('true', '1', 'yes')
+PROFILER_MODE = os.getenv('PROFILER_MODE', 'stack').strip().lower()
+PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', '0'))
+PROFILER_ROUTE_RATES = {
+    route.strip(): float(rate)
+    for route, _, rate in (item.rpartition('=') for item in os.getenv('PROFILER_ROUTE_RATES', '').split(',') if item.strip())
 }
+PROFILER_INTERVAL = float(os.getenv('PROFILER_INTERVAL', '0.005'))
+
+# Slow query log, report at /api/querylog/ (staff only). Queries slower than
+# QUERYLOG_THRESHOLD_MS are kept in a ring buffer; each new query shape gets
+# its plan captured with EXPLAIN once.
+QUERYLOG_ENABLED = os.getenv('QUERYLOG_ENABLED', 'False').strip().lower() in ('true', '1', 'yes')
+QUERYLOG_THRESHOLD_MS = float(os.getenv('QUERYLOG_THRESHOLD_MS', '100'))
+QUERYLOG_EXPLAIN = os.getenv('QUERYLOG_EXPLAIN', 'True').strip().lower() in ('true', '1', 'yes')
+QUERYLOG_BUFFER_SIZE = int(os.getenv('QUERYLOG_BUFFER_SIZE', '500'))
+QUERYLOG_MAX_SHAPES = 1000
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.getenv('ACCESS_TOKEN_LIFETIME_MINUTES', '15'))),
@@ -93,6 +241,58 @@ DATABASES = {
     }
 }
 
+# Production SQLite profile (DB_PROFILE=production): WAL journal, tuned pragmas
+# applied on every new connection, a busy timeout instead of immediate
+# "database is locked" errors, and persistent connections.
+DB_PROFILE = os.getenv('DB_PROFILE', 'default').strip().lower()
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-65536')),
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '20'))
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+        },
+    })
+
+
+# Vacancy lifecycle: active vacancies older than VACANCY_EXPIRY_DAYS are
+# deactivated, and vacancies inactive for VACANCY_ARCHIVE_AFTER_DAYS move to the
+# archive tables together with their applications (see `expire_vacancies`).
+VACANCY_EXPIRY_DAYS = int(os.getenv('VACANCY_EXPIRY_DAYS', '60'))
+VACANCY_ARCHIVE_AFTER_DAYS = int(os.getenv('VACANCY_ARCHIVE_AFTER_DAYS', '180'))
+VACANCY_ARCHIVE_BATCH_SIZE = int(os.getenv('VACANCY_ARCHIVE_BATCH_SIZE', '500'))
+
+# Most vacancies accepted by one POST /api/vacancies/batch/
+VACANCY_BATCH_MAX_SIZE = int(os.getenv('VACANCY_BATCH_MAX_SIZE', '100'))
+
+# Near-duplicate vacancies: MinHash signatures over word shingles of title,
+# description and requirements, looked up in an LSH index of DEDUPE_BANDS
+# bands (DEDUPE_PERMUTATIONS must divide evenly). A post by the same employer
+# at DEDUPE_THRESHOLD estimated similarity or above is saved with duplicate_of
+# set and hidden from the list (DEDUPE_ACTION=flag), or updates the original
+# instead of creating a new vacancy (merge). Changing the permutations or the
+# shingle size needs `dedupe_vacancies --recompute`.
+DEDUPE_ENABLED = os.getenv('DEDUPE_ENABLED', 'True').strip().lower() in ('true', '1', 'yes')
+DEDUPE_ACTION = os.getenv('DEDUPE_ACTION', 'flag').strip().lower()
+DEDUPE_THRESHOLD = float(os.getenv('DEDUPE_THRESHOLD', '0.8'))
+DEDUPE_PERMUTATIONS = int(os.getenv('DEDUPE_PERMUTATIONS', '128'))
+DEDUPE_BANDS = int(os.getenv('DEDUPE_BANDS', '16'))
+DEDUPE_SHINGLE_SIZE = int(os.getenv('DEDUPE_SHINGLE_SIZE', '3'))
+DEDUPE_REFRESH_SECONDS = int(os.getenv('DEDUPE_REFRESH_SECONDS', '300'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -134,6 +334,19 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resume files are served by /api/resumes/<id>/file/ after an access check.
+# PROTECTED_MEDIA_SERVER hands the transfer to the front server: "nginx" sends
+# X-Accel-Redirect to PROTECTED_MEDIA_PREFIX (an `internal` location aliased to
+# MEDIA_ROOT), "sendfile" sends X-Sendfile (Apache, lighttpd). Empty streams
+# the file from Django. Don't expose MEDIA_ROOT/resumes publicly.
+PROTECTED_MEDIA_SERVER = os.getenv('PROTECTED_MEDIA_SERVER', '').strip().lower()
+PROTECTED_MEDIA_PREFIX = os.getenv('PROTECTED_MEDIA_PREFIX', '/protected-media/')
+PROTECTED_MEDIA_MAX_AGE = int(os.getenv('PROTECTED_MEDIA_MAX_AGE', '300'))
+
+# Width in pixels of the resume preview images rendered by the task queue.
+# PDFs are rasterised with poppler's pdftoppm when it is installed.
+RESUME_PREVIEW_WIDTH = int(os.getenv('RESUME_PREVIEW_WIDTH', '480'))
+
 AUTH_USER_MODEL = "accounts.CustomUser"
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -149,4 +362,11 @@ SWAGGER_SETTINGS = {
         }
     },
     'USE_SESSION_AUTH': False,  
+    'SPEC_URL': 'schema-json',
 }
+
+# Pre-generated OpenAPI document, see `manage.py generate_openapi`
+OPENAPI_SCHEMA_PATH = Path(os.getenv('OPENAPI_SCHEMA_PATH', BASE_DIR / 'openapi' / 'openapi.json'))
+OPENAPI_MAX_AGE = int(os.getenv('OPENAPI_MAX_AGE', '3600'))
+# Public API base url written into the schema; empty means "the host serving the docs"
+OPENAPI_BASE_URL = os.getenv('OPENAPI_BASE_URL', '')
@@ -1,30 +1,15 @@
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from django.conf import settings
-from django.conf.urls.static import static
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="TajWorks",
-        default_version='v1',
-        description="Job search and recruitment web service in Tajikistan",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contact@jobsearch.local"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from server.openapi import swagger_ui, schema_json
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
     path('auth/', include('accounts.urls')),
-    path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui')
+    path('docs/', swagger_ui, name='schema-swagger-ui'),
+    path('docs/openapi.json', schema_json, name='schema-json'),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# MEDIA_ROOT only holds resumes and their previews; they are served through the
+# access-checked endpoints in api, never as public static files.